@@ -0,0 +1,76 @@
+"""Compare direct and micro-batched embedding calls under concurrency.
+
+Simulates ``--clients`` concurrent callers, each embedding ``--calls``
+small requests of ``--texts`` texts, against a stub Ollama server (or a
+real one via ``--url``) and reports throughput and request counts.
+
+    python -m benchmarks.embedding_batcher_bench --clients 16 --calls 20
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_ollama import OllamaEmbeddings
+
+from src.core.embedding_batcher import BatchingEmbeddings
+from benchmarks.ollama_stub import OllamaStub
+
+
+def run(embeddings, clients: int, calls: int, texts: int) -> float:
+    """Run the workload and return elapsed seconds."""
+    def client(client_id: int) -> None:
+        for call in range(calls):
+            embeddings.embed_documents([f"client {client_id} call {call} text {i}" for i in range(texts)])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Ollama URL (default: start a local stub)")
+    parser.add_argument("--model", default="nomic-embed-text")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--texts", type=int, default=1)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--max-in-flight", type=int, default=2)
+    args = parser.parse_args()
+
+    stub = None if args.url else OllamaStub().start()
+    url = args.url or stub.url
+    total = args.clients * args.calls * args.texts
+
+    def report(label: str, elapsed: float, requests) -> None:
+        sent = f", {requests} HTTP requests" if requests is not None else ""
+        print(f"{label:>8}: {elapsed:6.2f}s  {total / elapsed:8.1f} texts/s{sent}")
+
+    try:
+        direct = OllamaEmbeddings(model=args.model, base_url=url)
+        before = stub.requests if stub else None
+        elapsed = run(direct, args.clients, args.calls, args.texts)
+        report("direct", elapsed, stub.requests - before if stub else None)
+
+        batched = BatchingEmbeddings(
+            OllamaEmbeddings(model=args.model, base_url=url),
+            max_batch_size=args.max_batch_size,
+            max_wait_ms=args.max_wait_ms,
+            max_in_flight=args.max_in_flight
+        )
+        before = stub.requests if stub else None
+        elapsed = run(batched, args.clients, args.calls, args.texts)
+        report("batched", elapsed, stub.requests - before if stub else None)
+        stats = batched.stats()
+        print(f"          avg batch {stats['avg_batch_size']:.1f} texts, "
+              f"avg queue wait {stats['avg_queue_wait_ms']:.1f}ms")
+        batched.close()
+    finally:
+        if stub:
+            stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Minimal stand-in for an Ollama server, for benchmarks and tests.
+
+Serves ``POST /api/embed`` with deterministic vectors after a simulated
+latency of ``base_latency + per_text_latency * len(input)``, and records how
+many requests and texts it received.
+
+Models are "loaded" on first use, taking ``load_latency`` seconds, and
+unloaded once their ``keep_alive`` runs out, as Ollama does. ``POST
+/api/generate`` with no prompt only loads the model, and ``GET /api/ps``
+lists the loaded ones.
+
+For multi-host tests, ``models`` limits which models the server has (listed
+by ``GET /api/tags``; others get a 404), ``POST /api/chat`` streams
+``answer`` word by word, and setting ``failing`` makes every request fail
+with a 503.
+
+Run standalone with ``python -m benchmarks.ollama_stub --port 11435``.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# Ollama's keep_alive when a request does not set one
+DEFAULT_KEEP_ALIVE = 300.0
+
+
+def parse_keep_alive(value: Any) -> float:
+    """Seconds from a keep_alive value (number or "10m"-style duration); negative never expires."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        return float(value)
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if value.endswith(suffix):
+            return float(value[:-len(suffix)]) * units[suffix]
+    return float(value)
+
+
+def canonical(model: str) -> str:
+    return model if ":" in model else f"{model}:latest"
+
+
+def fake_vector(text: str, dim: int) -> List[float]:
+    """Deterministic pseudo-embedding for a text."""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [(digest[i % len(digest)] - 128) / 128.0 for i in range(dim)]
+
+
+class OllamaStub:
+    """Threaded HTTP server that mimics the parts of Ollama the app uses."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        dim: int = 8,
+        base_latency: float = 0.02,
+        per_text_latency: float = 0.001,
+        load_latency: float = 0.0,
+        models: Optional[List[str]] = None,
+        answer: str = "The stub answer."
+    ):
+        self.dim = dim
+        self.base_latency = base_latency
+        self.per_text_latency = per_text_latency
+        self.load_latency = load_latency
+        self.models = models
+        self.answer = answer
+        self.failing = False
+        self.requests = 0
+        self.texts = 0
+        self.chats = 0
+        self.loads = 0
+        # Loaded model -> wall-clock expiry (None never expires)
+        self.loaded: Dict[str, Optional[float]] = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _use(self, model: str, keep_alive: Any) -> float:
+        """Load ``model`` if needed and restart its unload timer; returns the load time."""
+        seconds = parse_keep_alive(keep_alive)
+        with self._lock:
+            now = time.time()
+            expires = self.loaded.get(model, 0.0)
+            cold = model not in self.loaded or (expires is not None and expires <= now)
+            if cold:
+                self.loads += 1
+            self.loaded[model] = None if seconds < 0 else now + seconds
+        if cold and self.load_latency:
+            time.sleep(self.load_latency)
+        return self.load_latency if cold else 0.0
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or canonical(model) in {canonical(m) for m in self.models}
+
+    def unload(self, model: str) -> None:
+        """Evict a model, as Ollama does under memory pressure."""
+        with self._lock:
+            self.loaded.pop(model, None)
+
+    def running(self) -> List[Dict[str, Any]]:
+        """Loaded models in the shape of ``GET /api/ps``."""
+        now = time.time()
+        with self._lock:
+            models = {model: expires for model, expires in self.loaded.items() if expires is None or expires > now}
+        forever = datetime.now(timezone.utc) + timedelta(days=365 * 100)
+        return [
+            {
+                "name": model,
+                "model": model,
+                "size": 0,
+                "size_vram": 0,
+                "expires_at": (
+                    forever if expires is None else datetime.fromtimestamp(expires, timezone.utc)
+                ).isoformat(),
+            }
+            for model, expires in models.items()
+        ]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: dict) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, lines: List[dict]) -> None:
+                """Newline-delimited JSON, as Ollama streams; the body ends when the connection closes."""
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                for line in lines:
+                    self.wfile.write(json.dumps(line).encode("utf-8") + b"\n")
+                    self.wfile.flush()
+                    time.sleep(stub.per_text_latency)
+
+            def do_GET(self):
+                if stub.failing:
+                    self._send(503, {"error": "stub is failing"})
+                elif self.path == "/api/ps":
+                    self._send(200, {"models": stub.running()})
+                elif self.path == "/api/tags":
+                    self._send(200, {"models": [
+                        {"name": model, "model": model, "size": 0, "digest": "",
+                         "modified_at": datetime.now(timezone.utc).isoformat()}
+                        for model in stub.models or []
+                    ]})
+                else:
+                    self._send(404, {"error": f"unknown endpoint {self.path}"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                model = payload.get("model", "")
+                if stub.failing:
+                    self._send(503, {"error": "stub is failing"})
+                    return
+                if self.path not in ("/api/generate", "/api/embed", "/api/chat"):
+                    self._send(404, {"error": f"unknown endpoint {self.path}"})
+                    return
+                if not stub.serves(model):
+                    self._send(404, {"error": f"model '{model}' not found"})
+                    return
+                if self.path == "/api/generate" and not payload.get("prompt"):
+                    load = stub._use(model, payload.get("keep_alive"))
+                    self._send(200, {
+                        "model": model,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        "response": "",
+                        "done": True,
+                        "done_reason": "load",
+                        "load_duration": int(load * 1e9),
+                    })
+                    return
+                if self.path == "/api/chat":
+                    load = stub._use(model, payload.get("keep_alive"))
+                    with stub._lock:
+                        stub.chats += 1
+                    time.sleep(stub.base_latency)
+                    created = datetime.now(timezone.utc).isoformat()
+                    words = stub.answer.split(" ")
+                    lines = [
+                        {"model": model, "created_at": created, "done": False,
+                         "message": {"role": "assistant", "content": word if i == 0 else f" {word}"}}
+                        for i, word in enumerate(words)
+                    ]
+                    lines.append({
+                        "model": model, "created_at": created, "done": True, "done_reason": "stop",
+                        "message": {"role": "assistant", "content": ""},
+                        "load_duration": int(load * 1e9), "eval_count": len(words),
+                    })
+                    if payload.get("stream", True):
+                        self._stream(lines)
+                    else:
+                        self._send(200, {**lines[-1], "message": {"role": "assistant", "content": stub.answer}})
+                    return
+                if self.path != "/api/embed":
+                    self._send(404, {"error": f"unknown endpoint {self.path}"})
+                    return
+                load = stub._use(model, payload.get("keep_alive"))
+                texts = payload.get("input", [])
+                if isinstance(texts, str):
+                    texts = [texts]
+                with stub._lock:
+                    stub.requests += 1
+                    stub.texts += len(texts)
+                time.sleep(stub.base_latency + stub.per_text_latency * len(texts))
+                self._send(200, {
+                    "model": model,
+                    "embeddings": [fake_vector(text, stub.dim) for text in texts],
+                    "load_duration": int(load * 1e9),
+                })
+
+        return Handler
+
+    def start(self) -> "OllamaStub":
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "OllamaStub":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a stub Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--base-latency", type=float, default=0.02)
+    parser.add_argument("--per-text-latency", type=float, default=0.001)
+    parser.add_argument("--load-latency", type=float, default=0.0)
+    args = parser.parse_args()
+    stub = OllamaStub(port=args.port, dim=args.dim, base_latency=args.base_latency,
+                      per_text_latency=args.per_text_latency, load_latency=args.load_latency)
+    print(f"Ollama stub listening on {stub.url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
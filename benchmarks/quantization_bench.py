@@ -0,0 +1,65 @@
+"""Memory and recall of quantized flat indexes against float32.
+
+Builds one flat index per storage mode from the same ``--chunks`` vectors
+and reports the memory the first search pass needs, query latency, and
+recall@k against exact float32 search, with and without rescoring.
+Vectors are drawn around ``--clusters`` centres so that, like real
+embeddings, they are not uniformly spread over the sphere.
+
+    python -m benchmarks.quantization_bench --chunks 200000 --dim 768
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from src.core.flat_index import DEFAULT_RESCORE_FACTOR, FlatIndex
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres = rng.standard_normal((args.clusters, args.dim), dtype=np.float32)
+    vectors = centres[rng.integers(args.clusters, size=args.chunks)]
+    vectors += 0.7 * rng.standard_normal((args.chunks, args.dim), dtype=np.float32)
+    queries = vectors[rng.integers(args.chunks, size=args.queries)]
+    queries += 0.5 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    ids = [f"c{i}" for i in range(args.chunks)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = FlatIndex(tmp)
+        for lo in range(0, args.chunks, args.batch_size):
+            hi = min(lo + args.batch_size, args.chunks)
+            index.upsert(ids[lo:hi], [""] * (hi - lo), [{}] * (hi - lo), vectors[lo:hi])
+        exact = [{row for row, _ in index.search(q, k=args.k)} for q in queries]
+
+        print(f"{args.chunks} x {args.dim}, recall@{args.k} against float32 search")
+        modes = [("none", None), ("int8", 1), ("int8", None), ("binary", 1), ("binary", None)]
+        for quantization, factor in modes:
+            index.configure(quantization, factor)
+            timings, recall = [], []
+            for q, expected in zip(queries, exact):
+                start = time.perf_counter()
+                hits = index.search(q, k=args.k)
+                timings.append(time.perf_counter() - start)
+                recall.append(len(expected & {row for row, _ in hits}) / args.k)
+            usage = index.memory_usage()
+            rescore = "-" if quantization == "none" else f"x{factor or DEFAULT_RESCORE_FACTOR[quantization]}"
+            print(
+                f"{quantization:>7} rescore {rescore:>4}: resident {usage['resident_bytes'] / 2**20:8.1f} MiB "
+                f"({usage['float32_bytes'] / max(usage['resident_bytes'], 1):5.1f}x smaller) | "
+                f"recall {np.mean(recall):.3f} | p50 {np.percentile(timings, 50) * 1000:6.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
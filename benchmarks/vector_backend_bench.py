@@ -0,0 +1,91 @@
+"""Compare the Chroma and flat-index vector backends on the same data.
+
+Inserts ``--chunks`` random ``--dim``-dimensional vectors spread across
+``--pdfs`` PDFs into each backend, then measures open time, unfiltered and
+pdf_id-filtered top-k latency, and how often the two agree on the top-k.
+
+    python -m benchmarks.vector_backend_bench --chunks 50000 --dim 768
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.core.embeddings import VectorStore
+from src.core import flat_index
+from src.core.collection_registry import get_collection_registry
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--pdfs", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.chunks, args.dim), dtype=np.float32)
+    # Unit vectors, so Chroma's default L2 ranking matches the flat index's cosine
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+    pdf_of = [f"pdf_{i % args.pdfs}" for i in range(args.chunks)]
+    filters = [{"pdf_id": {"$in": [f"pdf_{q % args.pdfs}", f"pdf_{(q + 1) % args.pdfs}"]}}
+               for q in range(args.queries)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in ("chroma", "flat"):
+            store = VectorStore(persist_directory=f"{tmp}/{backend}", backend=backend)
+            start = time.perf_counter()
+            for lo in range(0, args.chunks, args.batch_size):
+                hi = min(lo + args.batch_size, args.chunks)
+                store.upsert_vectors(
+                    [Document(page_content=f"chunk {i}", metadata={"pdf_id": pdf_of[i]}) for i in range(lo, hi)],
+                    vectors[lo:hi].tolist(),
+                    "bench",
+                    [f"c{i}" for i in range(lo, hi)]
+                )
+            insert_s = time.perf_counter() - start
+
+            # Cold open: drop in-process handles so the next open reads from disk
+            get_collection_registry().clear()
+            flat_index._indexes.clear()
+            start = time.perf_counter()
+            collection = VectorStore(persist_directory=f"{tmp}/{backend}", backend=backend).open_collection("bench")
+            collection.similarity_search_by_vector(queries[0].tolist(), k=1)
+            open_s = time.perf_counter() - start
+
+            timings = {"all": [], "filtered": []}
+            top = {"all": [], "filtered": []}
+            for q, query in enumerate(queries.tolist()):
+                for label, kwargs in (("all", {}), ("filtered", {"filter": filters[q]})):
+                    start = time.perf_counter()
+                    docs = collection.similarity_search_by_vector(query, k=args.k, **kwargs)
+                    timings[label].append(time.perf_counter() - start)
+                    top[label].append({doc.page_content for doc in docs})
+            results[backend] = top
+
+            print(f"{backend:>6}: insert {args.chunks / insert_s:9.0f} chunks/s | cold open+query {open_s * 1000:7.1f}ms")
+            for label, values in timings.items():
+                print(f"        {label:>8} top-{args.k}: p50 {percentile(values, 50):7.2f}ms  "
+                      f"p95 {percentile(values, 95):7.2f}ms")
+
+    for label in ("all", "filtered"):
+        overlap = statistics.mean(
+            len(a & b) / args.k for a, b in zip(results["chroma"][label], results["flat"][label])
+        )
+        print(f"top-{args.k} agreement ({label}): {overlap:.3f} (flat is exact; Chroma uses HNSW)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """Configuration settings for FastAPI application."""
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Dict, List, Optional
 
 
 class Settings(BaseSettings):
@@ -10,15 +11,133 @@ class Settings(BaseSettings):
     PROJECT_ROOT: Path = Path(__file__).parent.parent.parent
     PDF_STORAGE_DIR: str = "data/pdfs/uploads"
     VECTOR_DB_DIR: str = "data/vectors"
+    # Vector store backend: "chroma", or "flat" (memory-mapped exhaustive
+    # index, faster for up to a few hundred thousand chunks)
+    VECTOR_BACKEND: str = "chroma"
+    # Flat backend only: keep "int8" or "binary" codes in memory for the
+    # first search pass and rescore the best k * VECTOR_RESCORE_FACTOR
+    # candidates with float32 vectors read from disk (None: 4 int8, 10 binary)
+    VECTOR_QUANTIZATION: str = "none"
+    VECTOR_RESCORE_FACTOR: Optional[int] = None
+
+    # Estimated index memory of open collection handles kept cached
+    COLLECTION_CACHE_MAX_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # Vector collections: "per_pdf" gives every PDF its own collection,
+    # "shared" stores all chunks in SHARED_COLLECTION_NAME filtered by pdf_id
+    VECTOR_COLLECTION_MODE: str = "per_pdf"
+    SHARED_COLLECTION_NAME: str = "pdf_chunks"
+
+    # Hybrid retrieval: BM25 keyword search (SQLite FTS5) run alongside
+    # vector search and merged by reciprocal rank fusion
+    HYBRID_SEARCH: bool = True
+    LEXICAL_TOP_K: int = 10
+    RRF_K: int = 60
+    # Run keyword search first and, for queries over more than
+    # HYBRID_PREFILTER_PDFS PDFs, vector-search only the PDFs it ranks highest
+    HYBRID_PREFILTER: bool = False
+    HYBRID_PREFILTER_PDFS: int = 5
+    # Collections are vector-searched in parallel on this many workers; a
+    # collection that takes longer than the timeout is left out of the answer
+    RETRIEVAL_MAX_WORKERS: int = 8
+    RETRIEVAL_TIMEOUT_SECONDS: Optional[float] = 10.0
+    # Tokens of retrieved context sent to the LLM; the highest scoring chunks
+    # across all PDFs are added until the next one would not fit
+    CONTEXT_TOKEN_BUDGET: int = 8000
+
+    # Uploads
+    MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
 
     # Database
     DATABASE_URL: str = "sqlite:///./data/api.db"
 
     # Ollama
     OLLAMA_HOST: str = "http://localhost:11434"
+    # Several Ollama servers (JSON list); when set, OLLAMA_HOST is ignored.
+    # Calls go to the least busy healthy host that has the model and are
+    # retried on another host (up to OLLAMA_MAX_ATTEMPTS hosts) if it fails.
+    # A host failing OLLAMA_FAILURE_THRESHOLD times in a row is skipped for
+    # OLLAMA_CIRCUIT_RESET_SECONDS; hosts are health-checked every
+    # OLLAMA_HEALTH_CHECK_SECONDS (0: only on startup)
+    OLLAMA_HOSTS: List[str] = []
+    OLLAMA_MAX_ATTEMPTS: int = 2
+    OLLAMA_FAILURE_THRESHOLD: int = 3
+    OLLAMA_CIRCUIT_RESET_SECONDS: float = 30.0
+    OLLAMA_HEALTH_CHECK_SECONDS: float = 15.0
     EMBEDDING_MODEL: str = "nomic-embed-text"
     DEFAULT_CHAT_MODEL: str = "llama3.2"
 
+    # Embedding cache (empty path disables it)
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.db"
+    EMBEDDING_CACHE_MAX_BYTES: int = 1024 * 1024 * 1024
+    # Question embeddings: in-memory LRU size (0 disables), and whether they
+    # are also stored in the on-disk cache above to share across processes
+    QUERY_EMBEDDING_CACHE_ENTRIES: int = 1024
+    QUERY_EMBEDDING_CACHE_DISK: bool = False
+
+    # Retrieved chunks per (question, PDFs, model, corpus version); 0 disables
+    RETRIEVAL_CACHE_ENTRIES: int = 256
+
+    # Reuse generated answers for the same question, model and context chunks.
+    # Off by default: Ollama samples, so a cached answer is one of many possible
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_MAX_ENTRIES: int = 1024
+    ANSWER_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Reuse answers for paraphrased questions over the same PDFs: a question
+    # whose embedding is at least this cosine-similar to an answered one gets
+    # its answer (expiring after ANSWER_CACHE_TTL_SECONDS). A sample of hits
+    # is audited by retrieving anyway; the hit was false if the two contexts
+    # share less than SEMANTIC_CACHE_AUDIT_MIN_OVERLAP of their chunks
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1024
+    SEMANTIC_CACHE_AUDIT_RATE: float = 0.05
+    SEMANTIC_CACHE_AUDIT_MIN_OVERLAP: float = 0.5
+
+    # Admission control in front of Ollama: at most MODEL_MAX_CONCURRENT
+    # requests per model at once (match the server's OLLAMA_NUM_PARALLEL),
+    # with per-model overrides as JSON, e.g. MODEL_CONCURRENCY='{"qwen3:8b": 1}'.
+    # Up to MODEL_QUEUE_SIZE more wait their turn; when the queue is full the
+    # API answers 429, and after waiting MODEL_QUEUE_TIMEOUT_SECONDS 503,
+    # both with Retry-After
+    MODEL_MAX_CONCURRENT: int = 4
+    MODEL_CONCURRENCY: Dict[str, int] = {}
+    MODEL_QUEUE_SIZE: int = 32
+    MODEL_QUEUE_TIMEOUT_SECONDS: Optional[float] = 60.0
+
+    # Model residency in Ollama. PRELOAD_MODELS (JSON list) are loaded on
+    # startup, and the embedding model is kept loaded for good with
+    # PIN_EMBEDDING_MODEL. Other models stay loaded for about twice their
+    # usual idle time between queries, within the MIN/MAX keep_alive below;
+    # loaded models are re-checked every MODEL_RESIDENCY_REFRESH_SECONDS
+    # (0 disables)
+    PRELOAD_MODELS: List[str] = []
+    PIN_EMBEDDING_MODEL: bool = True
+    MODEL_KEEP_ALIVE_MIN_SECONDS: int = 300
+    MODEL_KEEP_ALIVE_MAX_SECONDS: int = 3600
+    MODEL_RESIDENCY_REFRESH_SECONDS: float = 60.0
+
+    # Cross-request embedding batching toward Ollama
+    EMBED_MAX_BATCH_SIZE: int = 64
+    EMBED_MAX_WAIT_MS: float = 10.0
+    EMBED_MAX_IN_FLIGHT: int = 2
+
+    # PDF parsing (0 workers = one per CPU core, 1 = sequential)
+    PDF_PARSE_WORKERS: int = 0
+    PDF_PAGES_PER_TASK: int = 8
+    # Read text-layer pages directly; only scanned/complex pages use unstructured
+    PDF_TIERED_EXTRACTION: bool = True
+
+    # Background ingestion
+    INGEST_WORKERS: int = 2
+    INGEST_WORK_DIR: str = "data/jobs"
+    EMBED_BATCH_SIZE: int = 64
+    # Stream pages through split/embed/upsert with bounded queues between
+    # stages instead of materializing each stage's full output
+    INGEST_STREAMING: bool = True
+    INGEST_QUEUE_SIZE: int = 16
+
     class Config:
         """Pydantic config."""
         env_file = ".env"
@@ -1,9 +1,15 @@
 """Database models and session management."""
-from sqlalchemy import create_engine, Column, String, Integer, DateTime, Boolean, JSON
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Callable, Optional, TypeVar
+from sqlalchemy import create_engine, inspect, text, Column, String, Integer, Float, DateTime, Boolean, JSON
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
 # Database configuration
 DATABASE_DIR = Path("data")
 DATABASE_DIR.mkdir(parents=True, exist_ok=True)
@@ -22,6 +28,33 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base class for models
 Base = declarative_base()
 
+T = TypeVar("T")
+
+
+async def run_in_session(db: Session, work: Callable[[Session], T], executor: Optional[Executor] = None) -> T:
+    """Run blocking database work off the event loop.
+
+    The session is closed once ``work`` returns, so its connection goes back
+    to the pool instead of being held while the caller awaits a model.
+    Objects it returned stay readable, detached; the next use of ``db``
+    checks out a fresh connection.
+
+    Args:
+        db: Database session
+        work: Called with ``db`` on a worker thread
+        executor: Executor to run on; the loop's default if None
+
+    Returns:
+        Whatever ``work`` returns
+    """
+    def call() -> T:
+        try:
+            return work(db)
+        finally:
+            db.close()
+
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
 
 class PDFMetadata(Base):
     """PDF metadata table."""
@@ -35,6 +68,16 @@ class PDFMetadata(Base):
     page_count = Column(Integer, nullable=False)
     is_sample = Column(Boolean, default=False)
     file_path = Column(String)
+    content_hash = Column(String, unique=True, index=True)  # SHA-256 of the file bytes
+    ref_count = Column(Integer, nullable=False, default=1, server_default="1")
+    # Collection holding this PDF's chunks; NULL for legacy rows, whose
+    # chunks live in their own ``collection_name``
+    vector_collection = Column(String, index=True)
+
+    @property
+    def search_collection(self) -> str:
+        """Name of the vector collection to search for this PDF's chunks."""
+        return self.vector_collection or self.collection_name
 
 
 class ChatSession(Base):
@@ -58,5 +101,119 @@ class ChatMessage(Base):
     timestamp = Column(DateTime, nullable=False)
 
 
+class IngestionJob(Base):
+    """PDF ingestion job table.
+
+    ``stage`` is the pipeline stage currently running (or next to run), so
+    an interrupted job resumes from the last stage it completed.
+    """
+    __tablename__ = "ingestion_jobs"
+
+    job_id = Column(String, primary_key=True)
+    filename = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    content_hash = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, failed
+    stage = Column(String, nullable=False, default="parse")  # parse, stream, split, embed, finalize, done
+    pdf_id = Column(String)
+    pages_total = Column(Integer, nullable=False, default=0, server_default="0")
+    pages_done = Column(Integer, nullable=False, default=0, server_default="0")
+    chunks_total = Column(Integer, nullable=False, default=0, server_default="0")
+    chunks_embedded = Column(Integer, nullable=False, default=0, server_default="0")
+    progress_at_start = Column(Float, nullable=False, default=0.0, server_default="0")
+    error = Column(String)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+
+
+class ChunkText(Base):
+    """Chunk text for keyword search.
+
+    Mirrored into the ``chunks_fts`` FTS5 index by triggers (see
+    ``_create_fts_index``), so inserts and deletes here keep BM25 search
+    in step with the vector store.
+    """
+    __tablename__ = "chunks"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chunk_id = Column(String, unique=True, nullable=False)  # same id as the chunk's vector
+    pdf_id = Column(String, nullable=False, index=True)
+    chunk_index = Column(Integer)
+    text = Column(String, nullable=False)
+    chunk_metadata = Column("metadata", JSON)
+
+
+class CorpusState(Base):
+    """Single-row counter of changes to the searchable corpus.
+
+    ``version`` is bumped in the same transaction as every stored embed
+    batch, completed ingest and delete, so caches keyed on it never serve
+    results from an older set of chunks, in this process or another.
+    Duplicate and queued uploads leave the searchable corpus, and the
+    version, unchanged.
+    """
+    __tablename__ = "corpus_state"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(DateTime)
+
+
+# External-content FTS5 table over ``chunks`` plus the triggers that keep it
+# in sync (https://www.sqlite.org/fts5.html#external_content_tables)
+FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(text, content='chunks', content_rowid='id')",
+    """CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN
+        INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN
+        INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS chunks_fts_update AFTER UPDATE ON chunks BEGIN
+        INSERT INTO chunks_fts(chunks_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO chunks_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+]
+
+
+def _create_fts_index() -> bool:
+    """Create the FTS5 keyword index. Returns False if SQLite lacks FTS5."""
+    try:
+        with engine.begin() as conn:
+            for ddl in FTS_DDL:
+                conn.execute(text(ddl))
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ SQLite FTS5 unavailable, keyword search disabled: {e}")
+        return False
+
+
+def _add_missing_columns():
+    """Add columns introduced after a table was first created.
+
+    ``create_all`` only creates missing tables, so existing SQLite databases
+    are brought up to date here with ``ALTER TABLE ... ADD COLUMN``.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {column.server_default.arg}"
+                conn.execute(text(ddl))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
 # Create all tables
 Base.metadata.create_all(bind=engine)
+_add_missing_columns()
+FTS_AVAILABLE = _create_fts_index()
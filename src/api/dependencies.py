@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from .database import SessionLocal
 from .services.pdf_service import PDFService
 from .services.rag_service import RAGService
+from .services.ingestion_queue import IngestionQueue, get_ingestion_queue as _get_ingestion_queue
 
 
 def get_db():
@@ -22,3 +23,8 @@ def get_pdf_service():
 def get_rag_service():
     """RAG service dependency."""
     return RAGService()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Ingestion queue dependency."""
+    return _get_ingestion_queue()
@@ -1,20 +1,45 @@
 """FastAPI main application."""
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 
-from .routers import pdfs, query, models, health
+from .routers import pdfs, query, models, health, jobs, stats
 from .database import engine, Base
 from .config import settings
+from .services.ingestion_queue import get_ingestion_queue
+from .services.ollama_pool import ollama_pool
+from .services.residency import configure_residency
+from ..core.document import shutdown_parse_pools
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Resume unfinished ingestion jobs and load models on startup; stop workers on shutdown."""
+    ingestion_queue = get_ingestion_queue()
+    ingestion_queue.resume_pending()
+    # First health check runs now so warm-ups go to hosts that have the models
+    pool = ollama_pool()
+    pool.start(settings.OLLAMA_HEALTH_CHECK_SECONDS)
+    # Loads run in the background: the API serves while models load
+    residency = configure_residency()
+    residency.start(settings.PRELOAD_MODELS, settings.MODEL_RESIDENCY_REFRESH_SECONDS)
+    yield
+    residency.stop()
+    pool.stop()
+    ingestion_queue.shutdown()
+    shutdown_parse_pools()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="Ollama PDF RAG API",
     description="REST API for PDF-based RAG with Ollama",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -28,9 +53,11 @@ app.add_middleware(
 
 # Include routers
 app.include_router(pdfs.router)
+app.include_router(jobs.router)
 app.include_router(query.router)
 app.include_router(models.router)
 app.include_router(health.router)
+app.include_router(stats.router)
 
 # Logging configuration
 logging.basicConfig(level=logging.INFO)
@@ -14,6 +14,24 @@ class PDFUploadResponse(BaseModel):
     upload_timestamp: datetime
 
 
+class IngestionJobResponse(BaseModel):
+    """Status of a PDF ingestion job."""
+    job_id: str
+    filename: str
+    status: str
+    stage: str
+    pdf_id: Optional[str] = None
+    pages_total: int
+    pages_done: int
+    chunks_total: int
+    chunks_embedded: int
+    progress: float
+    eta_seconds: Optional[float] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
 class PDFListItem(BaseModel):
     """Model for PDF in list response."""
     pdf_id: str
@@ -38,6 +56,7 @@ class SourceInfo(BaseModel):
     pdf_name: str
     pdf_id: str
     chunk_index: int
+    score: Optional[float] = None  # relevance, or fused rank score for hybrid search
 
 
 class QueryResponse(BaseModel):
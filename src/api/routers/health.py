@@ -1,11 +1,11 @@
 """Health check endpoint."""
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-import ollama
 
 from ..dependencies import get_db
 from ..models import HealthResponse
 from ..database import PDFMetadata
+from ..services.ollama_pool import ollama_pool
 
 router = APIRouter(prefix="/api/v1/health", tags=["health"])
 
@@ -14,13 +14,10 @@ router = APIRouter(prefix="/api/v1/health", tags=["health"])
 def health_check(db: Session = Depends(get_db)):
     """Check API health."""
 
-    # Check Ollama connection
-    ollama_connected = False
-    try:
-        ollama.list()
-        ollama_connected = True
-    except:
-        pass
+    # Check Ollama connection: healthy while any host is taking calls
+    pool = ollama_pool()
+    pool.check()
+    ollama_connected = pool.available()
 
     # Check ChromaDB collections
     from pathlib import Path
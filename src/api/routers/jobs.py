@@ -0,0 +1,66 @@
+"""Ingestion job endpoints."""
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from ..dependencies import get_db, get_ingestion_queue, get_pdf_service
+from ..database import IngestionJob
+from ..models import IngestionJobResponse
+from ..services.ingestion_queue import IngestionQueue
+from ..services.pdf_service import PDFService, job_progress, job_eta_seconds
+
+router = APIRouter(prefix="/api/v1/jobs", tags=["jobs"])
+
+
+def job_response(job: IngestionJob) -> IngestionJobResponse:
+    """Build the API response for an ingestion job."""
+    return IngestionJobResponse(
+        job_id=job.job_id,
+        filename=job.filename,
+        status=job.status,
+        stage=job.stage,
+        pdf_id=job.pdf_id,
+        pages_total=job.pages_total,
+        pages_done=job.pages_done,
+        chunks_total=job.chunks_total,
+        chunks_embedded=job.chunks_embedded,
+        progress=round(job_progress(job), 4),
+        eta_seconds=job_eta_seconds(job),
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+
+@router.get("/{job_id}", response_model=IngestionJobResponse)
+def get_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    pdf_service: PDFService = Depends(get_pdf_service)
+):
+    """Get the status and progress of an ingestion job."""
+    job = pdf_service.get_job(job_id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_response(job)
+
+
+@router.post("/{job_id}/retry", response_model=IngestionJobResponse, status_code=202)
+def retry_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    pdf_service: PDFService = Depends(get_pdf_service),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
+):
+    """Queue a failed ingestion job again from the stage it failed in."""
+    job = pdf_service.get_job(job_id, db)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "failed":
+        raise HTTPException(status_code=409, detail=f"Only failed jobs can be retried; this one is {job.status}")
+    if not os.path.exists(job.file_path):
+        raise HTTPException(status_code=409, detail="The uploaded file is no longer stored; upload it again")
+    job = pdf_service.retry_job(job, db)
+    ingestion_queue.submit(job.job_id)
+    return job_response(job)
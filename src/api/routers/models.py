@@ -1,10 +1,10 @@
 """Ollama model endpoints."""
 from fastapi import APIRouter, HTTPException
 from typing import List
-import ollama
 import logging
 
 from ..models import ModelInfo
+from ..services.ollama_pool import ollama_pool
 
 router = APIRouter(prefix="/api/v1/models", tags=["models"])
 logger = logging.getLogger(__name__)
@@ -30,7 +30,7 @@ def is_chat_model(model_name: str, model_size: int) -> bool:
 
     # Heuristic 2: Try to get model details
     try:
-        model_info = ollama.show(model_name)
+        model_info = ollama_pool().call(model_name, lambda host: host.client.show(model_name))
 
         # Check model parameters/template
         # Chat models have chat templates, embedding models don't
@@ -72,7 +72,8 @@ def is_chat_model(model_name: str, model_size: int) -> bool:
 def list_models():
     """List available Ollama chat models (auto-detects and excludes embedding models)."""
     try:
-        models_info = ollama.list()
+        # Models installed on any of the Ollama hosts
+        models_info = ollama_pool().list_models()
         chat_models = []
 
         logger.info(f"📊 Analyzing {len(models_info.models)} models...")
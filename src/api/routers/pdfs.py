@@ -1,35 +1,87 @@
 """PDF management endpoints."""
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, Request, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 
-from ..dependencies import get_db, get_pdf_service
-from ..models import PDFUploadResponse, PDFListItem
+from ..config import settings
+from ..dependencies import get_db, get_pdf_service, get_ingestion_queue
+from ..models import IngestionJobResponse, PDFListItem
 from ..services.pdf_service import PDFService
+from ..services.ingestion_queue import IngestionQueue
+from .jobs import job_response
+from ..uploads import StreamingFileUpload, MultipartError
+from ...core.content_store import ContentTooLarge, NotAPDF
 
 router = APIRouter(prefix="/api/v1/pdfs", tags=["pdfs"])
 
+# Allowance for multipart boundaries and part headers around the file bytes
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
 
-@router.post("/upload", response_model=PDFUploadResponse)
+# The body is parsed by hand, so describe the form for the OpenAPI docs
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"file": {"type": "string", "format": "binary"}},
+                "required": ["file"],
+            }
+        }
+    },
+}
+
+
+@router.post(
+    "/upload",
+    response_model=IngestionJobResponse,
+    status_code=202,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY}
+)
 async def upload_pdf(
-    file: UploadFile = File(...),
+    request: Request,
     db: Session = Depends(get_db),
-    pdf_service: PDFService = Depends(get_pdf_service)
+    pdf_service: PDFService = Depends(get_pdf_service),
+    ingestion_queue: IngestionQueue = Depends(get_ingestion_queue)
 ):
-    """Upload and process a PDF file."""
-    if not file.filename.endswith('.pdf'):
+    """Upload a PDF file and queue it for processing.
+
+    The file is streamed to disk as it arrives; oversized or non-PDF
+    payloads are rejected without reading the rest of the body. Parsing,
+    splitting and embedding run in the background; poll
+    ``GET /api/v1/jobs/{job_id}`` for progress.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            declared = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if declared > settings.MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES:
+            raise HTTPException(status_code=413, detail="File too large")
+
+    try:
+        upload = StreamingFileUpload(request, field_name="file")
+        filename = await upload.open()
+    except MultipartError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if not filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-    pdf_metadata = await pdf_service.upload_and_process(file, db)
+    try:
+        job = await pdf_service.upload_and_process(filename, upload.chunks(), db)
+    except ContentTooLarge:
+        raise HTTPException(status_code=413, detail="File too large")
+    except NotAPDF:
+        raise HTTPException(status_code=415, detail="Only PDF files are allowed")
+    except MultipartError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if job.status == "queued":
+        ingestion_queue.submit(job.job_id)
 
-    return PDFUploadResponse(
-        pdf_id=pdf_metadata.pdf_id,
-        name=pdf_metadata.name,
-        collection_name=pdf_metadata.collection_name,
-        doc_count=pdf_metadata.doc_count,
-        page_count=pdf_metadata.page_count,
-        upload_timestamp=pdf_metadata.upload_timestamp
-    )
+    return job_response(job)
 
 
 @router.get("", response_model=List[PDFListItem])
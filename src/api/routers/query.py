@@ -1,33 +1,88 @@
 """RAG query endpoints."""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from typing import Any, Dict, List
+import json
+import logging
 import uuid
 
+from ...core.admission import AdmissionRejected
+from ...core.ollama_pool import NoHostAvailable
 from ..dependencies import get_db, get_rag_service
 from ..models import QueryRequest, QueryResponse, SourceInfo
+from ..services.admission import model_scheduler
 from ..services.rag_service import RAGService
 
 router = APIRouter(prefix="/api/v1", tags=["query"])
+logger = logging.getLogger(__name__)
+
+
+def _query_error(model: str, error: Exception) -> HTTPException:
+    """HTTP error for a failed query."""
+    if isinstance(error, AdmissionRejected):
+        # Overloaded rather than broken: tell the client when to come back
+        logger.warning(f"🚦 Query rejected ({error.reason}): {error}")
+        return HTTPException(
+            status_code=429 if error.reason == "queue_full" else 503,
+            detail=str(error),
+            headers={"Retry-After": str(error.retry_after)}
+        )
+    if isinstance(error, NoHostAvailable):
+        logger.error(f"🔌 {error}")
+        return HTTPException(
+            status_code=503,
+            detail=str(error),
+            headers={"Retry-After": str(error.retry_after)}
+        )
+    error_msg = str(error)
+    if "not found" in error_msg.lower() and "404" in error_msg:
+        logger.error(f"❌ Model not found: {model}")
+        return HTTPException(
+            status_code=404,
+            detail=f"Model '{model}' not found. Please select a different model from the dropdown or install it with: ollama pull {model}"
+        )
+    logger.error(f"❌ Query failed: {error_msg}")
+    return HTTPException(status_code=500, detail=f"Query failed: {error_msg}")
+
+
+def _response_metadata(model: str, sources: List[Dict], reasoning_steps: List[str], query_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``metadata`` field of a query response."""
+    return {
+        "model_used": model,
+        "chunks_retrieved": len(sources),
+        "pdfs_queried": len(set(s["pdf_id"] for s in sources)),
+        "reasoning_steps": reasoning_steps,
+        **query_metadata
+    }
+
+
+def _sse(event: str, data: Any) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 
 @router.post("/query", response_model=QueryResponse)
-def query_pdfs(
+async def query_pdfs(
     request: QueryRequest,
     db: Session = Depends(get_db),
     rag_service: RAGService = Depends(get_rag_service)
 ):
     """Query across PDFs with source attribution."""
-    import logging
-    logger = logging.getLogger(__name__)
-
     logger.info(f"📥 Received query request: question='{request.question[:50]}...', model={request.model}")
 
+    # Turn the request away before any work if the model's queue is full
+    try:
+        model_scheduler(request.model).check()
+    except AdmissionRejected as e:
+        raise _query_error(request.model, e)
+
     # Generate session ID if not provided
     session_id = request.session_id or str(uuid.uuid4())
     logger.info(f"🔑 Session ID: {session_id}")
 
     # Save user message
-    rag_service.save_message(
+    await rag_service.asave_message(
         session_id=session_id,
         role="user",
         content=request.question,
@@ -39,7 +94,7 @@ def query_pdfs(
     # Query RAG
     logger.info("🚀 Starting RAG query...")
     try:
-        answer, sources, reasoning_steps = rag_service.query_multi_pdf(
+        answer, sources, reasoning_steps, query_metadata = await rag_service.aquery_multi_pdf(
             question=request.question,
             model=request.model,
             pdf_ids=request.pdf_ids,
@@ -47,18 +102,10 @@ def query_pdfs(
         )
         logger.info(f"✅ RAG query complete: answer_length={len(answer)}, sources_count={len(sources)}, reasoning_steps={len(reasoning_steps)}")
     except Exception as e:
-        error_msg = str(e)
-        if "not found" in error_msg.lower() and "404" in error_msg:
-            logger.error(f"❌ Model not found: {request.model}")
-            raise HTTPException(
-                status_code=404,
-                detail=f"Model '{request.model}' not found. Please select a different model from the dropdown or install it with: ollama pull {request.model}"
-            )
-        logger.error(f"❌ Query failed: {error_msg}")
-        raise HTTPException(status_code=500, detail=f"Query failed: {error_msg}")
+        raise _query_error(request.model, e)
 
     # Save assistant message
-    message = rag_service.save_message(
+    message = await rag_service.asave_message(
         session_id=session_id,
         role="assistant",
         content=answer,
@@ -70,12 +117,7 @@ def query_pdfs(
     response = QueryResponse(
         answer=answer,
         sources=[SourceInfo(**s) for s in sources],
-        metadata={
-            "model_used": request.model,
-            "chunks_retrieved": len(sources),
-            "pdfs_queried": len(set(s["pdf_id"] for s in sources)),
-            "reasoning_steps": reasoning_steps
-        },
+        metadata=_response_metadata(request.model, sources, reasoning_steps, query_metadata),
         session_id=session_id,
         message_id=message.message_id
     )
@@ -86,6 +128,81 @@ def query_pdfs(
     return response
 
 
+@router.post("/query/stream")
+async def stream_query_pdfs(
+    request: QueryRequest,
+    db: Session = Depends(get_db),
+    rag_service: RAGService = Depends(get_rag_service)
+):
+    """Query across PDFs, streaming progress as Server-Sent Events.
+
+    Emits ``session`` first, then ``step``, ``sources``, ``thinking`` and
+    ``token`` events as they are produced. The answer is saved once it is
+    complete and the last event, ``done``, carries the same body as
+    ``POST /query``. A failure ends the stream with an ``error`` event.
+    """
+    logger.info(f"📥 Received streaming query request: question='{request.question[:50]}...', model={request.model}")
+
+    # A full queue is refused with a real 429 before the stream starts
+    try:
+        model_scheduler(request.model).check()
+    except AdmissionRejected as e:
+        raise _query_error(request.model, e)
+
+    session_id = request.session_id or str(uuid.uuid4())
+    await rag_service.asave_message(
+        session_id=session_id,
+        role="user",
+        content=request.question,
+        sources=None,
+        db=db
+    )
+
+    async def events():
+        yield _sse("session", {"session_id": session_id})
+        try:
+            async for event, data in rag_service.astream_query_multi_pdf(
+                question=request.question,
+                model=request.model,
+                pdf_ids=request.pdf_ids,
+                db=db
+            ):
+                if event != "done":
+                    yield _sse(event, data)
+                    continue
+                message = await rag_service.asave_message(
+                    session_id=session_id,
+                    role="assistant",
+                    content=data["answer"],
+                    sources=data["sources"],
+                    db=db
+                )
+                logger.info(f"💾 Streamed answer saved with ID: {message.message_id}")
+                response = QueryResponse(
+                    answer=data["answer"],
+                    sources=[SourceInfo(**s) for s in data["sources"]],
+                    metadata=_response_metadata(
+                        request.model, data["sources"], data["reasoning_steps"], data["metadata"]
+                    ),
+                    session_id=session_id,
+                    message_id=message.message_id
+                )
+                yield _sse("done", response.model_dump(mode="json"))
+        except Exception as e:
+            # Headers are already sent, so the status travels in the event
+            error = _query_error(request.model, e)
+            payload = {"status_code": error.status_code, "detail": error.detail}
+            if error.headers and "Retry-After" in error.headers:
+                payload["retry_after"] = int(error.headers["Retry-After"])
+            yield _sse("error", payload)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/sessions/{session_id}/messages")
 def get_session_messages(
     session_id: str,
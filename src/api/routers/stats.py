@@ -0,0 +1,34 @@
+"""Runtime statistics endpoint."""
+from fastapi import APIRouter
+from typing import Any, Dict
+
+from ...core.admission import admission_stats
+from ...core.collection_registry import collection_registry_stats
+from ...core.embedding_batcher import embedding_dispatcher_stats
+from ...core.embedding_cache import embedding_cache_stats, memory_embedding_cache_stats
+from ...core.flat_index import flat_index_stats
+from ...core.ollama_pool import ollama_pool_stats
+from ...core.residency import residency_stats
+from ..services.answer_cache import answer_cache_stats
+from ..services.retrieval_cache import retrieval_cache_stats
+from ..services.semantic_cache import semantic_cache_stats
+
+router = APIRouter(prefix="/api/v1/stats", tags=["stats"])
+
+
+@router.get("")
+def get_stats() -> Dict[str, Any]:
+    """Cache hit rates and other runtime counters."""
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "embedding_batcher": embedding_dispatcher_stats(),
+        "flat_index": flat_index_stats(),
+        "collections": collection_registry_stats(),
+        "query_embedding_cache": memory_embedding_cache_stats(),
+        "retrieval_cache": retrieval_cache_stats(),
+        "answer_cache": answer_cache_stats(),
+        "semantic_cache": semantic_cache_stats(),
+        "admission": admission_stats(),
+        "residency": residency_stats(),
+        "ollama_hosts": ollama_pool_stats(),
+    }
@@ -0,0 +1,13 @@
+"""Admission control for the Ollama models the API calls."""
+from ...core.admission import AdmissionScheduler, get_admission_scheduler
+from ..config import settings
+
+
+def model_scheduler(model: str) -> AdmissionScheduler:
+    """The process-wide scheduler for ``model``, with limits from settings."""
+    return get_admission_scheduler(
+        model,
+        max_concurrent=settings.MODEL_CONCURRENCY.get(model, settings.MODEL_MAX_CONCURRENT),
+        max_queue=settings.MODEL_QUEUE_SIZE,
+        queue_timeout=settings.MODEL_QUEUE_TIMEOUT_SECONDS
+    )
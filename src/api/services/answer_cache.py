@@ -0,0 +1,101 @@
+"""Cache of generated answers for repeated questions."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from .retrieval_cache import normalize_question
+
+# (answer, sources, reasoning_steps)
+CachedAnswer = Tuple[str, List[Dict], List[str]]
+
+
+def answer_key(question: str, model: str, prompt_version: int, chunk_ids: Iterable[Hashable]) -> Tuple:
+    """Cache key for answering ``question`` from exactly these chunks.
+
+    Chunk ids come from content hashes, so a deleted PDF's chunks stop
+    matching and an edited PDF gets new ids: entries invalidate themselves.
+    Order matters, since it is the order the chunks appear in the prompt.
+    """
+    return normalize_question(question), model, prompt_version, tuple(chunk_ids)
+
+
+class AnswerCache:
+    """Thread-safe LRU of answers with a time-to-live.
+
+    Holds at most ``max_entries`` answers; each expires ``ttl_seconds``
+    after it was stored (``None`` keeps them until evicted).
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = 3600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, CachedAnswer]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Tuple) -> Optional[CachedAnswer]:
+        """The stored answer for ``key``, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            answer, sources, steps = entry[1]
+            return answer, list(sources), list(steps)
+
+    def put(self, key: Tuple, answer: str, sources: List[Dict], reasoning_steps: List[str]) -> None:
+        """Store an answer, evicting the least recently used beyond ``max_entries``."""
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires, (answer, list(sources), list(reasoning_steps)))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+
+_cache = AnswerCache()
+
+
+def get_answer_cache(max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None) -> AnswerCache:
+    """Get the process-wide cache, optionally setting its limits."""
+    if max_entries is not None:
+        _cache.max_entries = max_entries
+    if ttl_seconds is not None:
+        _cache.ttl_seconds = ttl_seconds
+    return _cache
+
+
+def answer_cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide cache."""
+    return _cache.stats()
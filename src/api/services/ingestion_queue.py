@@ -0,0 +1,84 @@
+"""Background queue for PDF ingestion jobs."""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Set
+
+from ..database import SessionLocal, IngestionJob
+from ..config import settings
+from .pdf_service import PDFService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionQueue:
+    """Runs ingestion jobs on a pool of worker threads.
+
+    Job state lives in the database, so the queue itself only tracks which
+    jobs are in flight in this process. Unfinished jobs left over from a
+    previous run are picked up again with ``resume_pending``.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._active: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str) -> bool:
+        """Queue a job for processing. Returns False if it is already queued."""
+        with self._lock:
+            if job_id in self._active:
+                return False
+            self._active.add(job_id)
+        self.executor.submit(self._run, job_id)
+        return True
+
+    def resume_pending(self) -> int:
+        """Re-queue jobs that were queued or running when the process stopped."""
+        db = SessionLocal()
+        try:
+            jobs = db.query(IngestionJob).filter(
+                IngestionJob.status.in_(["queued", "running"])
+            ).order_by(IngestionJob.created_at).all()
+            job_ids = [job.job_id for job in jobs]
+        finally:
+            db.close()
+
+        for job_id in job_ids:
+            self.submit(job_id)
+        if job_ids:
+            logger.info(f"🔄 Resuming {len(job_ids)} ingestion job(s)")
+        return len(job_ids)
+
+    def shutdown(self) -> None:
+        """Stop accepting work; in-flight jobs resume on next start."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            pdf_service = PDFService()
+            job = pdf_service.get_job(job_id, db)
+            if job and job.status in ("queued", "running"):
+                logger.info(f"⚙️ Running ingestion job {job_id} from stage '{job.stage}'")
+                job = pdf_service.run_ingestion(job, db)
+                logger.info(f"✅ Ingestion job {job_id} finished with status '{job.status}'")
+        except Exception as e:
+            logger.error(f"❌ Ingestion job {job_id} crashed: {e}")
+        finally:
+            db.close()
+            with self._lock:
+                self._active.discard(job_id)
+
+
+_ingestion_queue: Optional[IngestionQueue] = None
+_ingestion_queue_lock = threading.Lock()
+
+
+def get_ingestion_queue() -> IngestionQueue:
+    """Get the process-wide ingestion queue."""
+    global _ingestion_queue
+    with _ingestion_queue_lock:
+        if _ingestion_queue is None:
+            _ingestion_queue = IngestionQueue(max_workers=settings.INGEST_WORKERS)
+        return _ingestion_queue
@@ -0,0 +1,126 @@
+"""BM25 keyword search over chunk text in the API database."""
+import json
+import logging
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .. import database
+from ..database import ChunkText
+
+logger = logging.getLogger(__name__)
+
+# Words, keeping identifiers like "AB-1234", "4.2.1" or "v2/api" together
+_TOKEN = re.compile(r"\w+(?:[-./:]\w+)*")
+
+# Too common to help ranking; dropped to keep the FTS query small
+_STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it of on or that the
+this to was what when where which who why will with you your about me my
+""".split())
+
+
+def fts_query(question: str) -> Optional[str]:
+    """Turn a question into an FTS5 query matching any of its terms.
+
+    Each term is quoted, so FTS5 treats "4.2.1" or "AB-1234" as a phrase of
+    its tokens rather than as query syntax. Returns None if nothing is left.
+    """
+    terms = []
+    for token in _TOKEN.findall(question.lower()):
+        if token in _STOPWORDS or (len(token) == 1 and not token.isdigit()):
+            continue
+        term = '"' + token.replace('"', '""') + '"'
+        if term not in terms:
+            terms.append(term)
+    return " OR ".join(terms) or None
+
+
+class LexicalIndex:
+    """Chunk text in the ``chunks`` table, searched through FTS5 with BM25.
+
+    Writes join the caller's transaction, so chunks are committed together
+    with the ingestion progress that records them.
+    """
+
+    def add_chunks(self, chunks: Iterable[Document], db: Session, ids: Optional[List[str]] = None) -> None:
+        """Add or replace chunks; ids default to ``<pdf_id>:<chunk_index>``."""
+        chunks = list(chunks)
+        if ids is None:
+            ids = [f"{chunk.metadata['pdf_id']}:{chunk.metadata['chunk_index']}" for chunk in chunks]
+        if not chunks:
+            return
+        db.query(ChunkText).filter(ChunkText.chunk_id.in_(ids)).delete(synchronize_session=False)
+        db.add_all([
+            ChunkText(
+                chunk_id=chunk_id,
+                pdf_id=chunk.metadata["pdf_id"],
+                chunk_index=chunk.metadata.get("chunk_index"),
+                text=chunk.page_content,
+                chunk_metadata=chunk.metadata
+            )
+            for chunk_id, chunk in zip(ids, chunks)
+        ])
+
+    def delete_pdf(self, pdf_id: str, db: Session) -> None:
+        """Remove a PDF's chunks."""
+        db.query(ChunkText).filter(ChunkText.pdf_id == pdf_id).delete(synchronize_session=False)
+
+    def search(
+        self,
+        question: str,
+        db: Session,
+        pdf_ids: Optional[List[str]] = None,
+        limit: int = 10
+    ) -> List[Tuple[Document, float]]:
+        """Best-matching chunks by BM25, as ``(document, score)`` pairs.
+
+        Scores are FTS5 ``bm25()`` values, where lower is better.
+        """
+        query = fts_query(question)
+        if not query or not database.FTS_AVAILABLE:
+            return []
+
+        sql = """
+            SELECT chunks.text, chunks.metadata, chunks.pdf_id, chunks.chunk_index, bm25(chunks_fts) AS score
+            FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid
+            WHERE chunks_fts MATCH :query
+        """
+        params: Dict[str, object] = {"query": query, "limit": limit}
+        if pdf_ids is not None:
+            if not pdf_ids:
+                return []
+            placeholders = ", ".join(f":pdf_{i}" for i in range(len(pdf_ids)))
+            sql += f" AND chunks.pdf_id IN ({placeholders})"
+            params.update({f"pdf_{i}": pdf_id for i, pdf_id in enumerate(pdf_ids)})
+        sql += " ORDER BY score LIMIT :limit"
+
+        try:
+            rows = db.execute(text(sql), params).all()
+        except Exception as e:
+            logger.warning(f"⚠️ Keyword search failed for {query!r}: {e}")
+            return []
+
+        results = []
+        for chunk_text, metadata, pdf_id, chunk_index, score in rows:
+            metadata = json.loads(metadata) if metadata else {}
+            metadata.setdefault("pdf_id", pdf_id)
+            if chunk_index is not None:
+                metadata.setdefault("chunk_index", chunk_index)
+            results.append((Document(page_content=chunk_text, metadata=metadata), score))
+        return results
+
+
+def candidate_pdfs(hits: List[Tuple[Document, float]], max_pdfs: int) -> List[str]:
+    """PDFs with keyword hits, ordered by their best-ranked chunk."""
+    pdf_ids: List[str] = []
+    for doc, _ in hits:
+        pdf_id = doc.metadata.get("pdf_id")
+        if pdf_id not in pdf_ids:
+            pdf_ids.append(pdf_id)
+            if len(pdf_ids) == max_pdfs:
+                break
+    return pdf_ids
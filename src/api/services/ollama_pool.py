@@ -0,0 +1,13 @@
+"""The Ollama hosts the API calls."""
+from ...core.ollama_pool import OllamaPool, get_ollama_pool
+from ..config import settings
+
+
+def ollama_pool() -> OllamaPool:
+    """The process-wide pool over ``OLLAMA_HOSTS`` (or just ``OLLAMA_HOST``), with limits from settings."""
+    return get_ollama_pool(
+        settings.OLLAMA_HOSTS or [settings.OLLAMA_HOST],
+        failure_threshold=settings.OLLAMA_FAILURE_THRESHOLD,
+        reset_seconds=settings.OLLAMA_CIRCUIT_RESET_SECONDS,
+        max_attempts=settings.OLLAMA_MAX_ATTEMPTS
+    )
@@ -1,15 +1,138 @@
 """PDF processing service."""
+import asyncio
 import os
+import json
+import logging
+import shutil
+import uuid
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
-from fastapi import UploadFile
+from typing import AsyncIterator, Dict, List, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 
-from ...core.document import DocumentProcessor
+from langchain_core.documents import Document
+
+from ...core.document import DocumentProcessor, count_pdf_pages
 from ...core.embeddings import VectorStore
-from ..database import PDFMetadata
+from ...core.pipeline import bounded
+from ...core.vector_backends import is_missing_collection
+from ...core.content_store import (
+    ContentStore,
+    pdf_id_for_hash,
+    collection_name_for_hash,
+)
+from ..database import PDFMetadata, IngestionJob, run_in_session
 from ..config import settings
+from .admission import model_scheduler
+from .ollama_pool import ollama_pool
+from .residency import model_residency
+from .lexical_search import LexicalIndex
+from .retrieval_cache import bump_corpus_version
+
+logger = logging.getLogger(__name__)
+
+# Relative weight of each stage in a job's overall progress
+STAGE_WEIGHTS = {"parse": 0.45, "split": 0.05, "embed": 0.45, "finalize": 0.05}
+# The streaming stage runs parse, split and embed concurrently
+STREAM_WEIGHT = STAGE_WEIGHTS["parse"] + STAGE_WEIGHTS["split"] + STAGE_WEIGHTS["embed"]
+
+
+def vector_collection_for_hash(content_hash: str) -> str:
+    """Collection that new chunks for this content are written to.
+
+    Depends on ``VECTOR_COLLECTION_MODE``: one collection per PDF, or the
+    shared collection where chunks are told apart by their ``pdf_id``.
+    """
+    if settings.VECTOR_COLLECTION_MODE == "shared":
+        return settings.SHARED_COLLECTION_NAME
+    return collection_name_for_hash(content_hash)
+
+
+def ingesting_pdfs(db: Session, pdf_ids: Optional[List[str]] = None) -> List[PDFMetadata]:
+    """Unsaved records for PDFs whose running jobs have stored some chunks.
+
+    A job's ``PDFMetadata`` row is only written when it finishes, but its
+    chunks are searchable as each batch lands; these records let queries
+    reach them meanwhile.
+
+    Args:
+        db: Database session
+        pdf_ids: Only these PDFs, if given
+
+    Returns:
+        One record per PDF being ingested, never added to the session
+    """
+    jobs = db.query(IngestionJob).filter(
+        IngestionJob.status == "running",
+        IngestionJob.stage.in_(["stream", "embed"]),
+        IngestionJob.chunks_embedded > 0
+    ).order_by(IngestionJob.created_at).all()
+    pdfs: Dict[str, PDFMetadata] = {}
+    for job in jobs:
+        pdf_id = pdf_id_for_hash(job.content_hash)
+        if pdf_ids and pdf_id not in pdf_ids:
+            continue
+        pdfs.setdefault(pdf_id, PDFMetadata(
+            pdf_id=pdf_id,
+            name=job.filename,
+            collection_name=collection_name_for_hash(job.content_hash),
+            upload_timestamp=job.created_at,
+            doc_count=job.chunks_embedded,
+            page_count=job.pages_done or 0,
+            file_path=job.file_path,
+            content_hash=job.content_hash,
+            ref_count=1,
+            vector_collection=vector_collection_for_hash(job.content_hash)
+        ))
+    return list(pdfs.values())
+
+
+def job_progress(job: IngestionJob) -> float:
+    """Fraction of a job's work that is done, between 0 and 1."""
+    if job.stage == "done":
+        return 1.0
+    if job.stage == "stream":
+        if not job.pages_total:
+            return 0.0
+        return STREAM_WEIGHT * min(job.pages_done or 0, job.pages_total) / job.pages_total
+    progress = 0.0
+    for stage, weight in STAGE_WEIGHTS.items():
+        if stage == job.stage:
+            if stage == "parse" and job.pages_total:
+                progress += weight * job.pages_done / job.pages_total
+            elif stage == "embed" and job.chunks_total:
+                progress += weight * job.chunks_embedded / job.chunks_total
+            break
+        progress += weight
+    return progress
+
+
+def job_eta_seconds(job: IngestionJob) -> Optional[float]:
+    """Estimate remaining seconds from progress made since the job (re)started."""
+    if job.status != "running" or not job.started_at:
+        return None
+    progress = job_progress(job)
+    gained = progress - (job.progress_at_start or 0.0)
+    if gained <= 0:
+        return None
+    elapsed = (datetime.now() - job.started_at).total_seconds()
+    return elapsed * (1.0 - progress) / gained
+
+
+def _save_documents(path: Path, documents: List[Document]) -> None:
+    """Write documents to a JSON file."""
+    with open(path, "w") as f:
+        json.dump(
+            [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents],
+            f
+        )
+
+
+def _load_documents(path: Path) -> List[Document]:
+    """Read documents written by ``_save_documents``."""
+    with open(path) as f:
+        return [Document(**item) for item in json.load(f)]
 
 
 class PDFService:
@@ -17,73 +140,306 @@ class PDFService:
 
     def __init__(self):
         """Initialize PDF service."""
-        self.doc_processor = DocumentProcessor(chunk_size=7500, chunk_overlap=100)
+        self.doc_processor = DocumentProcessor(
+            chunk_size=7500,
+            chunk_overlap=100,
+            parse_workers=settings.PDF_PARSE_WORKERS,
+            pages_per_task=settings.PDF_PAGES_PER_TASK,
+            tiered=settings.PDF_TIERED_EXTRACTION
+        )
         self.vector_store = VectorStore(
-            embedding_model="nomic-embed-text",
-            persist_directory=settings.VECTOR_DB_DIR
+            embedding_model=settings.EMBEDDING_MODEL,
+            persist_directory=settings.VECTOR_DB_DIR,
+            cache_path=settings.EMBEDDING_CACHE_PATH or None,
+            cache_max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+            batching=True,
+            max_batch_size=settings.EMBED_MAX_BATCH_SIZE,
+            max_wait_ms=settings.EMBED_MAX_WAIT_MS,
+            max_in_flight=settings.EMBED_MAX_IN_FLIGHT,
+            backend=settings.VECTOR_BACKEND,
+            quantization=settings.VECTOR_QUANTIZATION,
+            rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+            collection_cache_max_bytes=settings.COLLECTION_CACHE_MAX_BYTES,
+            admission=model_scheduler(settings.EMBEDDING_MODEL),
+            keep_alive=model_residency().keep_alive(settings.EMBEDDING_MODEL),
+            pool=ollama_pool()
         )
         self.storage_dir = Path(settings.PDF_STORAGE_DIR)
         self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.content_store = ContentStore(self.storage_dir)
+        self.lexical_index = LexicalIndex()
 
     async def upload_and_process(
         self,
-        file: UploadFile,
+        filename: str,
+        chunks: AsyncIterator[bytes],
         db: Session
-    ) -> PDFMetadata:
-        """Upload and process a PDF file.
+    ) -> IngestionJob:
+        """Upload a PDF file and create its ingestion job.
+
+        The upload is streamed to disk chunk by chunk while its SHA-256,
+        size and PDF header are checked. Files are keyed by that hash;
+        uploading content that is already stored bumps the existing
+        record's reference count and returns an already completed job
+        instead of parsing and embedding it again. Otherwise the returned
+        job is queued and processed by ``run_ingestion``.
 
         Args:
-            file: Uploaded PDF file
+            filename: Original filename
+            chunks: Async iterator over the file's bytes
             db: Database session
 
         Returns:
-            PDFMetadata: Metadata for the processed PDF
+            IngestionJob: Job tracking the processing of this upload,
+            detached from ``db``
+
+        Raises:
+            ContentTooLarge: If the upload exceeds MAX_UPLOAD_BYTES
+            NotAPDF: If the upload does not start with a PDF header
         """
-        # Generate unique ID
-        pdf_id = self._generate_pdf_id(file.filename)
-
-        # Save file
-        file_path = self.storage_dir / f"{pdf_id}_{file.filename}"
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        # Process PDF
-        documents = self.doc_processor.load_pdf(file_path)
-        chunks = self.doc_processor.split_documents(documents)
-
-        # Add metadata to chunks
-        for i, chunk in enumerate(chunks):
-            chunk.metadata.update({
-                "pdf_id": pdf_id,
-                "pdf_name": file.filename,
-                "chunk_index": i,
-                "source_file": file.filename
-            })
-
-        # Create vector DB collection
-        collection_name = f"pdf_{abs(hash(file.filename + pdf_id))}"
-        vector_db = self.vector_store.create_vector_db(
-            documents=chunks,
-            collection_name=collection_name
+        # Disk writes and the commit run on worker threads so that large
+        # uploads do not stall other requests
+        loop = asyncio.get_running_loop()
+        with self.content_store.open_writer(max_bytes=settings.MAX_UPLOAD_BYTES) as writer:
+            async for chunk in chunks:
+                await loop.run_in_executor(None, writer.write, chunk)
+            content_hash, file_path = await loop.run_in_executor(None, writer.commit)
+
+        now = datetime.now()
+        job = IngestionJob(
+            job_id=uuid.uuid4().hex,
+            filename=filename,
+            file_path=str(file_path),
+            content_hash=content_hash,
+            status="queued",
+            stage="parse",
+            created_at=now,
+            updated_at=now
         )
 
-        # Store metadata in database
-        pdf_metadata = PDFMetadata(
-            pdf_id=pdf_id,
-            name=file.filename,
+        def record(session: Session) -> IngestionJob:
+            existing = self.get_pdf_by_hash(content_hash, session)
+            if existing:
+                existing.ref_count += 1
+                self._complete_job(job, existing)
+                logger.info(f"Duplicate upload of {existing.pdf_id} ({filename}), ref_count={existing.ref_count}")
+
+            session.add(job)
+            session.commit()
+            session.refresh(job)
+            return job
+
+        return await run_in_session(db, record)
+
+    def get_job(self, job_id: str, db: Session) -> Optional[IngestionJob]:
+        """Get ingestion job by ID.
+
+        Args:
+            job_id: Job identifier
+            db: Database session
+
+        Returns:
+            Ingestion job or None
+        """
+        return db.query(IngestionJob).filter(IngestionJob.job_id == job_id).first()
+
+    def run_ingestion(self, job: IngestionJob, db: Session) -> IngestionJob:
+        """Run (or resume) an ingestion job through its remaining stages.
+
+        With ``INGEST_STREAMING`` (the default) parsing, splitting and
+        embedding run as one ``stream`` stage: pages flow through bounded
+        queues into batched upserts as they are produced, so memory stays
+        flat and chunks become queryable while the rest of the PDF is still
+        being parsed. A resumed stream re-parses the PDF but skips chunks
+        already upserted.
+
+        Otherwise each stage commits its progress before the next starts:
+        parsed pages and split chunks are saved to the job's work directory,
+        and embeddings are upserted in batches under stable ids with a
+        running ``chunks_embedded`` count. A job interrupted by a restart
+        therefore picks up at the stage, and embed batch, where it stopped.
+
+        Args:
+            job: Job to run
+            db: Database session
+
+        Returns:
+            The finished job
+        """
+        work_dir = Path(settings.INGEST_WORK_DIR) / job.job_id
+        work_dir.mkdir(parents=True, exist_ok=True)
+        documents_path = work_dir / "documents.json"
+        chunks_path = work_dir / "chunks.json"
+        pdf_id = self._generate_pdf_id(job.content_hash)
+        collection_name = collection_name_for_hash(job.content_hash)
+        vector_collection = vector_collection_for_hash(job.content_hash)
+
+        job.status = "running"
+        job.started_at = datetime.now()
+        job.progress_at_start = job_progress(job)
+        self._save_job(job, db)
+
+        try:
+            # Identical content may have finished under another job meanwhile
+            existing = self.get_pdf_by_hash(job.content_hash, db)
+            if existing and job.stage != "done":
+                existing.ref_count += 1
+                self._complete_job(job, existing)
+                self._save_job(job, db)
+
+            if job.stage == "parse" and settings.INGEST_STREAMING:
+                job.stage = "stream"
+
+            if job.stage == "stream":
+                job.pages_total = count_pdf_pages(Path(job.file_path))
+                self._save_job(job, db)
+                job.chunks_total = self._stream_ingestion(job, pdf_id, vector_collection, db)
+                job.pages_done = job.pages_total
+                job.chunks_embedded = job.chunks_total
+                job.stage = "finalize"
+                self._save_job(job, db)
+
+            if job.stage == "parse":
+                job.pages_total = count_pdf_pages(Path(job.file_path))
+                self._save_job(job, db)
+
+                def on_pages_parsed(pages_done: int) -> None:
+                    job.pages_done = pages_done
+                    self._save_job(job, db)
+
+                documents = self.doc_processor.load_pdf(Path(job.file_path), on_pages_parsed)
+                _save_documents(documents_path, documents)
+                job.pages_done = job.pages_total
+                job.stage = "split"
+                self._save_job(job, db)
+
+            if job.stage == "split":
+                documents = _load_documents(documents_path)
+                chunks = self.doc_processor.split_documents(documents)
+                for i, chunk in enumerate(chunks):
+                    chunk.metadata.update({
+                        "pdf_id": pdf_id,
+                        "pdf_name": job.filename,
+                        "chunk_index": i,
+                        "source_file": job.filename
+                    })
+                _save_documents(chunks_path, chunks)
+                job.chunks_total = len(chunks)
+                job.stage = "embed"
+                self._save_job(job, db)
+
+            if job.stage == "embed":
+                chunks = _load_documents(chunks_path)
+                batch_size = settings.EMBED_BATCH_SIZE
+                for start in range(job.chunks_embedded, len(chunks), batch_size):
+                    batch = chunks[start:start + batch_size]
+                    self.vector_store.add_documents(
+                        batch,
+                        collection_name=vector_collection,
+                        ids=[f"{pdf_id}:{chunk.metadata['chunk_index']}" for chunk in batch]
+                    )
+                    self.lexical_index.add_chunks(batch, db)
+                    job.chunks_embedded = start + len(batch)
+                    # The batch is searchable now (see ingesting_pdfs)
+                    bump_corpus_version(db)
+                    self._save_job(job, db)
+                job.stage = "finalize"
+                self._save_job(job, db)
+
+            if job.stage == "finalize":
+                pdf_metadata = PDFMetadata(
+                    pdf_id=pdf_id,
+                    name=job.filename,
+                    collection_name=collection_name,
+                    upload_timestamp=datetime.now(),
+                    doc_count=job.chunks_total,
+                    page_count=job.pages_total,
+                    is_sample=False,
+                    file_path=job.file_path,
+                    content_hash=job.content_hash,
+                    ref_count=1,
+                    vector_collection=vector_collection
+                )
+                db.add(pdf_metadata)
+                bump_corpus_version(db)
+                # Record and job completion commit together, so a resumed
+                # job never finds its own record and counts it twice
+                self._complete_job(job, pdf_metadata)
+                try:
+                    self._save_job(job, db)
+                except IntegrityError:
+                    # A concurrent job for the same content won the race;
+                    # both wrote the same collection ids, so take a reference.
+                    db.rollback()
+                    pdf_metadata = self.get_pdf_by_hash(job.content_hash, db)
+                    pdf_metadata.ref_count += 1
+                    self._complete_job(job, pdf_metadata)
+                    self._save_job(job, db)
+
+            shutil.rmtree(work_dir, ignore_errors=True)
+        except Exception as e:
+            logger.error(f"❌ Ingestion job {job.job_id} failed in stage {job.stage}: {e}")
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.now()
+            self._save_job(job, db)
+
+        return job
+
+    def _stream_ingestion(
+        self,
+        job: IngestionJob,
+        pdf_id: str,
+        collection_name: str,
+        db: Session
+    ) -> int:
+        """Parse, split, embed and upsert a PDF as one bounded pipeline.
+
+        Progress is written from this thread only, as batches land in the
+        collection; each batch is queryable once its progress commits.
+        Chunks below ``job.chunks_embedded`` were upserted by an
+        earlier run and are skipped.
+
+        Returns:
+            Total number of chunks in the PDF
+        """
+        queue_size = settings.INGEST_QUEUE_SIZE
+        already_embedded = job.chunks_embedded or 0
+        total = 0
+
+        def numbered_chunks():
+            nonlocal total
+            pages = bounded(self.doc_processor.iter_pages(Path(job.file_path)), queue_size, name="parse")
+            for i, chunk in enumerate(self.doc_processor.iter_chunks(pages)):
+                total = i + 1
+                if i < already_embedded:
+                    continue
+                chunk.metadata.update({
+                    "pdf_id": pdf_id,
+                    "pdf_name": job.filename,
+                    "chunk_index": i,
+                    "source_file": job.filename
+                })
+                yield chunk
+
+        batches = self.vector_store.stream_documents(
+            bounded(numbered_chunks(), queue_size, name="split"),
             collection_name=collection_name,
-            upload_timestamp=datetime.now(),
-            doc_count=len(chunks),
-            page_count=len(documents),
-            is_sample=False,
-            file_path=str(file_path)
+            id_for=lambda chunk: f"{pdf_id}:{chunk.metadata['chunk_index']}",
+            batch_size=settings.EMBED_BATCH_SIZE
         )
-        db.add(pdf_metadata)
-        db.commit()
-        db.refresh(pdf_metadata)
-
-        return pdf_metadata
+        for batch in batches:
+            self.lexical_index.add_chunks(batch, db)
+            last = batch[-1].metadata
+            job.chunks_embedded = last["chunk_index"] + 1
+            if "page_number" in last:
+                # Pages before the last upserted chunk's page are fully stored
+                job.pages_done = max(job.pages_done or 0, last["page_number"] - 1)
+            # The batch is searchable now (see ingesting_pdfs)
+            bump_corpus_version(db)
+            self._save_job(job, db)
+        return max(total, already_embedded)
 
     def list_pdfs(self, db: Session) -> List[PDFMetadata]:
         """List all PDFs.
@@ -108,9 +464,25 @@ class PDFService:
         """
         return db.query(PDFMetadata).filter(PDFMetadata.pdf_id == pdf_id).first()
 
+    def get_pdf_by_hash(self, content_hash: str, db: Session) -> Optional[PDFMetadata]:
+        """Get PDF metadata by content hash.
+
+        Args:
+            content_hash: SHA-256 of the PDF bytes
+            db: Database session
+
+        Returns:
+            PDF metadata or None
+        """
+        return db.query(PDFMetadata).filter(PDFMetadata.content_hash == content_hash).first()
+
     def delete_pdf(self, pdf_id: str, db: Session) -> bool:
         """Delete PDF and its collection.
 
+        Only drops one reference while other uploads of the same content
+        still point at it; the collection and file are removed with the last
+        reference.
+
         Args:
             pdf_id: PDF identifier
             db: Database session
@@ -122,39 +494,92 @@ class PDFService:
         if not pdf:
             return False
 
-        # Delete vector collection
-        try:
-            from langchain_chroma import Chroma
-        except ImportError:
-            from langchain_community.vectorstores import Chroma
-        from langchain_ollama import OllamaEmbeddings
+        if (pdf.ref_count or 1) > 1:
+            pdf.ref_count -= 1
+            db.commit()
+            logger.info(f"Released reference to {pdf_id}, ref_count={pdf.ref_count}")
+            return True
 
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
-        vector_db = Chroma(
-            persist_directory=settings.VECTOR_DB_DIR,
-            embedding_function=embeddings,
-            collection_name=pdf.collection_name
-        )
-        vector_db.delete_collection()
+        # Delete the PDF's chunks: its own collection, or its slice of the
+        # shared one. A collection dropped elsewhere is already deleted.
+        try:
+            if pdf.search_collection != pdf.collection_name:
+                self.vector_store.delete_where(pdf.search_collection, {"pdf_id": pdf.pdf_id})
+            else:
+                self.vector_store.drop_collection(pdf.collection_name)
+        except Exception as e:
+            if not is_missing_collection(e):
+                raise
+            self.vector_store.backend.invalidate(pdf.search_collection)
+            logger.warning(f"⚠️ Collection {pdf.search_collection} of {pdf_id} was already deleted: {e}")
+        self.lexical_index.delete_pdf(pdf.pdf_id, db)
 
-        # Delete file if it exists
+        # Delete file if it exists, unless an upload of the same content
+        # is still waiting to be processed from it
         if pdf.file_path and os.path.exists(pdf.file_path):
-            os.remove(pdf.file_path)
+            if self._has_pending_job(pdf.content_hash, db):
+                logger.info(f"Keeping {pdf.file_path}: an ingestion job for the same content is pending")
+            else:
+                os.remove(pdf.file_path)
 
         # Delete metadata from database
         db.delete(pdf)
+        bump_corpus_version(db)
         db.commit()
 
         return True
 
-    def _generate_pdf_id(self, filename: str) -> str:
-        """Generate unique PDF ID.
+    def retry_job(self, job: IngestionJob, db: Session) -> IngestionJob:
+        """Queue a failed job again.
+
+        The job keeps its stage and progress, so it picks up where it
+        failed: a ``stream`` or ``embed`` stage skips the chunks it already
+        stored.
 
         Args:
-            filename: Original filename
+            job: Failed job
+            db: Database session
+
+        Returns:
+            The queued job
+        """
+        job.status = "queued"
+        job.error = None
+        job.finished_at = None
+        self._save_job(job, db)
+        logger.info(f"🔁 Retrying ingestion job {job.job_id} from stage '{job.stage}'")
+        return job
+
+    def _has_pending_job(self, content_hash: Optional[str], db: Session) -> bool:
+        """Whether a queued or running job still needs the file for ``content_hash``."""
+        if not content_hash:
+            return False
+        return db.query(IngestionJob).filter(
+            IngestionJob.content_hash == content_hash,
+            IngestionJob.status.in_(["queued", "running"])
+        ).first() is not None
+
+    def _complete_job(self, job: IngestionJob, pdf: PDFMetadata) -> None:
+        """Mark a job as finished for the given PDF."""
+        job.pdf_id = pdf.pdf_id
+        job.pages_total = job.pages_done = pdf.page_count
+        job.chunks_total = job.chunks_embedded = pdf.doc_count
+        job.stage = "done"
+        job.status = "completed"
+        job.finished_at = datetime.now()
+
+    def _save_job(self, job: IngestionJob, db: Session) -> None:
+        """Persist job progress."""
+        job.updated_at = datetime.now()
+        db.commit()
+
+    def _generate_pdf_id(self, content_hash: str) -> str:
+        """Generate PDF ID from file content.
+
+        Args:
+            content_hash: SHA-256 of the PDF bytes
 
         Returns:
-            Unique PDF identifier
+            Stable PDF identifier
         """
-        timestamp = datetime.now().isoformat()
-        return f"pdf_{abs(hash(filename + timestamp))}"
+        return pdf_id_for_hash(content_hash)
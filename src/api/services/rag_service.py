@@ -1,21 +1,35 @@
 """RAG query service."""
-from typing import List, Dict, Tuple, Optional
+import asyncio
+from typing import Any, AsyncIterator, Iterator, List, Dict, Tuple, Optional
 from sqlalchemy.orm import Session
 from datetime import datetime
 
-from langchain_ollama import ChatOllama
-import ollama
-from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
+from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_classic.retrievers.multi_query import MultiQueryRetriever
-try:
-    from langchain_chroma import Chroma
-except ImportError:
-    from langchain_community.vectorstores import Chroma
-from langchain_ollama import OllamaEmbeddings
-
-from ..database import PDFMetadata, ChatSession, ChatMessage
+
+from ...core.admission import AdmissionScheduler
+from ...core.embeddings import VectorStore
+from ...core.ollama_pool import PooledChatOllama
+from ...core.context_budget import estimate_tokens, select_within_budget
+from ...core.rank_fusion import chunk_key, merge_by_score, reciprocal_rank_fusion
+from ...core.retrieval import RetrievalPlanner, SearchTarget, get_search_executor
+from ..database import PDFMetadata, ChatSession, ChatMessage, run_in_session
 from ..config import settings
+from .admission import model_scheduler
+from .ollama_pool import ollama_pool
+from .residency import model_residency
+from .answer_cache import answer_key, get_answer_cache
+from .lexical_search import LexicalIndex, candidate_pdfs
+from .pdf_service import ingesting_pdfs
+from .retrieval_cache import corpus_version, get_retrieval_cache, retrieval_key
+from .semantic_cache import SemanticEntry, chunk_overlap, get_semantic_cache, semantic_scope
+
+# Part of every answer cache key: bump when the answer prompts below change
+ANSWER_PROMPT_VERSION = 1
+
+# (event name, data) pairs yielded by RAGService.stream_query_multi_pdf
+StreamEvent = Tuple[str, Any]
 
 
 class RAGService:
@@ -24,6 +38,27 @@ class RAGService:
     def __init__(self):
         """Initialize RAG service."""
         self.persist_directory = settings.VECTOR_DB_DIR
+        # Query embeddings share the batching dispatcher with ingestion;
+        # repeated questions are served from the query embedding cache
+        self.vector_store = VectorStore(
+            embedding_model=settings.EMBEDDING_MODEL,
+            persist_directory=self.persist_directory,
+            cache_path=settings.EMBEDDING_CACHE_PATH if settings.QUERY_EMBEDDING_CACHE_DISK else None,
+            cache_max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+            memory_cache_entries=settings.QUERY_EMBEDDING_CACHE_ENTRIES,
+            batching=True,
+            max_batch_size=settings.EMBED_MAX_BATCH_SIZE,
+            max_wait_ms=settings.EMBED_MAX_WAIT_MS,
+            max_in_flight=settings.EMBED_MAX_IN_FLIGHT,
+            backend=settings.VECTOR_BACKEND,
+            quantization=settings.VECTOR_QUANTIZATION,
+            admission=model_scheduler(settings.EMBEDDING_MODEL),
+            keep_alive=model_residency().keep_alive(settings.EMBEDDING_MODEL),
+            pool=ollama_pool(),
+            rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+            collection_cache_max_bytes=settings.COLLECTION_CACHE_MAX_BYTES
+        )
+        self.lexical_index = LexicalIndex()
 
     def query_multi_pdf(
         self,
@@ -31,9 +66,38 @@ class RAGService:
         model: str,
         pdf_ids: Optional[List[str]],
         db: Session
-    ) -> Tuple[str, List[Dict], List[str]]:
+    ) -> Tuple[str, List[Dict], List[str], Dict[str, Any]]:
+        """Query across multiple PDFs with source attribution.
+
+        Blocking counterpart of ``aquery_multi_pdf``.
+
+        Args:
+            question: User question
+            model: LLM model to use
+            pdf_ids: List of PDF IDs to query (None = all PDFs)
+            db: Database session
+
+        Returns:
+            Tuple of (answer, sources, reasoning_steps, metadata), where
+            metadata holds ``cache_hit`` and, for semantic cache hits,
+            ``semantic_similarity``
+        """
+        for event, data in self.stream_query_multi_pdf(question, model, pdf_ids, db):
+            if event == "done":
+                return data["answer"], data["sources"], data["reasoning_steps"], data["metadata"]
+        raise RuntimeError("Query ended without an answer")
+
+    async def aquery_multi_pdf(
+        self,
+        question: str,
+        model: str,
+        pdf_ids: Optional[List[str]],
+        db: Session
+    ) -> Tuple[str, List[Dict], List[str], Dict[str, Any]]:
         """Query across multiple PDFs with source attribution.
 
+        Runs ``astream_query_multi_pdf`` to completion.
+
         Args:
             question: User question
             model: LLM model to use
@@ -41,81 +105,205 @@ class RAGService:
             db: Database session
 
         Returns:
-            Tuple of (answer, sources, reasoning_steps)
+            Tuple of (answer, sources, reasoning_steps, metadata), where
+            metadata holds ``cache_hit`` and, for semantic cache hits,
+            ``semantic_similarity``
+        """
+        async for event, data in self.astream_query_multi_pdf(question, model, pdf_ids, db):
+            if event == "done":
+                return data["answer"], data["sources"], data["reasoning_steps"], data["metadata"]
+        raise RuntimeError("Query ended without an answer")
+
+    def stream_query_multi_pdf(
+        self,
+        question: str,
+        model: str,
+        pdf_ids: Optional[List[str]],
+        db: Session
+    ) -> Iterator[StreamEvent]:
+        """Blocking counterpart of ``astream_query_multi_pdf``.
+
+        Drives the async query on a private event loop, for callers that
+        do not run one.
+        """
+        loop = asyncio.new_event_loop()
+        events = self.astream_query_multi_pdf(question, model, pdf_ids, db)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(events.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(events.aclose())
+            loop.close()
+
+    async def astream_query_multi_pdf(
+        self,
+        question: str,
+        model: str,
+        pdf_ids: Optional[List[str]],
+        db: Session
+    ) -> AsyncIterator[StreamEvent]:
+        """Query across multiple PDFs, yielding progress as it happens.
+
+        Ollama calls (query expansion, embeddings, generation) are awaited;
+        vector and keyword search run on the bounded search worker pool
+        (RETRIEVAL_MAX_WORKERS), so a query holds no thread while it waits
+        on the model.
+
+        With ANSWER_CACHE_ENABLED, an answer generated earlier by the same
+        model from the same chunks for the same question is returned, with
+        its sources and reasoning steps, instead of calling the LLM. With
+        SEMANTIC_CACHE_ENABLED, a close paraphrase of an earlier question
+        over the same PDFs is answered before retrieval even starts.
+
+        Args:
+            question: User question
+            model: LLM model to use
+            pdf_ids: List of PDF IDs to query (None = all PDFs)
+            db: Database session
+
+        Yields:
+            ``(event, data)`` tuples, in order:
+
+            - ``("step", text)`` for each reasoning step
+            - ``("sources", sources)`` once the context is chosen
+            - ``("thinking", text)`` for thinking tokens of thinking models
+            - ``("token", text)`` for answer tokens
+            - ``("done", result)`` last, where result holds ``answer``,
+              ``sources``, ``reasoning_steps`` and ``metadata`` as returned
+              by ``query_multi_pdf``
         """
         reasoning_steps = []
+        sent = 0
+
+        def pending_steps() -> List[StreamEvent]:
+            """Steps added since the last call, as events."""
+            nonlocal sent
+            events = [("step", text) for text in reasoning_steps[sent:]]
+            sent = len(reasoning_steps)
+            return events
 
         # Get PDF metadata
-        query = db.query(PDFMetadata)
-        if pdf_ids:
-            query = query.filter(PDFMetadata.pdf_id.in_(pdf_ids))
-        pdfs = query.all()
+        def load_pdfs(session: Session) -> List[PDFMetadata]:
+            query = session.query(PDFMetadata)
+            if pdf_ids:
+                query = query.filter(PDFMetadata.pdf_id.in_(pdf_ids))
+            pdfs = query.all()
+            # PDFs still being ingested are searched up to their last stored batch
+            stored = {pdf.pdf_id for pdf in pdfs}
+            return pdfs + [pdf for pdf in ingesting_pdfs(session, pdf_ids) if pdf.pdf_id not in stored]
+
+        pdfs = await run_in_session(db, load_pdfs)
 
         if not pdfs:
-            return "No PDFs found to query.", [], []
+            for event in self._replay("No PDFs found to query.", [], [], {"cache_hit": False}):
+                yield event
+            return
 
         reasoning_steps.append(f"📚 Searching across {len(pdfs)} PDF(s): {', '.join([p.name for p in pdfs])}")
 
         # Initialize LLM
-        llm = ChatOllama(model=model)
+        residency = model_residency()
+        pool = ollama_pool()
+        llm = PooledChatOllama(pool=pool, model=model, keep_alive=residency.keep_alive(model))
+        admission = model_scheduler(model)
         reasoning_steps.append(f"🤖 Using model: {model}")
-
-        # Query prompt for multi-query retriever
-        QUERY_PROMPT = PromptTemplate(
-            input_variables=["question"],
-            template="""You are an AI language model assistant. Your task is to generate 2
-            different versions of the given user question to retrieve relevant documents from
-            a vector database. By generating multiple perspectives on the user question, your
-            goal is to help the user overcome some of the limitations of the distance-based
-            similarity search. Provide these alternative questions separated by newlines.
-            Original question: {question}"""
-        )
-
-        reasoning_steps.append("🔍 Generating alternative search queries...")
-
-        # Retrieve from all collections
-        all_docs = []
-        embeddings = OllamaEmbeddings(model="nomic-embed-text")
-
-        for pdf in pdfs:
-            vector_db = Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=embeddings,
-                collection_name=pdf.collection_name
+        for event in pending_steps():
+            yield event
+
+        version = await run_in_session(db, corpus_version)
+        pdf_key = [pdf.pdf_id for pdf in pdfs]
+
+        # A paraphrase of a question answered before gets the same answer;
+        # audited hits carry on to retrieval so the contexts can be compared
+        semantic_cache = semantic_match = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            semantic_cache = get_semantic_cache(
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+                ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+                audit_rate=settings.SEMANTIC_CACHE_AUDIT_RATE
             )
-
-            retriever = MultiQueryRetriever.from_llm(
-                vector_db.as_retriever(search_kwargs={"k": 3}),
-                llm,
-                prompt=QUERY_PROMPT
-            )
-
-            try:
-                reasoning_steps.append(f"📄 Retrieving from: {pdf.name}")
-                # Use invoke instead of deprecated get_relevant_documents
-                docs = retriever.invoke(question)
-                # Ensure metadata is present
-                for doc in docs:
-                    if "pdf_name" not in doc.metadata:
-                        doc.metadata["pdf_name"] = pdf.name
-                    if "pdf_id" not in doc.metadata:
-                        doc.metadata["pdf_id"] = pdf.pdf_id
-                all_docs.extend(docs)
-                reasoning_steps.append(f"✅ Found {len(docs)} relevant chunks in {pdf.name}")
-            except Exception as e:
-                reasoning_steps.append(f"⚠️ Error retrieving from {pdf.name}: {str(e)}")
-                print(f"Error retrieving from {pdf.name}: {e}")
+            scope = semantic_scope(pdf_key, model, version)
+            question_vector = await self.vector_store.embeddings.aembed_query(question)
+            semantic_match, similarity = semantic_cache.lookup(scope, question_vector)
+            if semantic_match is not None and not semantic_cache.should_audit():
+                for event in self._replay(*self._semantic_hit(semantic_match, similarity)):
+                    yield event
+                return
+
+        # Past the semantic cache the model is nearly always needed: if it
+        # went idle, load it now, sharing the load with concurrent queries
+        await residency.aensure_loaded(model)
+
+        # Retrieval results are reused until the question, PDFs, model or
+        # corpus change
+        cache = get_retrieval_cache(settings.RETRIEVAL_CACHE_ENTRIES) if settings.RETRIEVAL_CACHE_ENTRIES else None
+        cache_key = retrieval_key(question, pdf_key, model, version)
+        all_docs = cache.get(cache_key) if cache else None
+        if all_docs is not None:
+            reasoning_steps.append(f"♻️ Reusing {len(all_docs)} chunks retrieved earlier for this question")
+        else:
+            all_docs, complete = await self._retrieve(question, llm, admission, pdfs, db, reasoning_steps)
+            # Results missing a timed-out or failed collection are not kept
+            if cache and complete:
+                cache.put(cache_key, all_docs)
 
         reasoning_steps.append(f"📊 Total chunks retrieved: {len(all_docs)}")
 
-        # Format context with source labels
+        # Best chunks first, as many as fit in the context budget
+        context_docs = select_within_budget(all_docs, settings.CONTEXT_TOKEN_BUDGET)
         context_parts = []
-        for doc in all_docs[:10]:
+        for doc in context_docs:
             source = doc.metadata.get("pdf_name", "Unknown")
             context_parts.append(f"[Source: {source}]\n{doc.page_content}\n")
 
         formatted_context = "\n---\n".join(context_parts)
-        reasoning_steps.append(f"🔗 Using top {min(len(all_docs), 10)} chunks for context")
+        context_tokens = sum(estimate_tokens(doc.page_content) for doc in context_docs)
+        reasoning_steps.append(
+            f"🔗 Using top {len(context_docs)} chunks for context (~{context_tokens} of "
+            f"{settings.CONTEXT_TOKEN_BUDGET} tokens)"
+        )
+        for event in pending_steps():
+            yield event
+
+        chunk_ids = [chunk_key(doc) for doc in context_docs]
+        if semantic_match is not None:
+            false_hit = chunk_overlap(chunk_ids, semantic_match.chunk_ids) < settings.SEMANTIC_CACHE_AUDIT_MIN_OVERLAP
+            semantic_cache.record_audit(semantic_match, similarity, false_hit)
+            if not false_hit:
+                for event in self._replay(*self._semantic_hit(semantic_match, similarity)):
+                    yield event
+                return
+            reasoning_steps.append("🔁 Similar earlier question used different sources; generating a new answer")
+
+        answer_cache = None
+        if settings.ANSWER_CACHE_ENABLED:
+            answer_cache = get_answer_cache(settings.ANSWER_CACHE_MAX_ENTRIES, settings.ANSWER_CACHE_TTL_SECONDS)
+            cache_key = answer_key(question, model, ANSWER_PROMPT_VERSION, chunk_ids)
+            cached = answer_cache.get(cache_key)
+            if cached is not None:
+                response, sources, cached_steps = cached
+                for event in pending_steps():
+                    yield event
+                steps = cached_steps + ["♻️ Answer served from cache"]
+                for event in self._replay(response, sources, steps, {"cache_hit": True}):
+                    yield event
+                return
+
+        # Extract source information
+        sources = [
+            {
+                "pdf_name": doc.metadata.get("pdf_name"),
+                "pdf_id": doc.metadata.get("pdf_id"),
+                "chunk_index": doc.metadata.get("chunk_index", 0),
+                "score": doc.metadata.get("rrf_score", doc.metadata.get("score"))
+            }
+            for doc in context_docs
+        ]
+        yield "sources", sources
 
         # RAG prompt template with chain-of-thought
         template = """Answer the question based ONLY on the following context from multiple PDF documents.
@@ -150,11 +338,18 @@ class RAGService:
         thinking_models = ['qwen3', 'deepseek-r1', 'qwen', 'deepseek']
         supports_thinking = any(tm in model.lower() for tm in thinking_models)
 
-        if supports_thinking:
-            reasoning_steps.append("🧠 Using thinking-enabled model with chain-of-thought reasoning...")
-            try:
-                # Enhanced system message for chain-of-thought reasoning
-                cot_system_message = f"""You are an expert AI assistant that uses chain-of-thought reasoning.
+        # Wait for a free generation slot on the model; a long queue or wait
+        # is rejected (AdmissionRejected) rather than piling up on Ollama
+        answer_parts = []
+        async with admission.aslot():
+            if supports_thinking:
+                reasoning_steps.append("🧠 Using thinking-enabled model with chain-of-thought reasoning...")
+                for event in pending_steps():
+                    yield event
+                thinking_parts = []
+                try:
+                    # Enhanced system message for chain-of-thought reasoning
+                    cot_system_message = f"""You are an expert AI assistant that uses chain-of-thought reasoning.
 
 Answer the question based ONLY on the provided context from PDF documents.
 
@@ -171,43 +366,253 @@ Context from PDF documents:
 
 Think through each step carefully, showing your reasoning process."""
 
-                # Use Ollama client directly for thinking-capable models
-                ollama_response = ollama.chat(
-                    model=model,
-                    messages=[
-                        {"role": "system", "content": cot_system_message},
-                        {"role": "user", "content": f"Question: {question}\n\nThink step-by-step and provide a detailed answer with source citations."}
-                    ],
-                    think=True,
-                    stream=False
-                )
+                    # Use Ollama client directly for thinking-capable models
+                    ollama_stream = pool.achat_stream(
+                        model,
+                        messages=[
+                            {"role": "system", "content": cot_system_message},
+                            {"role": "user", "content": f"Question: {question}\n\nThink step-by-step and provide a detailed answer with source citations."}
+                        ],
+                        think=True,
+                        keep_alive=residency.keep_alive(model)
+                    )
+                    async for chunk in ollama_stream:
+                        thinking = getattr(chunk.message, "thinking", None)
+                        if thinking:
+                            thinking_parts.append(thinking)
+                            yield "thinking", thinking
+                        if chunk.message.content:
+                            answer_parts.append(chunk.message.content)
+                            yield "token", chunk.message.content
+                except Exception as e:
+                    # Once answer tokens have been sent there is no falling back
+                    if answer_parts:
+                        raise
+                    print(f"Error using thinking mode, falling back to standard: {e}")
+                    async for token in chain.astream(question):
+                        answer_parts.append(token)
+                        yield "token", token
 
                 # Add thinking process to reasoning steps
-                if hasattr(ollama_response.message, 'thinking') and ollama_response.message.thinking:
-                    thinking_text = ollama_response.message.thinking
+                if thinking_parts:
+                    thinking_text = "".join(thinking_parts)
                     # Show more of the thinking process (500 chars instead of 200)
                     reasoning_steps.append(f"💡 Model's chain-of-thought:\n{thinking_text[:500]}{'...' if len(thinking_text) > 500 else ''}")
+            else:
+                for event in pending_steps():
+                    yield event
+                async for token in chain.astream(question):
+                    answer_parts.append(token)
+                    yield "token", token
+        response = "".join(answer_parts)
 
-                response = ollama_response.message.content
-            except Exception as e:
-                print(f"Error using thinking mode, falling back to standard: {e}")
-                response = chain.invoke(question)
-        else:
-            response = chain.invoke(question)
-
-        # Extract source information
-        sources = [
-            {
-                "pdf_name": doc.metadata.get("pdf_name"),
-                "pdf_id": doc.metadata.get("pdf_id"),
-                "chunk_index": doc.metadata.get("chunk_index", 0)
-            }
-            for doc in all_docs[:10]
+        reasoning_steps.append("✨ Answer generated successfully!")
+        for event in pending_steps():
+            yield event
+
+        if answer_cache is not None:
+            answer_cache.put(cache_key, response, sources, reasoning_steps)
+        if semantic_cache is not None:
+            semantic_cache.put(scope, question, question_vector, response, sources, reasoning_steps, chunk_ids)
+
+        yield "done", {
+            "answer": response,
+            "sources": sources,
+            "reasoning_steps": reasoning_steps,
+            "metadata": {"cache_hit": False},
+        }
+
+    @staticmethod
+    def _replay(
+        answer: str,
+        sources: List[Dict],
+        reasoning_steps: List[str],
+        metadata: Dict[str, Any]
+    ) -> Iterator[StreamEvent]:
+        """Events for an answer that is already complete, e.g. from a cache.
+
+        A cached answer's steps describe the request that generated it, so
+        only the last one (saying where the answer came from) is streamed;
+        the done event carries them all.
+        """
+        for text in reasoning_steps[-1:]:
+            yield "step", text
+        yield "sources", sources
+        if answer:
+            yield "token", answer
+        yield "done", {
+            "answer": answer,
+            "sources": sources,
+            "reasoning_steps": reasoning_steps,
+            "metadata": metadata,
+        }
+
+    @staticmethod
+    def _semantic_hit(
+        entry: SemanticEntry,
+        similarity: float
+    ) -> Tuple[str, List[Dict], List[str], Dict[str, Any]]:
+        """Answer from a semantic cache entry."""
+        steps = list(entry.reasoning_steps) + [
+            f"♻️ Answer reused from a similar earlier question ({similarity:.2f}): {entry.question}"
         ]
+        metadata = {"cache_hit": True, "semantic_similarity": round(similarity, 4)}
+        return entry.answer, list(entry.sources), steps, metadata
 
-        reasoning_steps.append("✨ Answer generated successfully!")
+    async def _retrieve(
+        self,
+        question: str,
+        llm: PooledChatOllama,
+        admission: AdmissionScheduler,
+        pdfs: List[PDFMetadata],
+        db: Session,
+        reasoning_steps: List[str]
+    ) -> Tuple[List[Document], bool]:
+        """Vector (and, with HYBRID_SEARCH, keyword) search over the PDFs.
 
-        return response, sources, reasoning_steps
+        Returns:
+            Tuple of (retrieved chunks, best first; whether every collection
+            was searched successfully)
+        """
+        pdfs_by_id = {pdf.pdf_id: pdf for pdf in pdfs}
+        dense_pdfs = pdfs
+        lexical_hits: List[Tuple[Document, float]] = []
+        hybrid = settings.HYBRID_SEARCH
+        prefilter = hybrid and settings.HYBRID_PREFILTER and len(pdfs) > settings.HYBRID_PREFILTER_PDFS
+
+        if prefilter:
+            # Keyword search is cheap: use it to pick the PDFs worth a vector search
+            lexical_hits = await self._lexical_search(question, pdfs, db, reasoning_steps)
+            candidates = candidate_pdfs(lexical_hits, settings.HYBRID_PREFILTER_PDFS)
+            if candidates:
+                dense_pdfs = [pdfs_by_id[pdf_id] for pdf_id in candidates]
+                reasoning_steps.append(
+                    f"🔎 Keyword pre-filter narrowed vector search to {len(dense_pdfs)} of {len(pdfs)} PDF(s)"
+                )
+
+        reasoning_steps.append("🔍 Generating alternative search queries...")
+        # Vector search runs concurrently with keyword search
+        dense = asyncio.ensure_future(
+            self._dense_search(question, llm, admission, self._search_groups(dense_pdfs), pdfs_by_id)
+        )
+        if hybrid and not prefilter:
+            lexical_hits = await self._lexical_search(question, pdfs, db, reasoning_steps)
+        dense_rankings, dense_steps, complete = await dense
+        reasoning_steps.extend(dense_steps)
+
+        # One vector ranking across all collections, ordered by relevance
+        all_docs = list(merge_by_score(dense_rankings))
+        if lexical_hits:
+            lexical_docs = [doc for doc, _ in lexical_hits]
+            for doc in lexical_docs:
+                doc.metadata.setdefault("pdf_name", pdfs_by_id[doc.metadata["pdf_id"]].name)
+            all_docs = reciprocal_rank_fusion([all_docs, lexical_docs], k=settings.RRF_K)
+            reasoning_steps.append("🔀 Merged keyword and vector results with reciprocal rank fusion")
+        return all_docs, complete
+
+    def _search_groups(self, pdfs: List[PDFMetadata]) -> List[SearchTarget]:
+        """Collections to search for these PDFs, with their search arguments.
+
+        PDFs in the shared collection are searched together with one
+        pdf_id-filtered query; legacy PDFs each have their own collection.
+        Each target's context is the PDF its unattributed chunks belong to.
+        """
+        groups: Dict[str, List[PDFMetadata]] = {}
+        for pdf in pdfs:
+            groups.setdefault(pdf.search_collection, []).append(pdf)
+
+        targets = []
+        for collection_name, group in groups.items():
+            def open_collection(name=collection_name):
+                return self.vector_store.open_collection(name)
+
+            if collection_name != group[0].collection_name:
+                targets.append(SearchTarget(
+                    label=f"shared collection ({len(group)} PDF(s))",
+                    open_collection=open_collection,
+                    k=min(3 * len(group), 10),
+                    filter={"pdf_id": {"$in": [pdf.pdf_id for pdf in group]}},
+                    context=group[0]
+                ))
+            else:
+                targets.append(SearchTarget(
+                    label=group[0].name,
+                    open_collection=open_collection,
+                    k=3,
+                    context=group[0]
+                ))
+        return targets
+
+    async def _dense_search(
+        self,
+        question: str,
+        llm: PooledChatOllama,
+        admission: AdmissionScheduler,
+        targets: List[SearchTarget],
+        pdfs_by_id: Dict[str, PDFMetadata]
+    ) -> Tuple[List[List[Document]], List[str], bool]:
+        """Multi-query vector search of each collection.
+
+        The question is expanded and embedded once, then every collection
+        is searched concurrently with the same query vectors. A collection
+        that errors or exceeds RETRIEVAL_TIMEOUT_SECONDS is skipped and the
+        answer is built from the others.
+
+        Returns:
+            Tuple of (one ranked document list per collection, reasoning_steps,
+            whether every collection was searched)
+        """
+        rankings = []
+        steps = []
+        planner = RetrievalPlanner(llm, self.vector_store.embeddings)
+        # Query expansion is a generation call: it takes a slot like answers do
+        async with admission.aslot():
+            plan = await planner.aplan(question)
+        steps.append(f"🧭 Searching with {len(plan.queries)} queries: " + " | ".join(plan.queries))
+        results = await planner.asearch_all(
+            plan,
+            targets,
+            timeout=settings.RETRIEVAL_TIMEOUT_SECONDS,
+            executor=get_search_executor(settings.RETRIEVAL_MAX_WORKERS)
+        )
+        for result in results:
+            label = result.target.label
+            steps.append(f"📄 Retrieving from: {label}")
+            if result.timed_out:
+                steps.append(f"⏱️ Timed out retrieving from {label} after {settings.RETRIEVAL_TIMEOUT_SECONDS}s")
+                continue
+            if result.error is not None:
+                steps.append(f"⚠️ Error retrieving from {label}: {result.error}")
+                print(f"Error retrieving from {label}: {result.error}")
+                continue
+            # Ensure metadata is present
+            for doc in result.docs:
+                pdf = pdfs_by_id.get(doc.metadata.get("pdf_id"), result.target.context)
+                if "pdf_name" not in doc.metadata:
+                    doc.metadata["pdf_name"] = pdf.name
+                if "pdf_id" not in doc.metadata:
+                    doc.metadata["pdf_id"] = pdf.pdf_id
+            rankings.append(result.docs)
+            steps.append(f"✅ Found {len(result.docs)} relevant chunks in {label}")
+        return rankings, steps, all(result.ok for result in results)
+
+    async def _lexical_search(
+        self,
+        question: str,
+        pdfs: List[PDFMetadata],
+        db: Session,
+        reasoning_steps: List[str]
+    ) -> List[Tuple[Document, float]]:
+        """BM25 keyword search over the given PDFs' chunks, on the search worker pool."""
+        hits = await run_in_session(
+            db,
+            lambda session: self.lexical_index.search(
+                question, session, pdf_ids=[pdf.pdf_id for pdf in pdfs], limit=settings.LEXICAL_TOP_K
+            ),
+            get_search_executor(settings.RETRIEVAL_MAX_WORKERS)
+        )
+        reasoning_steps.append(f"🔤 Keyword search matched {len(hits)} chunk(s)")
+        return hits
 
     def save_message(
         self,
@@ -255,6 +660,22 @@ Think through each step carefully, showing your reasoning process."""
 
         return message
 
+    async def asave_message(
+        self,
+        session_id: str,
+        role: str,
+        content: str,
+        sources: Optional[List[Dict]],
+        db: Session
+    ) -> ChatMessage:
+        """Save chat message to database without blocking the event loop.
+
+        Same as ``save_message``, run on a worker thread.
+        """
+        return await run_in_session(
+            db, lambda session: self.save_message(session_id, role, content, sources, session)
+        )
+
     def get_session_messages(self, session_id: str, db: Session) -> List[ChatMessage]:
         """Get all messages for a session.
 
@@ -0,0 +1,29 @@
+"""Residency of the Ollama models the API calls."""
+from ...core.residency import ModelResidency, configure_model_residency, get_model_residency
+from ..config import settings
+from .ollama_pool import ollama_pool
+
+
+def configure_residency() -> ModelResidency:
+    """Configure the process-wide residency manager with the pool, limits and pinning from settings.
+
+    The lifespan hook calls this once at startup.
+    """
+    return configure_model_residency(
+        ollama_pool(),
+        min_keep_alive=settings.MODEL_KEEP_ALIVE_MIN_SECONDS,
+        max_keep_alive=settings.MODEL_KEEP_ALIVE_MAX_SECONDS,
+        pinned_embeddings=[settings.EMBEDDING_MODEL] if settings.PIN_EMBEDDING_MODEL else []
+    )
+
+
+def model_residency() -> ModelResidency:
+    """The process-wide residency manager, as configured at startup.
+
+    It is only configured here if startup has not done it, or if the
+    Ollama pool has since been replaced and its host state is stale.
+    """
+    residency = get_model_residency()
+    if residency is None or residency.pool is not ollama_pool():
+        residency = configure_residency()
+    return residency
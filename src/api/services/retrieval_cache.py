@@ -0,0 +1,142 @@
+"""Cache of retrieval results, invalidated by corpus version."""
+import copy
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from sqlalchemy.orm import Session
+
+from ..database import CorpusState
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def corpus_version(db: Session) -> int:
+    """Current corpus version (0 before the first change)."""
+    state = db.query(CorpusState).filter(CorpusState.id == 1).first()
+    return state.version if state else 0
+
+
+def bump_corpus_version(db: Session) -> None:
+    """Mark the corpus as changed.
+
+    Does not commit: the bump becomes visible together with the caller's
+    own changes, so no reader sees the new version with the old corpus.
+    """
+    bumped = db.query(CorpusState).filter(CorpusState.id == 1).update(
+        {CorpusState.version: CorpusState.version + 1, CorpusState.updated_at: datetime.now()},
+        synchronize_session=False
+    )
+    if not bumped:
+        db.add(CorpusState(id=1, version=1, updated_at=datetime.now()))
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, for cache keys."""
+    return _WHITESPACE.sub(" ", question).strip().lower()
+
+
+def _copy(docs: List[Document]) -> List[Document]:
+    """Documents whose metadata can be changed without touching the originals."""
+    return [doc.model_copy(update={"metadata": copy.deepcopy(doc.metadata)}) for doc in docs]
+
+
+def retrieval_key(question: str, pdf_ids: Iterable[str], model: str, version: int) -> Tuple:
+    """Cache key for retrieving ``question`` over ``pdf_ids``.
+
+    The model is part of the key because it writes the expanded queries.
+    """
+    return normalize_question(question), tuple(sorted(pdf_ids)), model, version
+
+
+class RetrievalCache:
+    """Thread-safe LRU of retrieved chunks.
+
+    Keys embed the corpus version, so entries for an older version can
+    never be returned; they are dropped as soon as a newer version is seen.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, List[Document]]" = OrderedDict()
+        self._version = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _observe_version(self, version: int) -> None:
+        """Drop entries from older corpus versions. Caller holds the lock."""
+        if version > self._version:
+            if self._entries:
+                logger.info(f"Corpus version {version}: dropping {len(self._entries)} cached retrievals")
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+            self._version = version
+
+    def get(self, key: Tuple) -> Optional[List[Document]]:
+        """Copies of the cached documents for ``key``, or None."""
+        with self._lock:
+            self._observe_version(key[-1])
+            docs = self._entries.get(key)
+            if docs is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy(docs)
+
+    def put(self, key: Tuple, docs: List[Document]) -> None:
+        """Store documents for ``key``, evicting the least recently used."""
+        with self._lock:
+            self._observe_version(key[-1])
+            if key[-1] < self._version:
+                return
+            self._entries[key] = _copy(docs)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "corpus_version": self._version,
+            }
+
+
+_cache = RetrievalCache()
+
+
+def get_retrieval_cache(max_entries: Optional[int] = None) -> RetrievalCache:
+    """Get the process-wide cache, optionally setting its size."""
+    if max_entries is not None:
+        _cache.max_entries = max_entries
+    return _cache
+
+
+def retrieval_cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide cache."""
+    return _cache.stats()
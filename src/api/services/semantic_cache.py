@@ -0,0 +1,287 @@
+"""Answer cache matched by question-embedding similarity."""
+import copy
+import itertools
+import logging
+import math
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Similarities are bucketed this finely in the stats used to tune the threshold
+BUCKET_WIDTH = 0.02
+# Below this similarity a question is unrelated; not worth a stats bucket
+MIN_BUCKET = 0.5
+
+
+def semantic_scope(pdf_ids: Iterable[str], model: str, corpus_version: int) -> Tuple:
+    """Questions are only compared with others asked of the same PDFs, model and corpus."""
+    return tuple(sorted(pdf_ids)), model, corpus_version
+
+
+def chunk_overlap(a: Iterable[Hashable], b: Iterable[Hashable]) -> float:
+    """Jaccard overlap of two sets of chunk ids (1.0 when both are empty)."""
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SemanticEntry:
+    """A previously answered question and its answer."""
+
+    __slots__ = ("entry_id", "scope", "question", "vector", "answer", "sources",
+                 "reasoning_steps", "chunk_ids", "expires")
+
+    def __init__(
+        self,
+        entry_id: int,
+        scope: Tuple,
+        question: str,
+        vector: np.ndarray,
+        answer: str,
+        sources: List[Dict],
+        reasoning_steps: List[str],
+        chunk_ids: List[Hashable],
+        expires: float
+    ):
+        self.entry_id = entry_id
+        self.scope = scope
+        self.question = question
+        self.vector = vector
+        self.answer = answer
+        self.sources = sources
+        self.reasoning_steps = reasoning_steps
+        self.chunk_ids = chunk_ids
+        self.expires = expires
+
+    def copy(self) -> "SemanticEntry":
+        """A copy callers may change without touching the cached entry."""
+        return SemanticEntry(
+            self.entry_id, self.scope, self.question, self.vector, self.answer,
+            copy.deepcopy(self.sources), list(self.reasoning_steps), list(self.chunk_ids), self.expires
+        )
+
+
+class _Scope:
+    """Entries for one scope, with their vectors stacked for a single matmul."""
+
+    def __init__(self):
+        self.entries: List[SemanticEntry] = []
+        self._matrix: Optional[np.ndarray] = None
+
+    def add(self, entry: SemanticEntry) -> None:
+        self.entries.append(entry)
+        self._matrix = None
+
+    def remove(self, entry: SemanticEntry) -> None:
+        self.entries.remove(entry)
+        self._matrix = None
+
+    def candidates(self, vector: np.ndarray, threshold: float) -> Tuple[List[Tuple[SemanticEntry, float]], float]:
+        """Entries at or above ``threshold``, most similar first, and the best similarity overall."""
+        if not self.entries:
+            return [], 0.0
+        if self._matrix is None:
+            self._matrix = np.stack([entry.vector for entry in self.entries])
+        similarities = self._matrix @ vector
+        above = np.flatnonzero(similarities >= threshold)
+        ranked = above[np.argsort(-similarities[above], kind="stable")]
+        matches = [(self.entries[i], float(similarities[i])) for i in ranked]
+        return matches, float(similarities.max())
+
+
+class SemanticAnswerCache:
+    """Answers reused for paraphrased questions.
+
+    Question vectors are L2-normalized and compared by cosine similarity
+    against every earlier question in the same scope; the nearest one at or
+    above ``threshold`` is a hit. At most ``max_entries`` answers are kept
+    across all scopes, least recently used evicted first, and each expires
+    after ``ttl_seconds``.
+
+    Hits cannot be checked for free, so a sample of them (``audit_rate``)
+    is audited by the caller: it retrieves context for the new question
+    anyway and reports, through ``record_audit``, whether that context
+    matches the cached answer's. Hit, miss, audit and false-hit counts are
+    kept per similarity bucket to show where the threshold should sit.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_entries: int = 1024,
+        ttl_seconds: Optional[float] = 3600.0,
+        audit_rate: float = 0.05
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.audit_rate = audit_rate
+        self._scopes: Dict[Tuple, _Scope] = {}
+        self._lru: "OrderedDict[int, SemanticEntry]" = OrderedDict()
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.audits = 0
+        self.false_hits = 0
+        self._buckets: Dict[str, Dict[str, int]] = {}
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def _count(self, similarity: float, field: str) -> None:
+        """Bump a per-bucket counter. Caller holds the lock."""
+        if similarity < MIN_BUCKET:
+            return
+        bucket = f"{math.floor(round(similarity, 4) / BUCKET_WIDTH + 1e-9) * BUCKET_WIDTH:.2f}"
+        counts = self._buckets.setdefault(bucket, {"hits": 0, "misses": 0, "audits": 0, "false_hits": 0})
+        counts[field] += 1
+
+    def _drop(self, entry: SemanticEntry) -> None:
+        """Remove an entry from its scope and the LRU. Caller holds the lock."""
+        self._lru.pop(entry.entry_id, None)
+        scope = self._scopes.get(entry.scope)
+        if scope is not None:
+            scope.remove(entry)
+            if not scope.entries:
+                del self._scopes[entry.scope]
+
+    def lookup(self, scope: Tuple, vector: List[float]) -> Tuple[Optional[SemanticEntry], float]:
+        """Find the nearest unexpired earlier question in ``scope``.
+
+        Expired entries met on the way are dropped and the next nearest
+        is tried, as long as it is still above the threshold.
+
+        Returns:
+            Tuple of (a copy of the entry if it is a hit else None, its
+            similarity, or the best similarity on a miss)
+        """
+        query = self._normalize(vector)
+        now = time.monotonic()
+        with self._lock:
+            entries = self._scopes.get(scope)
+            matches, similarity = entries.candidates(query, self.threshold) if entries else ([], 0.0)
+            for entry, match in matches:
+                if entry.expires < now:
+                    self._drop(entry)
+                    continue
+                self._lru.move_to_end(entry.entry_id)
+                self.hits += 1
+                self._count(match, "hits")
+                return entry.copy(), match
+            self.misses += 1
+            self._count(similarity, "misses")
+            return None, similarity
+
+    def should_audit(self) -> bool:
+        """Whether to verify this hit against fresh retrieval."""
+        return random.random() < self.audit_rate
+
+    def record_audit(self, entry: SemanticEntry, similarity: float, false_hit: bool) -> None:
+        """Record the outcome of an audited hit; false hits are dropped."""
+        with self._lock:
+            self.audits += 1
+            self._count(similarity, "audits")
+            if false_hit:
+                self.false_hits += 1
+                self._count(similarity, "false_hits")
+                # ``entry`` is the copy lookup returned
+                cached = self._lru.get(entry.entry_id)
+                if cached is not None:
+                    self._drop(cached)
+        if false_hit:
+            logger.info(f"Semantic cache false hit at similarity {similarity:.3f}: {entry.question!r}")
+
+    def put(
+        self,
+        scope: Tuple,
+        question: str,
+        vector: List[float],
+        answer: str,
+        sources: List[Dict],
+        reasoning_steps: List[str],
+        chunk_ids: List[Hashable]
+    ) -> None:
+        """Store an answered question, evicting the least recently used beyond ``max_entries``."""
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        with self._lock:
+            # Scopes from an older corpus version can never match again
+            for stale in [s for s in self._scopes if s[:-1] == scope[:-1] and s[-1] < scope[-1]]:
+                for entry in list(self._scopes[stale].entries):
+                    self._drop(entry)
+            normalized = self._normalize(vector)
+            # Shared by the copies lookup returns
+            normalized.setflags(write=False)
+            entry = SemanticEntry(
+                next(self._ids), scope, question, normalized, answer,
+                copy.deepcopy(sources), list(reasoning_steps), list(chunk_ids), expires
+            )
+            self._scopes.setdefault(scope, _Scope()).add(entry)
+            self._lru[entry.entry_id] = entry
+            while len(self._lru) > self.max_entries:
+                _, oldest = next(iter(self._lru.items()))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._scopes.clear()
+            self._lru.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters, with per-similarity-bucket detail for tuning the threshold."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "audits": self.audits,
+                "false_hits": self.false_hits,
+                "false_hit_rate": self.false_hits / self.audits if self.audits else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._lru),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "similarity_buckets": {
+                    bucket: dict(counts) for bucket, counts in sorted(self._buckets.items())
+                },
+            }
+
+
+_cache = SemanticAnswerCache()
+
+
+def get_semantic_cache(
+    threshold: Optional[float] = None,
+    max_entries: Optional[int] = None,
+    ttl_seconds: Optional[float] = None,
+    audit_rate: Optional[float] = None
+) -> SemanticAnswerCache:
+    """Get the process-wide cache, optionally updating its settings."""
+    if threshold is not None:
+        _cache.threshold = threshold
+    if max_entries is not None:
+        _cache.max_entries = max_entries
+    if ttl_seconds is not None:
+        _cache.ttl_seconds = ttl_seconds
+    if audit_rate is not None:
+        _cache.audit_rate = audit_rate
+    return _cache
+
+
+def semantic_cache_stats() -> Dict[str, Any]:
+    """Counters for the process-wide cache."""
+    return _cache.stats()
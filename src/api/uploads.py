@@ -0,0 +1,120 @@
+"""Streaming multipart upload parsing."""
+from typing import AsyncIterator, Dict, List, Optional
+from fastapi import Request
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class MultipartError(ValueError):
+    """Raised when a request is not a usable multipart upload."""
+
+
+class StreamingFileUpload:
+    """Reads one file field from a multipart request as it arrives.
+
+    Unlike ``UploadFile``, nothing is buffered before the endpoint runs:
+    ``open()`` reads just far enough to see the file part's headers, and
+    ``chunks()`` yields the file bytes as they come off the socket, so the
+    caller can reject a payload before the client has finished sending it.
+    """
+
+    def __init__(self, request: Request, field_name: str = "file"):
+        self.request = request
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+
+        content_type = request.headers.get("content-type", "")
+        media_type, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise MultipartError("Expected a multipart/form-data request")
+
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+        self._stream = request.stream()
+        self._pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._file_done = False
+        self._exhausted = False
+
+    async def open(self) -> str:
+        """Read until the file part starts and return its filename."""
+        while self.filename is None:
+            if not await self._feed():
+                raise MultipartError(f"Missing '{self.field_name}' file field")
+        return self.filename
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Yield the file's bytes as they are received.
+
+        Raises:
+            MultipartError: The body ended before the file part did
+        """
+        if self.filename is None:
+            await self.open()
+        while True:
+            while self._pending:
+                yield self._pending.pop(0)
+            if self._file_done:
+                return
+            if not await self._feed():
+                raise MultipartError("Upload ended before the file was complete")
+
+    async def _feed(self) -> bool:
+        """Feed the next network chunk to the parser. False at end of body."""
+        if self._exhausted:
+            return False
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            self._exhausted = True
+            self._parser.finalize()
+            return False
+        self._parser.write(chunk)
+        return True
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("latin-1")
+        filename = options.get(b"filename")
+        self._in_file = (
+            name == self.field_name and filename is not None and self.filename is None
+        )
+        if self._in_file:
+            self.filename = filename.decode("utf-8", errors="replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self._file_done = True
@@ -10,18 +10,22 @@ import logging
 import os
 import tempfile
 import shutil
+import sys
 import pdfplumber
 import ollama
 import warnings
 from datetime import datetime
 from pathlib import Path
 
+# Make the ``src`` package importable when launched with ``streamlit run``
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
 # Suppress torch warning
 warnings.filterwarnings('ignore', category=UserWarning, message='.*torch.classes.*')
 
-from langchain_community.document_loaders import UnstructuredPDFLoader
 from langchain_ollama import OllamaEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_core.prompts import ChatPromptTemplate, PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
@@ -30,6 +34,12 @@ from langchain_core.runnables import RunnablePassthrough
 from langchain_classic.retrievers.multi_query import MultiQueryRetriever
 from typing import List, Tuple, Dict, Any, Optional
 
+from src.core.content_store import sha256_bytes, pdf_id_for_hash, collection_name_for_hash
+from src.core.document import DocumentProcessor
+from src.core.context_budget import select_within_budget
+from src.core.rank_fusion import merge_by_score
+from src.core.retrieval import RetrievalPlanner, SearchTarget
+
 # Set protobuf environment variable to avoid error messages
 # This might cause some issues with latency but it's a tradeoff
 os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
@@ -37,6 +47,16 @@ os.environ["PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION"] = "python"
 # Define persistent directory for ChromaDB
 PERSIST_DIRECTORY = os.path.join("data", "vectors")
 
+# The API keeps its reference-counted collections in the same directory;
+# the UI only creates, reuses and deletes collections under this prefix
+COLLECTION_PREFIX = "st_"
+
+# Seconds a single PDF's search may take before it is left out of the answer
+RETRIEVAL_TIMEOUT_SECONDS = 10.0
+
+# Tokens of retrieved context sent to the model
+CONTEXT_TOKEN_BUDGET = 8000
+
 # Streamlit page configuration
 st.set_page_config(
     page_title="Ollama PDF RAG Streamlit UI",
@@ -82,92 +102,69 @@ def extract_model_names(models_info: Any) -> Tuple[str, ...]:
         return tuple()
 
 
-def create_vector_db(file_upload) -> Chroma:
-    """
-    Create a vector database from an uploaded PDF file.
-
-    Args:
-        file_upload (st.UploadedFile): Streamlit file upload object containing the PDF.
-
-    Returns:
-        Chroma: A vector store containing the processed document chunks.
-    """
-    logger.info(f"Creating vector DB from file upload: {file_upload.name}")
-    temp_dir = tempfile.mkdtemp()
-
-    path = os.path.join(temp_dir, file_upload.name)
-    with open(path, "wb") as f:
-        f.write(file_upload.getvalue())
-        logger.info(f"File saved to temporary path: {path}")
-        loader = UnstructuredPDFLoader(path)
-        data = loader.load()
-
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=7500, chunk_overlap=100)
-    chunks = text_splitter.split_documents(data)
-    logger.info("Document split into chunks")
-
-    # Updated embeddings configuration with persistent storage
-    embeddings = OllamaEmbeddings(model="nomic-embed-text")
-    vector_db = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
-        persist_directory=PERSIST_DIRECTORY,
-        collection_name=f"pdf_{hash(file_upload.name)}"  # Unique collection name per file
-    )
-    logger.info("Vector DB created with persistent storage")
-
-    shutil.rmtree(temp_dir)
-    logger.info(f"Temporary directory {temp_dir} removed")
-    return vector_db
-
-
 def generate_pdf_id(file_upload) -> str:
-    """Generate unique ID for PDF."""
-    timestamp = datetime.now().isoformat()
-    return f"pdf_{abs(hash(file_upload.name + timestamp))}"
+    """Generate a stable ID for a PDF from the SHA-256 of its bytes."""
+    return pdf_id_for_hash(sha256_bytes(file_upload.getvalue()))
 
 
 def process_and_store_pdf(file_upload, pdf_id: str, is_sample: bool = False):
     """Process single PDF and store in session state."""
     logger.info(f"Processing PDF: {file_upload.name} with ID: {pdf_id}")
 
-    # Create temp directory
-    temp_dir = tempfile.mkdtemp()
-    path = os.path.join(temp_dir, file_upload.name)
-
-    # Save file
-    with open(path, "wb") as f:
-        f.write(file_upload.getvalue())
-        logger.info(f"File saved to temporary path: {path}")
-
-    # Load and chunk
-    loader = UnstructuredPDFLoader(path)
-    data = loader.load()
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=7500, chunk_overlap=100)
-    chunks = text_splitter.split_documents(data)
-    logger.info(f"Document split into {len(chunks)} chunks")
-
-    # Add metadata to EACH chunk
-    for i, chunk in enumerate(chunks):
-        chunk.metadata.update({
-            "pdf_id": pdf_id,
-            "pdf_name": file_upload.name,
-            "chunk_index": i,
-            "source_file": file_upload.name
-        })
-
-    # Create vector DB with unique collection
-    collection_name = f"pdf_{abs(hash(file_upload.name + pdf_id))}"
-    logger.info(f"Creating vector DB with collection name: {collection_name}")
-
+    content = file_upload.getvalue()
+    collection_name = COLLECTION_PREFIX + collection_name_for_hash(sha256_bytes(content))
     embeddings = OllamaEmbeddings(model="nomic-embed-text")
-    vector_db = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
+
+    # Identical content always maps to the same collection, so reuse it if it
+    # was already embedded instead of parsing the PDF again
+    vector_db = Chroma(
         persist_directory=PERSIST_DIRECTORY,
+        embedding_function=embeddings,
         collection_name=collection_name
     )
-    logger.info("Vector DB created with persistent storage")
+    doc_count = vector_db._collection.count()
+
+    if doc_count:
+        logger.info(f"Reusing existing collection {collection_name} with {doc_count} chunks")
+    else:
+        # Create temp directory
+        temp_dir = tempfile.mkdtemp()
+        path = os.path.join(temp_dir, file_upload.name)
+
+        # Save file
+        with open(path, "wb") as f:
+            f.write(content)
+            logger.info(f"File saved to temporary path: {path}")
+
+        # Load and chunk (text-layer pages skip the unstructured pipeline)
+        doc_processor = DocumentProcessor(chunk_size=7500, chunk_overlap=100, tiered=True)
+        data = doc_processor.load_pdf(Path(path))
+        chunks = doc_processor.split_documents(data)
+        logger.info(f"Document split into {len(chunks)} chunks")
+
+        # Add metadata to EACH chunk
+        for i, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                "pdf_id": pdf_id,
+                "pdf_name": file_upload.name,
+                "chunk_index": i,
+                "source_file": file_upload.name
+            })
+
+        logger.info(f"Creating vector DB with collection name: {collection_name}")
+        vector_db = Chroma.from_documents(
+            documents=chunks,
+            embedding=embeddings,
+            persist_directory=PERSIST_DIRECTORY,
+            collection_name=collection_name,
+            ids=[f"{pdf_id}:{i}" for i in range(len(chunks))]
+        )
+        doc_count = len(chunks)
+        logger.info("Vector DB created with persistent storage")
+
+        # Cleanup
+        shutil.rmtree(temp_dir)
+        logger.info(f"Temporary directory {temp_dir} removed")
 
     # Extract PDF pages
     with pdfplumber.open(file_upload) as pdf:
@@ -182,15 +179,11 @@ def process_and_store_pdf(file_upload, pdf_id: str, is_sample: bool = False):
         "file_upload": file_upload,
         "collection_name": collection_name,
         "upload_timestamp": datetime.now(),
-        "doc_count": len(chunks),
+        "doc_count": doc_count,
         "is_sample": is_sample
     }
     st.session_state["active_pdfs"].append(pdf_id)
-    logger.info(f"PDF stored in session state with {len(chunks)} chunks")
-
-    # Cleanup
-    shutil.rmtree(temp_dir)
-    logger.info(f"Temporary directory {temp_dir} removed")
+    logger.info(f"PDF stored in session state with {doc_count} chunks")
 
 
 def delete_pdf(pdf_id: str):
@@ -199,12 +192,13 @@ def delete_pdf(pdf_id: str):
         pdf_data = st.session_state["pdfs"][pdf_id]
         logger.info(f"Deleting PDF: {pdf_data['name']} (ID: {pdf_id})")
 
-        # Delete vector collection
-        try:
-            pdf_data["vector_db"].delete_collection()
-            logger.info(f"Deleted collection: {pdf_data['collection_name']}")
-        except Exception as e:
-            logger.error(f"Error deleting collection: {e}")
+        # Delete vector collection, unless it belongs to the API
+        if pdf_data["collection_name"].startswith(COLLECTION_PREFIX):
+            try:
+                pdf_data["vector_db"].delete_collection()
+                logger.info(f"Deleted collection: {pdf_data['collection_name']}")
+            except Exception as e:
+                logger.error(f"Error deleting collection: {e}")
 
         # Remove from state
         del st.session_state["pdfs"][pdf_id]
@@ -232,46 +226,43 @@ def process_question_multi_pdf(
 
     llm = ChatOllama(model=selected_model)
 
-    # Query prompt
-    QUERY_PROMPT = PromptTemplate(
-        input_variables=["question"],
-        template="""You are an AI language model assistant. Your task is to generate 2
-        different versions of the given user question to retrieve relevant documents from
-        a vector database. By generating multiple perspectives on the user question, your
-        goal is to help the user overcome some of the limitations of the distance-based
-        similarity search. Provide these alternative questions separated by newlines.
-        Original question: {question}"""
-    )
-
-    # Retrieve from ALL PDF collections
-    all_retrieved_docs = []
-    for pdf_id, pdf_data in pdfs_dict.items():
-        vector_db = pdf_data["vector_db"]
-
-        retriever = MultiQueryRetriever.from_llm(
-            vector_db.as_retriever(search_kwargs={"k": 3}),
-            llm,
-            prompt=QUERY_PROMPT
+    # Expand and embed the question once, then search every PDF with it
+    planner = RetrievalPlanner(llm, OllamaEmbeddings(model="nomic-embed-text"))
+    plan = planner.plan(question)
+    logger.info(f"Searching with {len(plan.queries)} queries")
+
+    # Retrieve from ALL PDF collections in parallel
+    targets = [
+        SearchTarget(
+            label=pdf_data["name"],
+            open_collection=lambda vector_db=pdf_data["vector_db"]: vector_db,
+            k=3,
+            context=pdf_id
         )
-
-        try:
-            docs = retriever.get_relevant_documents(question)
-            logger.info(f"Retrieved {len(docs)} documents from {pdf_data['name']}")
-            # Ensure metadata
-            for doc in docs:
-                if "pdf_name" not in doc.metadata:
-                    doc.metadata["pdf_name"] = pdf_data["name"]
-                if "pdf_id" not in doc.metadata:
-                    doc.metadata["pdf_id"] = pdf_id
-            all_retrieved_docs.extend(docs)
-        except Exception as e:
-            logger.warning(f"Error retrieving from {pdf_data['name']}: {e}")
-
-    logger.info(f"Total documents retrieved: {len(all_retrieved_docs)}")
+        for pdf_id, pdf_data in pdfs_dict.items()
+    ]
+    rankings = []
+    for result in planner.search_all(plan, targets, timeout=RETRIEVAL_TIMEOUT_SECONDS):
+        pdf_name = result.target.label
+        if not result.ok:
+            logger.warning(f"Error retrieving from {pdf_name}: {result.error or 'timed out'}")
+            continue
+        logger.info(f"Retrieved {len(result.docs)} documents from {pdf_name}")
+        # Ensure metadata
+        for doc in result.docs:
+            if "pdf_name" not in doc.metadata:
+                doc.metadata["pdf_name"] = pdf_name
+            if "pdf_id" not in doc.metadata:
+                doc.metadata["pdf_id"] = result.target.context
+        rankings.append(result.docs)
+
+    # Highest scoring chunks across all PDFs, as many as fit the budget
+    context_docs = select_within_budget(merge_by_score(rankings), CONTEXT_TOKEN_BUDGET)
+    logger.info(f"Using {len(context_docs)} of {sum(len(r) for r in rankings)} retrieved documents")
 
     # Format context with source labels
     context_parts = []
-    for doc in all_retrieved_docs[:10]:  # Top 10 chunks
+    for doc in context_docs:
         source = doc.metadata.get("pdf_name", "Unknown")
         context_parts.append(f"[Source: {source}]\n{doc.page_content}\n")
 
@@ -311,7 +302,7 @@ def process_question_multi_pdf(
             "pdf_id": doc.metadata.get("pdf_id"),
             "chunk_index": doc.metadata.get("chunk_index", 0)
         }
-        for doc in all_retrieved_docs[:10]
+        for doc in context_docs
     ]
 
     return response, source_details
@@ -0,0 +1,299 @@
+"""Per-model admission control in front of Ollama."""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower values are admitted first; equal priorities are first come, first served
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Sentinel: use the scheduler's own queue timeout
+_DEFAULT = object()
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away; the caller may retry after ``retry_after`` seconds.
+
+    ``reason`` is ``"queue_full"`` when the queue had no room, or
+    ``"timeout"`` when the request waited longer than the queue timeout.
+    """
+
+    def __init__(self, model: str, reason: str, retry_after: int):
+        self.model = model
+        self.reason = reason
+        self.retry_after = retry_after
+        if reason == "queue_full":
+            message = f"Too many requests queued for model '{model}'"
+        else:
+            message = f"Timed out waiting for model '{model}'"
+        super().__init__(f"{message}; retry in {retry_after}s")
+
+
+class _Waiter:
+    """A queued request, woken by handing it a slot."""
+
+    __slots__ = ("granted", "cancelled", "enqueued_at", "_event", "_loop", "_future")
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.cancelled = False
+        self.enqueued_at = time.monotonic()
+        self._loop = loop
+        self._event = None if loop else threading.Event()
+        self._future = loop.create_future() if loop else None
+
+    def wake(self) -> None:
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self._future.done():
+            self._future.set_result(None)
+
+    def wait(self, timeout: Optional[float]) -> None:
+        self._event.wait(timeout)
+
+    async def await_(self, timeout: Optional[float]) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class AdmissionScheduler:
+    """Bounded priority queue in front of one model.
+
+    At most ``max_concurrent`` requests hold a slot at once, matching how
+    many the Ollama server runs in parallel for the model. Others wait in a
+    queue of at most ``max_queue`` requests, ordered by priority and then
+    arrival; a request that finds the queue full, or waits longer than
+    ``queue_timeout`` seconds, is rejected with ``AdmissionRejected``.
+
+    Blocking callers (ingestion threads) use ``slot`` and async callers
+    (request handlers) ``aslot``; both share the same queue.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_concurrent: int = 4,
+        max_queue: int = 32,
+        queue_timeout: Optional[float] = 60.0
+    ):
+        self.model = model
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._queued = 0
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        # Moving average of how long a slot is held, for Retry-After
+        self.avg_service = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds until a request arriving now would likely be admitted."""
+        with self._lock:
+            return self._retry_after()
+
+    def _retry_after(self) -> int:
+        """Caller holds the lock."""
+        rounds = (self._queued + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(self.avg_service * rounds))
+
+    def check(self) -> None:
+        """Reject now, rather than after other work, if the queue is already full."""
+        with self._lock:
+            if self._queued >= self.max_queue and self._active >= self.max_concurrent:
+                self.rejected += 1
+                raise AdmissionRejected(self.model, "queue_full", self._retry_after())
+
+    def _enter(self, priority: int, loop: Optional[asyncio.AbstractEventLoop]) -> Optional[_Waiter]:
+        """Take a free slot, or queue a waiter for one. Caller holds the lock."""
+        if self._active < self.max_concurrent and not self._queued:
+            self._active += 1
+            self.admitted += 1
+            return None
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(self.model, "queue_full", self._retry_after())
+        waiter = _Waiter(loop)
+        heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+        self._queued += 1
+        return waiter
+
+    def _settle(self, waiter: _Waiter) -> None:
+        """After a wait: keep the slot if it was handed over, else leave the queue."""
+        with self._lock:
+            waited = time.monotonic() - waiter.enqueued_at
+            if waiter.granted:
+                self.admitted += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+                return
+            waiter.cancelled = True
+            self._queued -= 1
+            self.timed_out += 1
+            retry_after = self._retry_after()
+        logger.warning(f"⏳ Request for {self.model} timed out after {waited:.1f}s in the queue")
+        raise AdmissionRejected(self.model, "timeout", retry_after)
+
+    def acquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Any = _DEFAULT) -> None:
+        """Block until a slot is free.
+
+        Args:
+            priority: Queue priority, lower first
+            timeout: Seconds to wait in the queue (default ``queue_timeout``,
+                None waits indefinitely)
+
+        Raises:
+            AdmissionRejected: The queue is full or the wait timed out
+        """
+        timeout = self.queue_timeout if timeout is _DEFAULT else timeout
+        with self._lock:
+            waiter = self._enter(priority, None)
+        if waiter is not None:
+            waiter.wait(timeout)
+            self._settle(waiter)
+
+    async def aacquire(self, priority: int = PRIORITY_INTERACTIVE, timeout: Any = _DEFAULT) -> None:
+        """Await a free slot without blocking the event loop; see ``acquire``."""
+        timeout = self.queue_timeout if timeout is _DEFAULT else timeout
+        with self._lock:
+            waiter = self._enter(priority, asyncio.get_running_loop())
+        if waiter is None:
+            return
+        try:
+            await waiter.await_(timeout)
+        except asyncio.CancelledError:
+            # The caller went away: give back a slot handed over meanwhile
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    waiter.cancelled = True
+                    self._queued -= 1
+            if granted:
+                self.release()
+            raise
+        self._settle(waiter)
+
+    def _fill(self) -> List[_Waiter]:
+        """Hand free slots to queued requests, first in priority order. Caller holds the lock."""
+        granted = []
+        while self._queue and self._active < self.max_concurrent:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.cancelled:
+                continue
+            waiter.granted = True
+            self._queued -= 1
+            self._active += 1
+            granted.append(waiter)
+        return granted
+
+    def release(self, held_seconds: Optional[float] = None) -> None:
+        """Give a slot back, handing it to the first queued request."""
+        with self._lock:
+            if held_seconds is not None:
+                self.avg_service = 0.8 * self.avg_service + 0.2 * held_seconds
+            self._active -= 1
+            granted = self._fill()
+        for waiter in granted:
+            waiter.wake()
+
+    def configure(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Any = _DEFAULT
+    ) -> None:
+        """Change the limits; a higher concurrency admits queued requests at once."""
+        with self._lock:
+            if max_concurrent is not None:
+                self.max_concurrent = max_concurrent
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if queue_timeout is not _DEFAULT:
+                self.queue_timeout = queue_timeout
+            granted = self._fill()
+        for waiter in granted:
+            waiter.wake()
+
+    @contextmanager
+    def slot(self, priority: int = PRIORITY_INTERACTIVE, timeout: Any = _DEFAULT) -> Iterator[None]:
+        """Hold a slot for the duration of the block."""
+        self.acquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(self, priority: int = PRIORITY_INTERACTIVE, timeout: Any = _DEFAULT) -> AsyncIterator[None]:
+        """Hold a slot for the duration of the async block."""
+        await self.aacquire(priority, timeout)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - started)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and admission counters."""
+        with self._lock:
+            return {
+                "active": self._active,
+                "queued": self._queued,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "avg_wait_ms": 1000 * self.total_wait / self.admitted if self.admitted else 0.0,
+                "max_wait_ms": 1000 * self.max_wait,
+                "avg_service_ms": 1000 * self.avg_service,
+                "retry_after_seconds": self._retry_after(),
+            }
+
+
+_schedulers: Dict[str, AdmissionScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_admission_scheduler(
+    model: str,
+    max_concurrent: Optional[int] = None,
+    max_queue: Optional[int] = None,
+    queue_timeout: Any = _DEFAULT
+) -> AdmissionScheduler:
+    """Get the process-wide scheduler for a model, optionally updating its limits."""
+    with _schedulers_lock:
+        scheduler = _schedulers.get(model)
+        if scheduler is None:
+            scheduler = AdmissionScheduler(model)
+            _schedulers[model] = scheduler
+    scheduler.configure(max_concurrent, max_queue, queue_timeout)
+    return scheduler
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every scheduler, keyed by model."""
+    with _schedulers_lock:
+        schedulers = dict(_schedulers)
+    return {model: scheduler.stats() for model, scheduler in schedulers.items()}
@@ -0,0 +1,175 @@
+"""Process-wide cache of open vector collection handles."""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+
+class _Entry:
+    __slots__ = ("value", "size", "on_release")
+
+    def __init__(self, value: Any, size: int, on_release: Optional[Callable[[Any], None]]):
+        self.value = value
+        self.size = size
+        self.on_release = on_release
+
+
+class CollectionRegistry:
+    """Thread-safe LRU cache of open collection handles, bounded by memory.
+
+    Each entry is charged its estimated memory footprint; once the total
+    exceeds ``max_bytes`` the least recently used entries are released.
+    The entry just requested is never evicted, so a collection larger than
+    the whole budget is still served. Concurrent requests for the same
+    missing key open it once.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._opening: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _lookup(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def get(
+        self,
+        key: Hashable,
+        open_fn: Callable[[], Any],
+        size_of: Optional[Callable[[Any], int]] = None,
+        on_release: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """Return the handle for ``key``, opening it with ``open_fn`` on a miss.
+
+        Args:
+            key: Cache key
+            open_fn: Opens the handle
+            size_of: Estimates a handle's memory in bytes (default 0)
+            on_release: Called with the handle when it is evicted or invalidated
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry.value
+            opening = self._opening.setdefault(key, threading.Lock())
+
+        with opening:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry.value
+                self.misses += 1
+            try:
+                value = open_fn()
+                size = size_of(value) if size_of else 0
+                with self._lock:
+                    self._entries[key] = _Entry(value, size, on_release)
+                    self.bytes += size
+                    released = self._evict(keep=key)
+            finally:
+                with self._lock:
+                    self._opening.pop(key, None)
+        self._release(released)
+        return value
+
+    def update_size(self, key: Hashable, size_of: Callable[[Any], int]) -> None:
+        """Re-measure an entry after it has grown or shrunk."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = size_of(entry.value)
+        with self._lock:
+            if self._entries.get(key) is entry:
+                self.bytes += size - entry.size
+                entry.size = size
+                released = self._evict(keep=key)
+            else:
+                released = []
+        self._release(released)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop one entry, for example after its collection was deleted."""
+        self.invalidate_where(lambda k: k == key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches. Returns the number dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            released = [self._entries.pop(key) for key in keys]
+            for entry in released:
+                self.bytes -= entry.size
+            self.invalidations += len(released)
+        self._release(released)
+        return len(released)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self.invalidate_where(lambda key: True)
+
+    def _evict(self, keep: Hashable) -> list:
+        """Pop least recently used entries until within budget. Caller holds the lock."""
+        released = []
+        while self.bytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = next(iter(self._entries.items()))
+            if key == keep:
+                break
+            del self._entries[key]
+            self.bytes -= entry.size
+            self.evictions += 1
+            released.append(entry)
+            logger.info(f"Evicted collection handle {key} ({entry.size} bytes)")
+        return released
+
+    @staticmethod
+    def _release(entries: list) -> None:
+        for entry in entries:
+            if entry.on_release:
+                try:
+                    entry.on_release(entry.value)
+                except Exception as e:
+                    logger.warning(f"⚠️ Error releasing collection handle: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory use."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_registry = CollectionRegistry()
+
+
+def get_collection_registry(max_bytes: Optional[int] = None) -> CollectionRegistry:
+    """Get the process-wide registry, optionally setting its memory budget."""
+    if max_bytes is not None and max_bytes != _registry.max_bytes:
+        _registry.max_bytes = max_bytes
+    return _registry
+
+
+def collection_registry_stats() -> Dict[str, Any]:
+    """Counters for the process-wide registry."""
+    return _registry.stats()
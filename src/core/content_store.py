@@ -0,0 +1,197 @@
+"""Content-addressed storage for PDF files."""
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Read size used when hashing files from disk
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Every PDF starts with this header
+PDF_MAGIC = b"%PDF-"
+
+
+class ContentRejected(ValueError):
+    """Raised when incoming content fails validation while being written."""
+
+
+class ContentTooLarge(ContentRejected):
+    """Raised when incoming content exceeds the configured size limit."""
+
+
+class NotAPDF(ContentRejected):
+    """Raised when incoming content does not start with the PDF header."""
+
+
+def sha256_bytes(data: bytes) -> str:
+    """Return the hex SHA-256 digest of a byte string."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(file_path: Union[str, Path]) -> str:
+    """Return the hex SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def pdf_id_for_hash(content_hash: str) -> str:
+    """Stable PDF identifier derived from the content hash."""
+    return f"pdf_{content_hash[:16]}"
+
+
+def collection_name_for_hash(content_hash: str) -> str:
+    """Stable vector collection name derived from the content hash."""
+    return f"pdf_{content_hash[:32]}"
+
+
+class ContentStore:
+    """Stores PDF files on disk under the SHA-256 of their bytes.
+
+    Files live at ``<root>/<hash[:2]>/<hash>.pdf`` so identical uploads map
+    to the same path and are only written once.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, content_hash: str) -> Path:
+        """Get the storage path for a content hash."""
+        return self.root / content_hash[:2] / f"{content_hash}.pdf"
+
+    def exists(self, content_hash: str) -> bool:
+        """Check whether content with this hash is already stored."""
+        return self.path_for(content_hash).exists()
+
+    def put_bytes(self, data: bytes) -> Tuple[str, Path]:
+        """Store raw bytes, returning ``(content_hash, path)``."""
+        content_hash = sha256_bytes(data)
+        path = self.path_for(content_hash)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            logger.info(f"Stored {len(data)} bytes at {path}")
+        return content_hash, path
+
+    def put_file(
+        self,
+        source: Union[str, Path],
+        move: bool = False,
+        content_hash: Optional[str] = None
+    ) -> Tuple[str, Path]:
+        """Store an existing file, returning ``(content_hash, path)``.
+
+        Args:
+            source: File to store
+            move: Move the file into the store instead of copying it
+            content_hash: SHA-256 of the file, if already computed
+        """
+        content_hash = content_hash or sha256_file(source)
+        path = self.path_for(content_hash)
+        if path.exists():
+            if move:
+                os.remove(source)
+            return content_hash, path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if move:
+            shutil.move(str(source), path)
+        else:
+            shutil.copyfile(source, path)
+        logger.info(f"Stored {source} at {path}")
+        return content_hash, path
+
+    def open_writer(self, max_bytes: Optional[int] = None) -> "ContentWriter":
+        """Open a writer that streams content into the store."""
+        return ContentWriter(self, max_bytes=max_bytes)
+
+    def remove(self, content_hash: str) -> bool:
+        """Remove stored content. Returns True if a file was deleted."""
+        path = self.path_for(content_hash)
+        if not path.exists():
+            return False
+        os.remove(path)
+        return True
+
+
+class ContentWriter:
+    """Streams content into a ContentStore chunk by chunk.
+
+    The SHA-256, size limit and PDF header are checked as data arrives, so
+    oversized or non-PDF payloads are rejected after the first offending
+    chunk and only one chunk is ever held in memory. Data goes to a
+    temporary file that is moved to its content-addressed path on
+    ``commit()``.
+
+    Use as a context manager to discard the temporary file on error.
+    """
+
+    def __init__(self, store: ContentStore, max_bytes: Optional[int] = None):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._header = b""
+        fd, tmp_path = tempfile.mkstemp(dir=store.root, suffix=".upload")
+        self._tmp_path = Path(tmp_path)
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes) -> None:
+        """Append a chunk, validating size and header."""
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise ContentTooLarge(f"Upload exceeds the {self.max_bytes} byte limit")
+
+        if len(self._header) < len(PDF_MAGIC):
+            self._header += data[:len(PDF_MAGIC) - len(self._header)]
+            if not PDF_MAGIC.startswith(self._header[:len(PDF_MAGIC)]):
+                raise NotAPDF("Upload is not a PDF file")
+
+        self._digest.update(data)
+        self._file.write(data)
+
+    def commit(self) -> Tuple[str, Path]:
+        """Finish writing and move the content into the store.
+
+        Returns:
+            Tuple of (content_hash, path)
+        """
+        if len(self._header) < len(PDF_MAGIC):
+            self.abort()
+            raise NotAPDF("Upload is not a PDF file")
+
+        self._file.close()
+        content_hash = self._digest.hexdigest()
+        path = self.store.path_for(content_hash)
+        if path.exists():
+            os.remove(self._tmp_path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._tmp_path, path)
+            logger.info(f"Stored {self.size} bytes at {path}")
+        return content_hash, path
+
+    def abort(self) -> None:
+        """Discard everything written so far."""
+        if not self._file.closed:
+            self._file.close()
+        if self._tmp_path.exists():
+            os.remove(self._tmp_path)
+
+    def __enter__(self) -> "ContentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            self.abort()
@@ -0,0 +1,42 @@
+"""Choosing how many retrieved chunks fit in the prompt."""
+import math
+from typing import Callable, Iterable, List
+
+from langchain_core.documents import Document
+
+# Rough characters per token for English text with BPE-style tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count without loading the model's tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def select_within_budget(
+    docs: Iterable[Document],
+    token_budget: int,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> List[Document]:
+    """Take documents in order until the next one would exceed the budget.
+
+    The first document is always kept, even if it alone is over budget, so
+    a question never goes to the model with no context.
+
+    Args:
+        docs: Candidate chunks, best first
+        token_budget: Tokens available for context
+        count_tokens: Counts tokens in a chunk's text
+
+    Returns:
+        The leading documents that fit
+    """
+    selected = []
+    used = 0
+    for doc in docs:
+        tokens = count_tokens(doc.page_content)
+        if selected and used + tokens > token_budget:
+            break
+        selected.append(doc)
+        used += tokens
+    return selected
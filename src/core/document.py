@@ -1,33 +1,314 @@
 """Document processing functionality."""
 import logging
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain_community.document_loaders import UnstructuredPDFLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from .pdf_inspector import TIER_TEXT, inspect_pages, page_runs
+
 logger = logging.getLogger(__name__)
 
+# Shared process pools, keyed by worker count, so parser start-up cost is
+# paid once per process rather than once per upload
+_parse_pools: Dict[int, ProcessPoolExecutor] = {}
+_parse_pools_lock = threading.Lock()
+
+
+def get_parse_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Get the shared process pool used for page-parallel parsing."""
+    with _parse_pools_lock:
+        pool = _parse_pools.get(max_workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=max_workers)
+            _parse_pools[max_workers] = pool
+        return pool
+
+
+def shutdown_parse_pools() -> None:
+    """Shut down all shared parsing pools."""
+    with _parse_pools_lock:
+        for pool in _parse_pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _parse_pools.clear()
+
+
+def count_pdf_pages(file_path: Path) -> int:
+    """Count pages in a PDF without parsing its content."""
+    from pypdf import PdfReader
+
+    return len(PdfReader(str(file_path)).pages)
+
+
+def page_ranges(page_count: int, pages_per_task: int) -> List[Tuple[int, int]]:
+    """Split ``page_count`` pages into 1-based inclusive ``(first, last)`` ranges."""
+    return [
+        (first, min(first + pages_per_task - 1, page_count))
+        for first in range(1, page_count + 1, pages_per_task)
+    ]
+
+
+def _write_page_range(file_path: str, first_page: int, last_page: int, out_dir: str) -> str:
+    """Write pages ``first_page..last_page`` of a PDF to a new file."""
+    from pypdf import PdfReader, PdfWriter
+
+    reader = PdfReader(file_path)
+    writer = PdfWriter()
+    for index in range(first_page - 1, last_page):
+        writer.add_page(reader.pages[index])
+    out_path = os.path.join(out_dir, f"pages_{first_page}_{last_page}.pdf")
+    with open(out_path, "wb") as f:
+        writer.write(f)
+    return out_path
+
+
+def _partition_page_range(
+    file_path: str,
+    first_page: int,
+    last_page: int,
+    unstructured_kwargs: Dict[str, Any]
+) -> List[Document]:
+    """Parse a page range into one Document per page.
+
+    Runs inside a worker process, so it must stay a module-level function.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        part_path = _write_page_range(file_path, first_page, last_page, tmp_dir)
+        loader = UnstructuredPDFLoader(
+            part_path,
+            mode="elements",
+            starting_page_number=first_page,
+            **unstructured_kwargs
+        )
+        elements = loader.load()
+
+    texts: Dict[int, List[str]] = {}
+    for element in elements:
+        page_number = element.metadata.get("page_number", first_page)
+        texts.setdefault(page_number, []).append(element.page_content)
+
+    return [
+        Document(
+            page_content="\n\n".join(texts[page_number]),
+            metadata={"source": file_path, "page_number": page_number}
+        )
+        for page_number in sorted(texts)
+    ]
+
+
+def _extract_range_tiered(
+    file_path: str,
+    first_page: int,
+    last_page: int,
+    max_pages: int,
+    unstructured_kwargs: Dict[str, Any]
+) -> Tuple[List[Document], int]:
+    """Inspect a page range, extracting text-layer pages directly.
+
+    Remaining pages are parsed with unstructured in contiguous runs. Runs
+    inside a worker process, so it must stay a module-level function.
+
+    Returns:
+        The range's documents in page order, and how many pages needed
+        unstructured
+    """
+    profiles = inspect_pages(file_path, first_page, last_page)
+    documents = {
+        profile.page_number: Document(
+            page_content=profile.text,
+            metadata={
+                "source": file_path,
+                "page_number": profile.page_number,
+                "extraction_tier": TIER_TEXT
+            }
+        )
+        for profile in profiles
+        if profile.tier == TIER_TEXT and profile.text
+    }
+    tiers = {profile.page_number: profile.tier for profile in profiles}
+    heavy_pages = [profile.page_number for profile in profiles if profile.tier != TIER_TEXT]
+
+    for pages in page_runs(heavy_pages, max_pages):
+        for doc in _partition_page_range(file_path, pages[0], pages[-1], unstructured_kwargs):
+            doc.metadata["extraction_tier"] = tiers.get(doc.metadata["page_number"])
+            documents[doc.metadata["page_number"]] = doc
+
+    return [documents[page_number] for page_number in sorted(documents)], len(heavy_pages)
+
+
 class DocumentProcessor:
-    """Handles PDF document loading and processing."""
-    
-    def __init__(self, chunk_size: int = 7500, chunk_overlap: int = 100):
+    """Handles PDF document loading and processing.
+
+    With ``parse_workers`` other than 1, PDFs longer than ``pages_per_task``
+    are split into page ranges that are parsed in parallel and merged back
+    into one Document per page, in page order. ``parse_workers=0`` uses one
+    worker per CPU core.
+
+    With ``tiered=True`` every page is first inspected with pdfplumber.
+    Pages with a usable text layer are extracted directly, and only scanned
+    or complex-layout pages go through UnstructuredPDFLoader. The tier used
+    is recorded in each page's ``extraction_tier`` metadata.
+
+    ``iter_pages`` and ``iter_chunks`` are the streaming counterparts of
+    ``load_pdf`` and ``split_documents`` for bounded ingestion pipelines.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 7500,
+        chunk_overlap: int = 100,
+        parse_workers: int = 1,
+        pages_per_task: int = 8,
+        executor: Optional[Executor] = None,
+        tiered: bool = False,
+        **unstructured_kwargs: Any
+    ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.executor = executor
+        self.tiered = tiered
+        self.unstructured_kwargs = unstructured_kwargs
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
             chunk_overlap=chunk_overlap
         )
-    
-    def load_pdf(self, file_path: Path) -> List:
-        """Load PDF document."""
+
+    def load_pdf(
+        self,
+        file_path: Path,
+        on_pages_parsed: Optional[Callable[[int], None]] = None
+    ) -> List:
+        """Load PDF document.
+
+        Args:
+            file_path: PDF to load
+            on_pages_parsed: Called with the number of pages parsed so far as
+                page ranges complete (parallel and tiered modes)
+        """
         try:
             logger.info(f"Loading PDF from {file_path}")
-            loader = UnstructuredPDFLoader(str(file_path))
-            return loader.load()
+            return list(self.iter_pages(file_path, on_pages_parsed))
         except Exception as e:
             logger.error(f"Error loading PDF: {e}")
             raise
-    
+
+    def iter_pages(
+        self,
+        file_path: Path,
+        on_pages_parsed: Optional[Callable[[int], None]] = None
+    ) -> Iterator[Document]:
+        """Yield parsed documents in page order as they become available.
+
+        In parallel and tiered modes at most ``2 * parse_workers`` page
+        ranges are in flight or buffered at a time, so a consumer that stops
+        reading also stops parsing.
+
+        Args:
+            file_path: PDF to load
+            on_pages_parsed: Called with the number of pages parsed so far as
+                page ranges complete (parallel and tiered modes)
+        """
+        if self.tiered:
+            yield from self._iter_pages_tiered(file_path, on_pages_parsed)
+            return
+        if self.parse_workers > 1 or self.executor is not None:
+            page_count = count_pdf_pages(file_path)
+            if page_count > self.pages_per_task:
+                yield from self._iter_pages_parallel(file_path, page_count, on_pages_parsed)
+                return
+        loader = UnstructuredPDFLoader(str(file_path), **self.unstructured_kwargs)
+        yield from loader.load()
+
+    def _run_ranges(self, fn: Callable, ranges: List[Tuple[int, int]], *args: Any) -> Iterator:
+        """Run ``fn(file_path, first, last, ...)`` per range, yielding results in order.
+
+        Keeps a bounded window of ranges submitted ahead of the consumer.
+        """
+        executor = self.executor
+        if executor is None and self.parse_workers > 1 and len(ranges) > 1:
+            executor = get_parse_pool(self.parse_workers)
+        if executor is None:
+            for first_page, last_page in ranges:
+                yield fn(first_page, last_page, *args)
+            return
+
+        window = max(2, 2 * self.parse_workers)
+        pending = deque()
+        try:
+            for first_page, last_page in ranges:
+                pending.append(executor.submit(fn, first_page, last_page, *args))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _iter_pages_parallel(
+        self,
+        file_path: Path,
+        page_count: int,
+        on_pages_parsed: Optional[Callable[[int], None]] = None
+    ) -> Iterator[Document]:
+        """Parse page ranges concurrently and yield them in page order."""
+        ranges = page_ranges(page_count, self.pages_per_task)
+        logger.info(
+            f"Parsing {page_count} pages in {len(ranges)} ranges "
+            f"across {self.parse_workers} workers"
+        )
+        results = self._run_ranges(
+            partial(_partition_page_range, str(file_path)),
+            ranges,
+            self.unstructured_kwargs
+        )
+        for (_, last_page), documents in zip(ranges, results):
+            yield from documents
+            if on_pages_parsed:
+                on_pages_parsed(last_page)
+
+    def _iter_pages_tiered(
+        self,
+        file_path: Path,
+        on_pages_parsed: Optional[Callable[[int], None]] = None
+    ) -> Iterator[Document]:
+        """Extract text-layer pages directly and parse the rest with unstructured."""
+        page_count = count_pdf_pages(file_path)
+        ranges = page_ranges(page_count, self.pages_per_task)
+        results = self._run_ranges(
+            partial(_extract_range_tiered, str(file_path)),
+            ranges,
+            self.pages_per_task,
+            self.unstructured_kwargs
+        )
+        heavy_total = 0
+        for (_, last_page), (documents, heavy_pages) in zip(ranges, results):
+            heavy_total += heavy_pages
+            yield from documents
+            if on_pages_parsed:
+                on_pages_parsed(last_page)
+        logger.info(
+            f"Tiered extraction: {page_count - heavy_total} text-layer page(s), "
+            f"{heavy_total} page(s) for unstructured"
+        )
+
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Split documents one at a time, yielding chunks as they are produced.
+
+        Produces the same chunks as ``split_documents`` on the full list.
+        """
+        for document in documents:
+            yield from self.splitter.split_documents([document])
+
     def split_documents(self, documents: List) -> List:
         """Split documents into chunks."""
         try:
@@ -35,4 +316,4 @@ class DocumentProcessor:
             return self.splitter.split_documents(documents)
         except Exception as e:
             logger.error(f"Error splitting documents: {e}")
-            raise 
\ No newline at end of file
+            raise
@@ -0,0 +1,243 @@
+"""Cross-request micro-batching for embedding calls."""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import OllamaEmbeddings
+
+from .admission import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, AdmissionScheduler
+from .ollama_pool import OllamaPool, PooledEmbeddings
+
+logger = logging.getLogger(__name__)
+
+
+class _Request:
+    """One caller's texts and the future its vectors are delivered to."""
+
+    def __init__(self, texts: List[str], priority: int):
+        self.texts = texts
+        self.priority = priority
+        self.vectors: List[Optional[List[float]]] = [None] * len(texts)
+        self.remaining = len(texts)
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class BatchingEmbeddings(Embeddings):
+    """Merges concurrent embedding calls into batched requests.
+
+    Texts from all callers (ingestion jobs, query embeddings) are queued and
+    sent to the wrapped embeddings in batches of up to ``max_batch_size``. A
+    batch is dispatched as soon as it is full, or ``max_wait_ms`` after its
+    oldest text arrived. At most ``max_in_flight`` batches are outstanding
+    toward the embedding host at once. Callers block until their own vectors
+    are ready (async callers await them without holding a thread); large
+    calls are split across batches transparently.
+
+    With an ``admission`` scheduler, each batch also waits for a slot on the
+    model. Async callers are request handlers and blocking ones ingestion,
+    so a batch holding any async caller's texts is queued as interactive.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10.0,
+        max_in_flight: int = 2,
+        admission: Optional[AdmissionScheduler] = None
+    ):
+        self.embeddings = embeddings
+        self.admission = admission
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_in_flight = max_in_flight
+
+        # Pending slices of requests: (request, start, end)
+        self._queue: Deque[Tuple[_Request, int, int]] = deque()
+        self._queued_texts = 0
+        self._cond = threading.Condition()
+        self._in_flight = threading.Semaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="embed-batch")
+        self._closed = False
+
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.total_wait = 0.0
+
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="embed-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts as part of whatever batch they land in."""
+        if not texts:
+            return []
+        return self._submit(texts, PRIORITY_BACKGROUND).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query text, batched with other pending work; a user is waiting on it."""
+        return self._submit([text], PRIORITY_INTERACTIVE).result()[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts as part of whatever batch they land in, without blocking the event loop."""
+        if not texts:
+            return []
+        return await asyncio.wrap_future(self._submit(texts, PRIORITY_INTERACTIVE))
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query text, batched with other pending work, without blocking the event loop."""
+        return (await asyncio.wrap_future(self._submit([text], PRIORITY_INTERACTIVE)))[0]
+
+    def _submit(self, texts: List[str], priority: int) -> Future:
+        request = _Request(texts, priority)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Embedding dispatcher is closed")
+            for start in range(0, len(texts), self.max_batch_size):
+                self._queue.append((request, start, min(start + self.max_batch_size, len(texts))))
+            self._queued_texts += len(texts)
+            self.requests += 1
+            self.texts += len(texts)
+            self._cond.notify()
+        return request.future
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+                # Hold the batch open until it fills or its oldest text times out
+                deadline = self._queue[0][0].enqueued_at + self.max_wait
+                while self._queued_texts < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+
+            self._in_flight.acquire()
+            self._executor.submit(self._run_batch, batch)
+
+    def _take_batch(self) -> List[Tuple[_Request, int, int]]:
+        """Pop up to ``max_batch_size`` texts' worth of slices. Caller holds the lock."""
+        batch = []
+        size = 0
+        while self._queue and size < self.max_batch_size:
+            request, start, end = self._queue.popleft()
+            take = min(end - start, self.max_batch_size - size)
+            if take < end - start:
+                self._queue.appendleft((request, start + take, end))
+            batch.append((request, start, start + take))
+            size += take
+        self._queued_texts -= size
+        return batch
+
+    def _run_batch(self, batch: List[Tuple[_Request, int, int]]) -> None:
+        try:
+            texts = [text for request, start, end in batch for text in request.texts[start:end]]
+            now = time.monotonic()
+            priority = min(request.priority for request, _, _ in batch)
+            try:
+                # Batches only wait for a slot, never time out: ingestion has no client to answer
+                with self.admission.slot(priority, timeout=None) if self.admission else nullcontext():
+                    vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                for request, _, _ in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                return
+
+            with self._cond:
+                self.batches += 1
+                offset = 0
+                for request, start, end in batch:
+                    request.vectors[start:end] = vectors[offset:offset + end - start]
+                    offset += end - start
+                    request.remaining -= end - start
+                    if request.remaining == 0 and not request.future.done():
+                        self.total_wait += now - request.enqueued_at
+                        request.future.set_result(request.vectors)
+        finally:
+            self._in_flight.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching counters."""
+        with self._cond:
+            return {
+                "requests": self.requests,
+                "texts": self.texts,
+                "batches": self.batches,
+                "avg_batch_size": self.texts / self.batches if self.batches else 0.0,
+                "avg_queue_wait_ms": 1000 * self.total_wait / self.requests if self.requests else 0.0,
+                "queued_texts": self._queued_texts,
+            }
+
+    def close(self) -> None:
+        """Flush pending work and stop the dispatcher."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+
+
+_dispatchers: Dict[Tuple[str, Optional[str]], BatchingEmbeddings] = {}
+_dispatchers_lock = threading.Lock()
+
+
+def get_embedding_dispatcher(
+    model: str,
+    base_url: Optional[str] = None,
+    max_batch_size: int = 64,
+    max_wait_ms: float = 10.0,
+    max_in_flight: int = 2,
+    admission: Optional[AdmissionScheduler] = None,
+    keep_alive: Optional[int] = None,
+    pool: Optional[OllamaPool] = None
+) -> BatchingEmbeddings:
+    """Get the process-wide dispatcher for an Ollama embedding model.
+
+    All callers share one dispatcher per ``(model, base_url)`` so their
+    texts can be batched together; the batching parameters of the first
+    call are used. With a ``pool``, batches are spread over its hosts
+    instead of going to ``base_url``. A ``pool``, ``admission`` scheduler or
+    ``keep_alive``, if given, replaces the dispatcher's current one.
+    """
+    key = (model, base_url)
+    with _dispatchers_lock:
+        dispatcher = _dispatchers.get(key)
+        if dispatcher is None:
+            kwargs = {"base_url": base_url} if base_url else {}
+            dispatcher = BatchingEmbeddings(
+                PooledEmbeddings(pool, model) if pool else OllamaEmbeddings(model=model, **kwargs),
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_in_flight=max_in_flight
+            )
+            _dispatchers[key] = dispatcher
+        elif pool is not None and getattr(dispatcher.embeddings, "pool", None) is not pool:
+            dispatcher.embeddings = PooledEmbeddings(pool, model, dispatcher.embeddings.keep_alive)
+        if admission is not None:
+            dispatcher.admission = admission
+        if keep_alive is not None:
+            dispatcher.embeddings.keep_alive = keep_alive
+        return dispatcher
+
+
+def embedding_dispatcher_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for every shared dispatcher, keyed by model."""
+    with _dispatchers_lock:
+        dispatchers = dict(_dispatchers)
+    return {
+        model if not base_url else f"{model}@{base_url}": dispatcher.stats()
+        for (model, base_url), dispatcher in dispatchers.items()
+    }
@@ -0,0 +1,366 @@
+"""Embedding caches: persistent on disk, plus an in-memory LRU tier."""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    """SHA-256 of a text, used as its cache key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Disk-backed store of embedding vectors keyed by ``(model, sha256(text))``.
+
+    Vectors are stored as raw float32 blobs in SQLite. When the stored
+    vectors grow past ``max_bytes``, the least recently used entries are
+    evicted down to 90% of the budget. Safe to share between threads.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: Optional[int] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Look up vectors, returning only the hashes that were found."""
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _SQL_BATCH):
+                batch = unique[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, key) for key in found]
+                )
+                self._conn.commit()
+            self.hits += sum(1 for key in hashes if key in found)
+            self.misses += sum(1 for key in hashes if key not in found)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """Store vectors, then evict if over budget."""
+        if not vectors:
+            return
+        now = time.time()
+        rows = [
+            (model, key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._total_bytes += sum(len(row[2]) for row in rows)
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict(int(self.max_bytes * 0.9))
+
+    def _evict(self, target_bytes: int) -> None:
+        """Drop least recently used entries until at most ``target_bytes`` remain."""
+        # Recount first: INSERT OR REPLACE may have overwritten existing rows
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+        while self._total_bytes > target_bytes:
+            rows = self._conn.execute(
+                "SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_access LIMIT ?",
+                (_SQL_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for rowid, size in rows:
+                if self._total_bytes <= target_bytes:
+                    break
+                victims.append((rowid,))
+                self._total_bytes -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+            self.evictions += len(victims)
+        self._conn.commit()
+        logger.info(f"Embedding cache evicted down to {self._total_bytes} bytes")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and size of the cache."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class MemoryEmbeddingCache:
+    """In-memory LRU of embedding vectors keyed by ``(model, sha256(text))``.
+
+    Same interface as ``EmbeddingCache``, for hot texts such as recent
+    questions that should not pay for a SQLite lookup. Holds at most
+    ``max_entries`` vectors.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[tuple, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Look up vectors, returning only the hashes that were found."""
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in hashes:
+                vector = self._entries.get((model, key))
+                if vector is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end((model, key))
+                found[key] = vector
+                self.hits += 1
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        """Store vectors, evicting the least recently used beyond ``max_entries``."""
+        with self._lock:
+            for key, vector in vectors.items():
+                self._entries[(model, key)] = vector
+                self._entries.move_to_end((model, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and size of the cache."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends cache misses to the wrapped model.
+
+    Lookups try the in-memory ``memory`` tier first, then the on-disk
+    ``cache``; either may be omitted. Disk hits and new vectors are added
+    to the memory tier. Duplicate texts within one call are embedded once.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model: str,
+        cache: Optional[EmbeddingCache] = None,
+        memory: Optional[MemoryEmbeddingCache] = None
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.cache = cache
+        self.memory = memory
+
+    def _lookup(self, hashes: List[str]) -> Dict[str, List[float]]:
+        vectors: Dict[str, List[float]] = {}
+        if self.memory is not None:
+            vectors = self.memory.get_many(self.model, hashes)
+        if self.cache is not None:
+            remaining = [key for key in hashes if key not in vectors]
+            if remaining:
+                from_disk = self.cache.get_many(self.model, remaining)
+                if from_disk and self.memory is not None:
+                    self.memory.put_many(self.model, from_disk)
+                vectors.update(from_disk)
+        return vectors
+
+    def _store(self, vectors: Dict[str, List[float]]) -> None:
+        if self.memory is not None:
+            self.memory.put_many(self.model, vectors)
+        if self.cache is not None:
+            self.cache.put_many(self.model, vectors)
+
+    @staticmethod
+    def _missing(hashes: List[str], texts: List[str], vectors: Dict[str, List[float]]) -> Dict[str, str]:
+        """Texts not found in the cache, each once."""
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        return missing
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, serving repeats from the cache."""
+        hashes = [text_hash(text) for text in texts]
+        vectors = self._lookup(hashes)
+
+        missing = self._missing(hashes, texts, vectors)
+        if missing:
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self._store(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in hashes]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, serving repeats from the cache and awaiting the rest."""
+        hashes = [text_hash(text) for text in texts]
+        vectors = self._lookup(hashes)
+
+        missing = self._missing(hashes, texts, vectors)
+        if missing:
+            computed = await self.embeddings.aembed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self._store(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, serving repeats from the cache."""
+        key = text_hash(text)
+        cached = self._lookup([key])
+        if key in cached:
+            return cached[key]
+        vector = self.embeddings.embed_query(text)
+        self._store({key: vector})
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query, serving repeats from the cache and awaiting misses."""
+        key = text_hash(text)
+        cached = self._lookup([key])
+        if key in cached:
+            return cached[key]
+        vector = await self.embeddings.aembed_query(text)
+        self._store({key: vector})
+        return vector
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(path: Union[str, Path], max_bytes: Optional[int] = None) -> EmbeddingCache:
+    """Get the process-wide cache for a database path."""
+    key = str(Path(path).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = EmbeddingCache(path, max_bytes=max_bytes)
+            _caches[key] = cache
+        return cache
+
+
+def embedding_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Stats for every open cache, keyed by database path."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {path: cache.stats() for path, cache in caches.items()}
+
+
+_memory_caches: Dict[str, MemoryEmbeddingCache] = {}
+
+
+def get_memory_embedding_cache(name: str, max_entries: int = 1024) -> MemoryEmbeddingCache:
+    """Get the process-wide in-memory cache with this name."""
+    with _caches_lock:
+        cache = _memory_caches.get(name)
+        if cache is None:
+            cache = MemoryEmbeddingCache(max_entries=max_entries)
+            _memory_caches[name] = cache
+        cache.max_entries = max_entries
+        return cache
+
+
+_cached_embeddings: Dict[Tuple[int, str, int, int], CachedEmbeddings] = {}
+
+
+def get_cached_embeddings(
+    embeddings: Embeddings,
+    model: str,
+    cache: Optional[EmbeddingCache] = None,
+    memory: Optional[MemoryEmbeddingCache] = None
+) -> CachedEmbeddings:
+    """Get the process-wide ``CachedEmbeddings`` over these embeddings and cache tiers.
+
+    Vector stores built with the same configuration then share one
+    embeddings object, so collection handles keyed on it are reused.
+    """
+    # The entry holds every object whose id is in its key, so ids are not reused
+    key = (id(embeddings), model, id(cache), id(memory))
+    with _caches_lock:
+        cached = _cached_embeddings.get(key)
+        if cached is None:
+            cached = CachedEmbeddings(embeddings, model=model, cache=cache, memory=memory)
+            _cached_embeddings[key] = cached
+        return cached
+
+
+def memory_embedding_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Stats for every in-memory cache, keyed by name."""
+    with _caches_lock:
+        caches = dict(_memory_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
@@ -1,35 +1,144 @@
 """Vector embeddings and database functionality."""
 import logging
-from typing import List
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore as LangChainVectorStore
 from langchain_ollama import OllamaEmbeddings
-from langchain_community.vectorstores import Chroma
+
+from .admission import AdmissionScheduler
+from .collection_registry import get_collection_registry
+from .embedding_batcher import get_embedding_dispatcher
+from .embedding_cache import get_cached_embeddings, get_embedding_cache, get_memory_embedding_cache
+from .ollama_pool import OllamaPool, PooledEmbeddings
+from .pipeline import batched, bounded
+from .vector_backends import VectorBackend, get_backend
 
 logger = logging.getLogger(__name__)
 
+_ollama_embeddings: Dict[str, OllamaEmbeddings] = {}
+_pooled_embeddings: Dict[str, PooledEmbeddings] = {}
+_ollama_embeddings_lock = threading.Lock()
+
+
+def get_ollama_embeddings(
+    model: str,
+    keep_alive: Optional[int] = None,
+    pool: Optional[OllamaPool] = None
+) -> Embeddings:
+    """Process-wide OllamaEmbeddings client for a model, or one spread over ``pool``'s hosts."""
+    if pool is not None:
+        with _ollama_embeddings_lock:
+            pooled = _pooled_embeddings.get(model)
+            if pooled is None or pooled.pool is not pool:
+                pooled = _pooled_embeddings[model] = PooledEmbeddings(pool, model)
+            if keep_alive is not None:
+                pooled.keep_alive = keep_alive
+            return pooled
+    with _ollama_embeddings_lock:
+        embeddings = _ollama_embeddings.get(model)
+        if embeddings is None:
+            embeddings = OllamaEmbeddings(model=model)
+            _ollama_embeddings[model] = embeddings
+        if keep_alive is not None:
+            embeddings.keep_alive = keep_alive
+        return embeddings
+
+
 class VectorStore:
-    """Manages vector embeddings and database operations."""
+    """Manages vector embeddings and database operations.
+
+    With ``batching=True`` embedding calls go through the process-wide
+    dispatcher for ``embedding_model``, so concurrent ingestion jobs and
+    queries share batched requests to Ollama; with an ``admission``
+    scheduler each batch also waits for a slot on the model. ``keep_alive``
+    is sent with every embedding request (-1 keeps the model loaded). With
+    a ``pool``, embedding requests are spread over its Ollama hosts.
 
-    def __init__(self, embedding_model: str = "nomic-embed-text", persist_directory: str = "data/vectors"):
-        self.embeddings = OllamaEmbeddings(model=embedding_model)
+    Collections are kept by a pluggable ``backend``: ``"chroma"`` (the
+    default) or ``"flat"``, a memory-mapped exhaustive index for small and
+    medium corpora. Both support the same operations and ``pdf_id`` filters.
+    Open collections are cached process-wide, within
+    ``collection_cache_max_bytes`` of estimated index memory.
+    The flat backend can also keep int8 or binary ``quantization`` codes in
+    memory and rescore the best ``k * rescore_factor`` candidates with the
+    float32 vectors on disk.
+    ``memory_cache_entries`` keeps recently embedded texts (for example
+    questions) in a process-wide in-memory LRU in front of ``cache_path``.
+    """
+
+    def __init__(
+        self,
+        embedding_model: str = "nomic-embed-text",
+        persist_directory: str = "data/vectors",
+        cache_path: Optional[str] = None,
+        cache_max_bytes: Optional[int] = None,
+        memory_cache_entries: int = 0,
+        batching: bool = False,
+        max_batch_size: int = 64,
+        max_wait_ms: float = 10.0,
+        max_in_flight: int = 2,
+        backend: str = "chroma",
+        quantization: str = "none",
+        rescore_factor: Optional[int] = None,
+        collection_cache_max_bytes: Optional[int] = None,
+        admission: Optional[AdmissionScheduler] = None,
+        keep_alive: Optional[int] = None,
+        pool: Optional[OllamaPool] = None
+    ):
+        if batching:
+            self.embeddings = get_embedding_dispatcher(
+                embedding_model,
+                max_batch_size=max_batch_size,
+                max_wait_ms=max_wait_ms,
+                max_in_flight=max_in_flight,
+                admission=admission,
+                keep_alive=keep_alive,
+                pool=pool
+            )
+        else:
+            self.embeddings = get_ollama_embeddings(embedding_model, keep_alive, pool)
+        if cache_path or memory_cache_entries:
+            # Serve previously embedded texts from memory, then disk
+            self.embeddings = get_cached_embeddings(
+                self.embeddings,
+                model=embedding_model,
+                cache=get_embedding_cache(cache_path, max_bytes=cache_max_bytes) if cache_path else None,
+                memory=get_memory_embedding_cache(embedding_model, memory_cache_entries)
+                if memory_cache_entries else None
+            )
         self.persist_directory = persist_directory
+        self.backend: VectorBackend = get_backend(
+            backend,
+            persist_directory,
+            quantization=quantization,
+            rescore_factor=rescore_factor,
+            registry=get_collection_registry(collection_cache_max_bytes)
+        )
         self.vector_db = None
         # Ensure persist directory exists
         Path(persist_directory).mkdir(parents=True, exist_ok=True)
 
-    def create_vector_db(self, documents: List, collection_name: str = "local-rag") -> Chroma:
-        """Create vector database from documents with persistence."""
+    def create_vector_db(
+        self,
+        documents: List,
+        collection_name: str = "local-rag",
+        ids: Optional[List[str]] = None
+    ) -> LangChainVectorStore:
+        """Create vector database from documents with persistence.
+
+        Passing stable ``ids`` makes re-running ingestion for the same
+        content an upsert rather than a duplicate insert.
+        """
         try:
             logger.info(f"Creating vector database with collection: {collection_name}")
             logger.info(f"Persisting to: {self.persist_directory}")
             logger.info(f"Number of documents: {len(documents)}")
 
-            self.vector_db = Chroma.from_documents(
-                documents=documents,
-                embedding=self.embeddings,
-                collection_name=collection_name,
-                persist_directory=self.persist_directory
-            )
+            self.vector_db = self.open_collection(collection_name)
+            self.vector_db.add_documents(documents, ids=ids)
 
             logger.info(f"✅ Vector database created successfully with {len(documents)} documents")
             return self.vector_db
@@ -37,6 +146,120 @@ class VectorStore:
             logger.error(f"❌ Error creating vector database: {e}")
             raise
     
+    def open_collection(self, collection_name: str) -> LangChainVectorStore:
+        """Open a persisted collection, creating it if it does not exist."""
+        return self.backend.open(collection_name, self.embeddings)
+
+    def add_documents(
+        self,
+        documents: List,
+        collection_name: str,
+        ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """Embed documents and upsert them into an existing collection.
+
+        Used for incremental, batched writes; re-adding the same ``ids``
+        overwrites rather than duplicates.
+        """
+        try:
+            vector_db = self.open_collection(collection_name)
+            return vector_db.add_documents(documents, ids=ids)
+        except Exception as e:
+            logger.error(f"❌ Error adding documents to {collection_name}: {e}")
+            raise
+
+    def stream_documents(
+        self,
+        documents: Iterable[Document],
+        collection_name: str,
+        id_for: Callable[[Document], str],
+        batch_size: int = 64,
+        max_pending_batches: int = 2
+    ) -> Iterator[List[Document]]:
+        """Embed and upsert a stream of documents batch by batch.
+
+        Embedding runs in a background stage that keeps at most
+        ``max_pending_batches`` embedded batches waiting for the upsert, so
+        the next batch is embedded while the previous one is written. Each
+        batch is yielded once it is in the collection, which lets callers
+        record progress; documents are queryable as soon as their batch is.
+
+        Args:
+            documents: Documents to add, consumed lazily
+            collection_name: Target collection, created if missing
+            id_for: Stable id for a document, making re-runs upserts
+            batch_size: Documents per embedding request and upsert
+            max_pending_batches: Embedded batches buffered ahead of upserts
+
+        Yields:
+            Each batch of documents after it has been upserted
+        """
+        def embed(batches: Iterable[List[Document]]):
+            for batch in batches:
+                vectors = self.embeddings.embed_documents([doc.page_content for doc in batch])
+                yield batch, vectors
+
+        embedded = bounded(embed(batched(documents, batch_size)), max_pending_batches, name="embed")
+        try:
+            for batch, vectors in embedded:
+                self.backend.upsert(collection_name, [id_for(doc) for doc in batch], batch, vectors)
+                yield batch
+        except Exception as e:
+            logger.error(f"❌ Error streaming documents into {collection_name}: {e}")
+            raise
+        finally:
+            embedded.close()
+
+    def upsert_vectors(
+        self,
+        documents: List[Document],
+        vectors: List[List[float]],
+        collection_name: str,
+        ids: List[str]
+    ) -> None:
+        """Upsert documents whose embeddings were computed elsewhere.
+
+        Lets worker processes embed while a single process owns writes to
+        the persisted collection.
+        """
+        try:
+            self.backend.upsert(collection_name, ids, documents, vectors)
+        except Exception as e:
+            logger.error(f"❌ Error upserting vectors into {collection_name}: {e}")
+            raise
+
+    def delete_where(self, collection_name: str, where: dict) -> None:
+        """Delete the documents matching a metadata filter from a collection."""
+        try:
+            self.backend.delete_where(collection_name, where)
+        except Exception as e:
+            logger.error(f"❌ Error deleting from {collection_name}: {e}")
+            raise
+
+    def iter_collection(
+        self,
+        collection_name: str,
+        batch_size: int = 256
+    ) -> Iterator[Tuple[List[str], List[Document], List[List[float]]]]:
+        """Read a collection back in batches of ``(ids, documents, vectors)``.
+
+        Vectors are returned as stored, so documents can be copied into
+        another collection without being embedded again.
+        """
+        return self.backend.iter_collection(collection_name, batch_size)
+
+    def drop_collection(self, collection_name: str) -> None:
+        """Delete a collection by name."""
+        try:
+            self.backend.drop(collection_name)
+        except Exception as e:
+            logger.error(f"❌ Error deleting collection {collection_name}: {e}")
+            raise
+
+    def count(self, collection_name: str) -> int:
+        """Number of documents in a collection."""
+        return self.backend.count(collection_name)
+
     def delete_collection(self) -> None:
         """Delete vector database collection."""
         if self.vector_db:
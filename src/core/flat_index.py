@@ -0,0 +1,684 @@
+"""Brute-force vector index on a memory-mapped float32 matrix."""
+import json
+import logging
+import os
+import shutil
+import threading
+import weakref
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore as LangChainVectorStore
+
+logger = logging.getLogger(__name__)
+
+# Compact once tombstoned rows outnumber live ones (and there are enough
+# of them for the rewrite to be worth it)
+COMPACT_MIN_DEAD_ROWS = 1000
+
+# First-pass vector codes: "none" scores the float32 matrix directly
+QUANTIZATIONS = ("none", "int8", "binary")
+# Candidates rescored with float32 vectors, as a multiple of k
+DEFAULT_RESCORE_FACTOR = {"int8": 4, "binary": 10}
+# Rows per block when scanning quantized codes (small enough to stay in cache)
+SCAN_BLOCK_ROWS = 2048
+
+# Sign (+1/-1) of each of the 8 dimensions packed into a byte value, most
+# significant bit first as np.packbits writes them
+_BYTE_SIGNS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).astype(np.float32) * 2 - 1
+
+
+def pdf_ids_from_filter(filter: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """Translate a Chroma-style ``pdf_id`` filter into a list of PDF ids.
+
+    Supports ``{"pdf_id": id}``, ``{"pdf_id": {"$eq": id}}`` and
+    ``{"pdf_id": {"$in": [ids]}}``.
+    """
+    if not filter:
+        return None
+    if set(filter) != {"pdf_id"}:
+        raise ValueError(f"Flat index only supports pdf_id filters, got {filter}")
+    condition = filter["pdf_id"]
+    if isinstance(condition, str):
+        return [condition]
+    if isinstance(condition, dict) and set(condition) == {"$eq"}:
+        return [condition["$eq"]]
+    if isinstance(condition, dict) and set(condition) == {"$in"}:
+        return list(condition["$in"])
+    raise ValueError(f"Unsupported pdf_id filter: {condition}")
+
+
+class _RowBuffer:
+    """Append-only in-memory array of fixed-size records, grown by doubling."""
+
+    def __init__(self, dtype: np.dtype):
+        self._data = np.empty(0, dtype=dtype)
+        self.size = 0
+
+    def reserve(self, capacity: int) -> None:
+        if capacity > len(self._data):
+            grown = np.empty(capacity, dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+
+    def append(self, records: np.ndarray) -> None:
+        needed = self.size + len(records)
+        if needed > len(self._data):
+            self.reserve(max(needed, 2 * len(self._data)))
+        self._data[self.size:needed] = records
+        self.size = needed
+
+    def view(self) -> np.ndarray:
+        return self._data[:self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return self._data.nbytes
+
+
+class FlatIndex:
+    """Persistent flat (exhaustive) vector index for one collection.
+
+    Vectors are L2-normalized and appended to ``vectors.f32``, which is
+    searched through a read-only memory map with one matrix-vector product,
+    so scores are cosine similarities. Each row has a short line in the
+    append-only ``rows.jsonl`` log (its id, ``pdf_id`` and the offset of its
+    text and metadata in ``docs.jsonl``); upserts tombstone the row they
+    replace and deletes are logged as tombstones. Only ids, pdf_ids, doc
+    offsets and the live mask are held in memory; texts are read from disk
+    for the top-k results only.
+
+    Data lives in a generation directory named by ``CURRENT``; compaction
+    writes a new generation and switches ``CURRENT`` atomically. Another
+    process appending to the same index is picked up on the next call.
+
+    With ``quantization`` set to ``"int8"`` (one byte per dimension plus a
+    per-row scale) or ``"binary"`` (one bit per dimension), the first pass
+    scans compact codes held in memory and only the best
+    ``k * rescore_factor`` candidates are rescored against their float32
+    vectors, which are read from the memory map on demand. The codes are
+    kept in ``codes.<quantization>`` next to the vectors and rebuilt from
+    them when missing, so quantization can be switched on for an existing
+    index.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        quantization: str = "none",
+        rescore_factor: Optional[int] = None
+    ):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._reset(None, None)
+        self.configure(quantization, rescore_factor)
+
+    def configure(self, quantization: str = "none", rescore_factor: Optional[int] = None) -> None:
+        """Set the first-pass quantization and how many candidates get rescored."""
+        if quantization not in QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization '{quantization}', expected one of {list(QUANTIZATIONS)}")
+        with self._lock:
+            self.quantization = quantization
+            self.rescore_factor = _rescore_factor(quantization, rescore_factor)
+            self._codes: Optional[_RowBuffer] = None
+            self._refresh()
+
+    # -- state ---------------------------------------------------------
+
+    def _reset(self, generation: Optional[int], dim: Optional[int]) -> None:
+        self.generation = generation
+        self.dim = dim
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self._offsets = array("q")
+        self._alive = bytearray()
+        self._pdf_codes = array("i")
+        self._pdf_code_of: Dict[str, int] = {}
+        self._log_size = 0
+        self._matrix: Optional[np.memmap] = None
+        self._codes = None
+        self.dead = 0
+
+    def _gen_dir(self, generation: int) -> Path:
+        return self.path / f"gen-{generation}"
+
+    def _read_current(self) -> Tuple[Optional[int], Optional[int]]:
+        current = self.path / "CURRENT"
+        if not current.exists():
+            return None, None
+        info = json.loads(current.read_text())
+        return info["generation"], info["dim"]
+
+    def _write_current(self, generation: int, dim: int) -> None:
+        tmp = self.path / "CURRENT.tmp"
+        tmp.write_text(json.dumps({"generation": generation, "dim": dim}))
+        os.replace(tmp, self.path / "CURRENT")
+
+    def _refresh(self) -> None:
+        """Catch up with rows appended (or a compaction done) by anyone else."""
+        generation, dim = self._read_current()
+        if generation != self.generation:
+            self._reset(generation, dim)
+        if generation is None:
+            return
+        log_path = self._gen_dir(generation) / "rows.jsonl"
+        if not log_path.exists() or log_path.stat().st_size == self._log_size:
+            self._sync_codes()
+            return
+
+        vector_rows = (self._gen_dir(generation) / "vectors.f32").stat().st_size // (4 * self.dim)
+        with open(log_path, "rb") as f:
+            f.seek(self._log_size)
+            data = f.read()
+        # Ignore a partially written last line
+        data = data[:data.rfind(b"\n") + 1]
+        position = self._log_size
+        for line in data.decode("utf-8").splitlines(keepends=True):
+            record = json.loads(line)
+            if "delete" in record:
+                self._kill(record["delete"])
+            elif len(self.ids) < vector_rows:
+                self._add_row(record["id"], record.get("pdf_id"), record["doc"])
+            else:
+                break  # row without its vector: write was interrupted
+            position += len(line.encode("utf-8"))
+        self._log_size = position
+        self._matrix = None
+        self._sync_codes()
+
+    def _add_row(self, chunk_id: str, pdf_id: Optional[str], offset: int) -> None:
+        self._kill(chunk_id)
+        self.row_of[chunk_id] = len(self.ids)
+        self.ids.append(chunk_id)
+        self._offsets.append(offset)
+        self._alive.append(1)
+        code = self._pdf_code_of.setdefault(pdf_id, len(self._pdf_code_of))
+        self._pdf_codes.append(code)
+
+    def _kill(self, chunk_id: str) -> None:
+        row = self.row_of.pop(chunk_id, None)
+        if row is not None:
+            self._alive[row] = 0
+            self.dead += 1
+
+    def _matrix_view(self) -> np.ndarray:
+        if self._matrix is None or self._matrix.shape[0] != len(self.ids):
+            if not self.ids:
+                return np.zeros((0, self.dim or 0), dtype=np.float32)
+            self._matrix = np.memmap(
+                self._gen_dir(self.generation) / "vectors.f32",
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.ids), self.dim)
+            )
+        return self._matrix
+
+    # -- quantized codes -----------------------------------------------
+
+    def _codes_dtype(self) -> np.dtype:
+        if self.quantization == "int8":
+            return np.dtype([("scale", "<f4"), ("code", "i1", (self.dim,))])
+        return np.dtype([("bits", "u1", ((self.dim + 7) // 8,))])
+
+    def _encode(self, vectors: np.ndarray) -> np.ndarray:
+        """Quantize normalized float32 vectors into first-pass codes."""
+        codes = np.empty(len(vectors), dtype=self._codes_dtype())
+        if self.quantization == "int8":
+            peak = np.abs(vectors).max(axis=1)
+            scale = np.where(peak == 0, 1.0, peak / 127.0).astype(np.float32)
+            codes["scale"] = scale
+            codes["code"] = np.rint(vectors / scale[:, None]).astype(np.int8)
+        else:
+            codes["bits"] = np.packbits(vectors > 0, axis=1)
+        return codes
+
+    def _sync_codes(self) -> None:
+        """Load codes for new rows, encoding any the codes file is missing."""
+        if self.quantization == "none" or self.generation is None:
+            return
+        if self._codes is None:
+            self._codes = _RowBuffer(self._codes_dtype())
+        rows = len(self.ids)
+        have = self._codes.size
+        if have >= rows:
+            return
+
+        dtype = self._codes_dtype()
+        self._codes.reserve(rows)
+        path = self._gen_dir(self.generation) / f"codes.{self.quantization}"
+        on_disk = path.stat().st_size // dtype.itemsize if path.exists() else 0
+        if on_disk > have:
+            take = min(on_disk, rows) - have
+            self._codes.append(np.fromfile(path, dtype=dtype, count=take, offset=have * dtype.itemsize))
+            have += take
+        if have < rows:
+            # Rows written without codes (quantization just enabled, another
+            # writer without it, or a fresh compaction): encode from the vectors
+            matrix = self._matrix_view()
+            with open(path, "r+b" if path.exists() else "wb") as f:
+                f.truncate(have * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                for start in range(have, rows, SCAN_BLOCK_ROWS):
+                    codes = self._encode(np.asarray(matrix[start:min(rows, start + SCAN_BLOCK_ROWS)]))
+                    f.write(codes.tobytes())
+                    self._codes.append(codes)
+
+    def _approx_scores(self, q: np.ndarray, rows: Optional[np.ndarray]) -> np.ndarray:
+        """First-pass scores from the codes, for all rows or just ``rows``."""
+        codes = self._codes.view()
+        if rows is not None:
+            codes = codes[rows]
+        scores = np.empty(len(codes), dtype=np.float32)
+        if self.quantization == "binary":
+            # Score the float query against each row's signs (+1/-1 per
+            # dimension) with one table per code byte: table[j, b] is the
+            # contribution of byte value b at byte position j
+            padded = np.zeros(8 * codes.dtype["bits"].shape[0], dtype=np.float32)
+            padded[:len(q)] = q
+            table = (padded.reshape(-1, 1, 8) * _BYTE_SIGNS).sum(axis=2).ravel()
+            offsets = np.arange(0, len(table), 256)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = codes[start:start + SCAN_BLOCK_ROWS]
+            if self.quantization == "int8":
+                scores[start:start + len(block)] = (block["code"].astype(np.float32) @ q) * block["scale"]
+            else:
+                scores[start:start + len(block)] = np.take(table, block["bits"] + offsets).sum(axis=1)
+        return scores
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Bytes the first search pass keeps in memory, against plain float32.
+
+        ``resident_bytes`` is the quantized codes, or the float32 matrix
+        itself (through the page cache) when the index is not quantized.
+        """
+        with self._lock:
+            self._refresh()
+            float32_bytes = len(self.ids) * (self.dim or 0) * 4
+            return {
+                "rows": len(self.row_of),
+                "dim": self.dim,
+                "quantization": self.quantization,
+                "resident_bytes": self._codes.nbytes if self._codes is not None else float32_bytes,
+                "float32_bytes": float32_bytes,
+            }
+
+    # -- writes --------------------------------------------------------
+
+    def _start_generation(self, generation: int, dim: int) -> None:
+        gen_dir = self._gen_dir(generation)
+        gen_dir.mkdir(parents=True, exist_ok=True)
+        (gen_dir / "vectors.f32").touch()
+        (gen_dir / "rows.jsonl").touch()
+        (gen_dir / "docs.jsonl").touch()
+        self._write_current(generation, dim)
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Optional[Dict[str, Any]]],
+        vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """Add or replace rows."""
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._refresh()
+            if self.generation is None:
+                self._start_generation(0, matrix.shape[1])
+                self._refresh()
+            if matrix.shape[1] != self.dim:
+                raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dim}")
+
+            gen_dir = self._gen_dir(self.generation)
+            # Texts first, then vectors, then the rows that point at both:
+            # an interrupted write leaves nothing a reader would pick up
+            doc_offsets = []
+            with open(gen_dir / "docs.jsonl", "ab") as f:
+                for text, metadata in zip(texts, metadatas):
+                    doc_offsets.append(f.tell())
+                    f.write(json.dumps({"text": text, "metadata": metadata or {}}).encode("utf-8") + b"\n")
+
+            with open(gen_dir / "vectors.f32", "r+b") as f:
+                # Drop vectors left over from an interrupted write
+                f.truncate(len(self.ids) * self.dim * 4)
+                f.seek(0, os.SEEK_END)
+                f.write(matrix.tobytes())
+
+            with open(gen_dir / "rows.jsonl", "r+b") as f:
+                # Drop a row line whose vector never made it to disk
+                f.truncate(self._log_size)
+                f.seek(0, os.SEEK_END)
+                lines = []
+                for chunk_id, metadata, doc_offset in zip(ids, metadatas, doc_offsets):
+                    pdf_id = (metadata or {}).get("pdf_id")
+                    lines.append(json.dumps({"id": chunk_id, "pdf_id": pdf_id, "doc": doc_offset}))
+                    self._add_row(chunk_id, pdf_id, doc_offset)
+                f.write(("\n".join(lines) + "\n").encode("utf-8"))
+                self._log_size = f.tell()
+            self._matrix = None
+            self._sync_codes()
+            self._maybe_compact()
+
+    def delete(self, ids: Optional[Iterable[str]] = None, pdf_ids: Optional[Iterable[str]] = None) -> int:
+        """Delete rows by id and/or by ``pdf_id``. Returns the number deleted."""
+        with self._lock:
+            self._refresh()
+            targets = set(ids or [])
+            if pdf_ids is not None:
+                mask = self._mask(list(pdf_ids))
+                targets.update(self.ids[row] for row in np.flatnonzero(mask))
+            targets = [chunk_id for chunk_id in targets if chunk_id in self.row_of]
+            if not targets or self.generation is None:
+                return 0
+            with open(self._gen_dir(self.generation) / "rows.jsonl", "ab") as f:
+                for chunk_id in targets:
+                    f.write(json.dumps({"delete": chunk_id}).encode("utf-8") + b"\n")
+                    self._kill(chunk_id)
+                self._log_size = f.tell()
+            self._maybe_compact()
+            return len(targets)
+
+    def _maybe_compact(self) -> None:
+        if self.dead >= COMPACT_MIN_DEAD_ROWS and self.dead > len(self.row_of):
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the index without tombstoned rows."""
+        with self._lock:
+            self._refresh()
+            if self.generation is None:
+                return
+            old_generation = self.generation
+            new_generation = old_generation + 1
+            new_dir = self._gen_dir(new_generation)
+            shutil.rmtree(new_dir, ignore_errors=True)
+            new_dir.mkdir(parents=True)
+
+            rows = np.flatnonzero(np.frombuffer(bytes(self._alive), dtype=np.uint8))
+            matrix = self._matrix_view()
+            with open(new_dir / "vectors.f32", "wb") as f:
+                for start in range(0, len(rows), 4096):
+                    f.write(np.ascontiguousarray(matrix[rows[start:start + 4096]]).tobytes())
+            pdf_of_code = {code: pdf_id for pdf_id, code in self._pdf_code_of.items()}
+            with open(new_dir / "rows.jsonl", "wb") as rows_out, \
+                    open(new_dir / "docs.jsonl", "wb") as docs_out, \
+                    open(self._gen_dir(old_generation) / "docs.jsonl", "rb") as docs_in:
+                for row in rows:
+                    docs_in.seek(self._offsets[row])
+                    doc_offset = docs_out.tell()
+                    docs_out.write(docs_in.readline())
+                    rows_out.write(json.dumps({
+                        "id": self.ids[row],
+                        "pdf_id": pdf_of_code[self._pdf_codes[row]],
+                        "doc": doc_offset
+                    }).encode("utf-8") + b"\n")
+
+            self._write_current(new_generation, self.dim)
+            self._matrix = None
+            self._refresh()
+            shutil.rmtree(self._gen_dir(old_generation), ignore_errors=True)
+            logger.info(f"Compacted flat index {self.path} to {len(rows)} rows")
+
+    def drop(self) -> None:
+        """Delete the whole index from disk."""
+        with self._lock:
+            self._matrix = None
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._reset(None, None)
+
+    # -- reads ---------------------------------------------------------
+
+    def count(self) -> int:
+        """Number of live rows."""
+        with self._lock:
+            self._refresh()
+            return len(self.row_of)
+
+    def _mask(self, pdf_ids: Optional[List[str]]) -> np.ndarray:
+        """Boolean mask of live rows, optionally restricted to some PDFs."""
+        mask = np.frombuffer(bytes(self._alive), dtype=np.uint8).astype(bool)
+        if pdf_ids is not None:
+            codes = [self._pdf_code_of[p] for p in pdf_ids if p in self._pdf_code_of]
+            mask &= np.isin(np.frombuffer(self._pdf_codes, dtype=np.int32), codes)
+        return mask
+
+    def search(
+        self,
+        query: Sequence[float],
+        k: int = 4,
+        pdf_ids: Optional[List[str]] = None
+    ) -> List[Tuple[int, float]]:
+        """Top-k rows by cosine similarity, as ``(row, score)`` pairs.
+
+        With ``pdf_ids`` only those PDFs' rows are scored. On a quantized
+        index the returned scores are the exact float32 ones.
+        """
+        with self._lock:
+            self._refresh()
+            if not self.row_of:
+                return []
+            q = np.asarray(query, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            if norm:
+                q = q / norm
+
+            # rows: the rows to score (None for all); mask: rows among
+            # those that must not be returned
+            rows = mask = None
+            live = len(self.ids)
+            if pdf_ids is not None or self.dead:
+                mask = self._mask(pdf_ids)
+                candidates = np.flatnonzero(mask)
+                live = len(candidates)
+                if live == 0:
+                    return []
+                if live < len(mask) // 2:
+                    # Selective filter: only score the matching rows
+                    rows, mask = candidates, None
+
+            if self.quantization != "none":
+                approx = self._approx_scores(q, rows)
+                if mask is not None:
+                    approx[~mask] = -np.inf
+                shortlist = _top(approx, min(live, k * self.rescore_factor))
+                # Rescore in row order so the float32 reads walk the file forwards
+                rows = np.sort(rows[shortlist] if rows is not None else shortlist)
+                live, mask = len(rows), None
+
+            matrix = self._matrix_view()
+            scores = matrix[rows] @ q if rows is not None else matrix @ q
+            if mask is not None:
+                scores[~mask] = -np.inf
+            top = _top(scores, min(k, live))
+            if rows is not None:
+                return [(int(rows[i]), float(scores[i])) for i in top]
+            return [(int(i), float(scores[i])) for i in top]
+
+    def get_rows(self, rows: Iterable[int]) -> List[Tuple[str, str, Dict[str, Any]]]:
+        """Read ``(id, text, metadata)`` for rows from the log."""
+        with self._lock:
+            results = []
+            with open(self._gen_dir(self.generation) / "docs.jsonl", "rb") as f:
+                for row in rows:
+                    f.seek(self._offsets[row])
+                    record = json.loads(f.readline())
+                    results.append((self.ids[row], record["text"], record["metadata"]))
+            return results
+
+    def iter_rows(self, batch_size: int = 256) -> Iterator[Tuple[List[str], List[Document], List[List[float]]]]:
+        """Read live rows back in batches of ``(ids, documents, vectors)``."""
+        with self._lock:
+            self._refresh()
+            live = [row for row in range(len(self.ids)) if self._alive[row]]
+            matrix = self._matrix_view()
+        for start in range(0, len(live), batch_size):
+            rows = live[start:start + batch_size]
+            records = self.get_rows(rows)
+            yield (
+                [chunk_id for chunk_id, _, _ in records],
+                [Document(page_content=text, metadata=metadata) for _, text, metadata in records],
+                matrix[rows].tolist()
+            )
+
+
+def _rescore_factor(quantization: str, rescore_factor: Optional[int]) -> int:
+    return max(1, rescore_factor or DEFAULT_RESCORE_FACTOR.get(quantization, 1))
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the ``k`` highest scores, best first."""
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+# Weak, so an index is freed once nothing (such as the collection registry)
+# holds it, while everyone using a directory still shares one instance
+_indexes: "weakref.WeakValueDictionary[str, FlatIndex]" = weakref.WeakValueDictionary()
+_indexes_lock = threading.Lock()
+
+
+def get_flat_index(
+    path: Union[str, Path],
+    quantization: str = "none",
+    rescore_factor: Optional[int] = None
+) -> FlatIndex:
+    """Get the process-wide FlatIndex for a directory."""
+    key = str(Path(path).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = FlatIndex(path, quantization, rescore_factor)
+            _indexes[key] = index
+        elif (index.quantization, index.rescore_factor) != (quantization, _rescore_factor(quantization, rescore_factor)):
+            index.configure(quantization, rescore_factor)
+        return index
+
+
+def flat_index_stats() -> Dict[str, Any]:
+    """Memory used by the flat indexes opened in this process."""
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    usage = [index.memory_usage() for index in indexes]
+    return {
+        "indexes": len(usage),
+        "rows": sum(u["rows"] for u in usage),
+        "resident_bytes": sum(u["resident_bytes"] for u in usage),
+        "float32_bytes": sum(u["float32_bytes"] for u in usage),
+    }
+
+
+class FlatVectorStore(LangChainVectorStore):
+    """LangChain vector store over a FlatIndex.
+
+    Supports the ``pdf_id`` filters used by the API (see
+    ``pdf_ids_from_filter``); scores are cosine similarities.
+    """
+
+    def __init__(self, index: FlatIndex, embedding_function: Embeddings):
+        self.index = index
+        self._embedding_function = embedding_function
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed texts and upsert them."""
+        import uuid
+
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        metadatas = metadatas or [{} for _ in texts]
+        vectors = self._embedding_function.embed_documents(texts)
+        self.index.upsert(ids, texts, metadatas, vectors)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Delete rows by id, or by ``filter={"pdf_id": ...}``."""
+        pdf_ids = pdf_ids_from_filter(kwargs.get("filter") or kwargs.get("where"))
+        self.index.delete(ids=ids, pdf_ids=pdf_ids)
+        return True
+
+    def delete_collection(self) -> None:
+        """Delete the whole index."""
+        self.index.drop()
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        """Top-k documents and cosine similarities for a query vector."""
+        with self.index._lock:
+            hits = self.index.search(embedding, k=k, pdf_ids=pdf_ids_from_filter(filter))
+            records = self.index.get_rows(row for row, _ in hits)
+        return [
+            (Document(id=chunk_id, page_content=text, metadata=metadata), score)
+            for (chunk_id, text, metadata), (_, score) in zip(records, hits)
+        ]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, filter)]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(
+            self._embedding_function.embed_query(query), k, filter
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped to [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        collection_name: str = "langchain",
+        persist_directory: str = "data/vectors",
+        **kwargs: Any
+    ) -> "FlatVectorStore":
+        store = cls(get_flat_index(Path(persist_directory) / "flat" / collection_name), embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
@@ -0,0 +1,539 @@
+"""Spreading Ollama calls across several hosts."""
+import asyncio
+import logging
+import math
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar, Union
+)
+
+import httpx
+import ollama
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_ollama import ChatOllama
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def canonical_model(name: str) -> str:
+    """Model name as Ollama reports it (``llama3.2`` -> ``llama3.2:latest``)."""
+    return name if ":" in name else f"{name}:latest"
+
+
+def is_host_failure(error: BaseException) -> bool:
+    """Whether an error says the host, rather than the request, is at fault."""
+    if isinstance(error, (ConnectionError, httpx.TransportError)):
+        return True
+    return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+
+def is_missing_model(error: BaseException) -> bool:
+    """Whether a host answered that it does not have the model."""
+    return isinstance(error, ollama.ResponseError) and error.status_code == 404
+
+
+class NoHostAvailable(Exception):
+    """Every Ollama host is down; the caller may retry after ``retry_after`` seconds."""
+
+    def __init__(self, model: Optional[str], retry_after: int):
+        self.model = model
+        self.retry_after = retry_after
+        target = f" for model '{model}'" if model else ""
+        super().__init__(f"No Ollama host available{target}; retry in {retry_after}s")
+
+
+class OllamaHost:
+    """One Ollama server, its load and its circuit breaker."""
+
+    def __init__(self, url: str, health_timeout: float = 5.0):
+        self.url = url
+        self.client = ollama.Client(host=url)
+        # Health checks must not hang on a stuck host; requests may run long
+        self.probe = ollama.Client(host=url, timeout=health_timeout)
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        # Installed models from the last health check; None until then
+        self.models: Optional[Set[str]] = None
+        self.last_error: Optional[str] = None
+        # Built on first use and reused. Async clients (and chat models, which
+        # hold one) belong to the event loop that created them, so those are
+        # kept per loop and dropped with it
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._chat_models: Dict[Tuple[str, Any], ChatOllama] = {}
+        self._loop_chat_models = weakref.WeakKeyDictionary()
+        self._clients_lock = threading.Lock()
+
+    def async_client(self) -> ollama.AsyncClient:
+        """The async client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._clients_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_clients[loop] = ollama.AsyncClient(host=self.url)
+            return client
+
+    def chat_model(self, model: str, keep_alive: Optional[Union[int, str]] = None) -> ChatOllama:
+        """The ``ChatOllama`` for ``model`` on this host; one per event loop when called in one."""
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        key = (model, keep_alive)
+        with self._clients_lock:
+            if loop is None:
+                models = self._chat_models
+            else:
+                models = self._loop_chat_models.get(loop)
+                if models is None:
+                    models = self._loop_chat_models[loop] = {}
+            llm = models.get(key)
+            if llm is None:
+                llm = models[key] = ChatOllama(model=model, keep_alive=keep_alive, base_url=self.url)
+            return llm
+
+
+class OllamaPool:
+    """Routes each Ollama call to the least busy healthy host that has the model.
+
+    A host that fails ``failure_threshold`` times in a row (connection
+    errors, timeouts, 5xx) has its circuit opened and gets no traffic for
+    ``reset_seconds``; then a single trial request is let through, and its
+    outcome closes or re-opens the circuit. A call that fails on one host
+    for a host-side reason, or because that host lacks the model, is retried
+    on another, up to ``max_attempts`` hosts in total.
+
+    ``check`` (run every ``interval`` seconds after ``start``) asks each
+    host for its installed models, which steers routing, and feeds the
+    same circuit breakers.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        failure_threshold: int = 3,
+        reset_seconds: float = 30.0,
+        max_attempts: int = 2,
+        health_timeout: float = 5.0
+    ):
+        self.hosts = [OllamaHost(url.rstrip("/"), health_timeout) for url in dict.fromkeys(urls)]
+        if not self.hosts:
+            raise ValueError("At least one Ollama host is required")
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.max_attempts = max_attempts
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+
+    @property
+    def urls(self) -> List[str]:
+        return [host.url for host in self.hosts]
+
+    def _state(self, host: OllamaHost, now: float) -> str:
+        """Circuit state. Caller holds the lock."""
+        if host.opened_at is None:
+            return CLOSED
+        return HALF_OPEN if now - host.opened_at >= self.reset_seconds else OPEN
+
+    def _candidates(self, model: Optional[str], exclude: Iterable[OllamaHost], now: float) -> List[OllamaHost]:
+        """Hosts that may take a call for ``model``. Caller holds the lock."""
+        hosts = [
+            host for host in self.hosts
+            if host not in exclude and (
+                self._state(host, now) == CLOSED
+                or (self._state(host, now) == HALF_OPEN and not host.probing)
+            )
+        ]
+        if model is None:
+            return hosts
+        name = canonical_model(model)
+        serving = [host for host in hosts if host.models is None or name in host.models]
+        # No host lists the model: let one answer for itself (pulled since, or a 404)
+        return serving or hosts
+
+    def hosts_for(self, model: Optional[str] = None) -> List[OllamaHost]:
+        """Hosts currently taking calls for ``model`` (for any model if None)."""
+        with self._lock:
+            return self._candidates(model, (), time.monotonic())
+
+    def _retry_after(self, now: float) -> int:
+        """Seconds until the next open circuit lets a trial through. Caller holds the lock."""
+        waits = [
+            self.reset_seconds - (now - host.opened_at)
+            for host in self.hosts if host.opened_at is not None
+        ]
+        return max(1, math.ceil(min(waits))) if waits else 1
+
+    def _acquire(
+        self,
+        model: Optional[str],
+        exclude: Iterable[OllamaHost] = (),
+        host: Optional[OllamaHost] = None
+    ) -> OllamaHost:
+        now = time.monotonic()
+        with self._lock:
+            if host is None:
+                candidates = self._candidates(model, exclude, now)
+                if not candidates:
+                    raise NoHostAvailable(model, self._retry_after(now))
+                host = min(candidates, key=lambda h: (h.outstanding, h.requests))
+            if self._state(host, now) == HALF_OPEN:
+                host.probing = True
+            host.outstanding += 1
+            host.requests += 1
+            return host
+
+    def _release(self, host: OllamaHost, model: Optional[str], error: Optional[BaseException] = None,
+                 judged: bool = True) -> None:
+        """Return a host; ``error`` decides the breaker unless the call was abandoned."""
+        with self._lock:
+            host.outstanding -= 1
+            host.probing = False
+            if not judged:
+                return
+            if error is not None and is_host_failure(error):
+                self._failed(host, error)
+                return
+            if error is not None and is_missing_model(error) and model and host.models is not None:
+                host.models.discard(canonical_model(model))
+            # Any answer, even an error, shows the host is up
+            self._succeeded(host)
+
+    def _failed(self, host: OllamaHost, error: BaseException) -> None:
+        """Caller holds the lock."""
+        host.failures += 1
+        host.consecutive_failures += 1
+        host.last_error = str(error)
+        reopen = host.opened_at is not None
+        if reopen or host.consecutive_failures >= self.failure_threshold:
+            if not reopen:
+                logger.warning(f"🔌 Ollama host {host.url} failing ({error}); taking it out for {self.reset_seconds:g}s")
+            host.opened_at = time.monotonic()
+
+    def _succeeded(self, host: OllamaHost) -> None:
+        """Caller holds the lock."""
+        if host.opened_at is not None:
+            logger.info(f"🔌 Ollama host {host.url} is back")
+        host.consecutive_failures = 0
+        host.opened_at = None
+
+    def _should_retry(self, error: Exception, model: Optional[str], tried: List[OllamaHost]) -> bool:
+        if not (is_host_failure(error) or is_missing_model(error)) or len(tried) >= self.max_attempts:
+            return False
+        with self._lock:
+            if not self._candidates(model, tried, time.monotonic()):
+                return False
+            self.retries += 1
+        logger.info(f"🔁 Retrying {model or 'call'} on another host after {tried[-1].url} failed: {error}")
+        return True
+
+    @contextmanager
+    def lease(self, model: Optional[str] = None, host: Optional[OllamaHost] = None) -> Iterator[OllamaHost]:
+        """Hold the best host (or ``host``) for ``model`` for one call, without retries."""
+        host = self._acquire(model, host=host)
+        try:
+            yield host
+        except Exception as e:
+            self._release(host, model, e)
+            raise
+        except BaseException:
+            self._release(host, model, judged=False)
+            raise
+        self._release(host, model)
+
+    def call(self, model: Optional[str], fn: Callable[[OllamaHost], T]) -> T:
+        """Run ``fn(host)`` on the best host for ``model``, retrying on another if it fails."""
+        tried: List[OllamaHost] = []
+        while True:
+            host = self._acquire(model, tried)
+            try:
+                result = fn(host)
+            except Exception as e:
+                self._release(host, model, e)
+                tried.append(host)
+                if self._should_retry(e, model, tried):
+                    continue
+                raise
+            except BaseException:
+                self._release(host, model, judged=False)
+                raise
+            self._release(host, model)
+            return result
+
+    async def acall(self, model: Optional[str], fn: Callable[[OllamaHost], Awaitable[T]]) -> T:
+        """Await ``fn(host)`` on the best host for ``model``; see ``call``."""
+        tried: List[OllamaHost] = []
+        while True:
+            host = self._acquire(model, tried)
+            try:
+                result = await fn(host)
+            except Exception as e:
+                self._release(host, model, e)
+                tried.append(host)
+                if self._should_retry(e, model, tried):
+                    continue
+                raise
+            except BaseException:
+                self._release(host, model, judged=False)
+                raise
+            self._release(host, model)
+            return result
+
+    def stream(self, model: Optional[str], fn: Callable[[OllamaHost], Iterator[T]]) -> Iterator[T]:
+        """Iterate ``fn(host)``; a failure is retried on another host only before the first item."""
+        tried: List[OllamaHost] = []
+        while True:
+            host = self._acquire(model, tried)
+            started = False
+            try:
+                for item in fn(host):
+                    started = True
+                    yield item
+            except Exception as e:
+                self._release(host, model, e)
+                tried.append(host)
+                if not started and self._should_retry(e, model, tried):
+                    continue
+                raise
+            except BaseException:
+                self._release(host, model, judged=False)
+                raise
+            self._release(host, model)
+            return
+
+    async def astream(self, model: Optional[str], fn: Callable[[OllamaHost], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Async version of ``stream``."""
+        tried: List[OllamaHost] = []
+        while True:
+            host = self._acquire(model, tried)
+            started = False
+            try:
+                async for item in fn(host):
+                    started = True
+                    yield item
+            except Exception as e:
+                self._release(host, model, e)
+                tried.append(host)
+                if not started and self._should_retry(e, model, tried):
+                    continue
+                raise
+            except BaseException:
+                self._release(host, model, judged=False)
+                raise
+            self._release(host, model)
+            return
+
+    def achat_stream(self, model: str, **kwargs: Any) -> AsyncIterator[Any]:
+        """Stream ``ollama.AsyncClient.chat`` chunks from the best host for ``model``."""
+        async def chat(host: OllamaHost) -> AsyncIterator[Any]:
+            async for chunk in await host.async_client().chat(model=model, stream=True, **kwargs):
+                yield chunk
+        return self.astream(model, chat)
+
+    def list_models(self) -> ollama.ListResponse:
+        """Models installed on any reachable host, each listed once."""
+        models: Dict[str, Any] = {}
+        errors = []
+        for host in self.hosts_for():
+            try:
+                with self.lease(host=host) as leased:
+                    response = leased.client.list()
+            except Exception as e:
+                errors.append(e)
+                continue
+            for model in response.models:
+                models.setdefault(model.model, model)
+        if errors and not models:
+            raise errors[0]
+        return ollama.ListResponse(models=list(models.values()))
+
+    def check(self) -> None:
+        """Ask every host for its installed models, updating routing and circuit breakers."""
+        for host in self.hosts:
+            try:
+                installed = {canonical_model(m.model) for m in host.probe.list().models if m.model}
+            except Exception as e:
+                with self._lock:
+                    self._failed(host, e)
+                continue
+            with self._lock:
+                host.models = installed
+                self._succeeded(host)
+
+    def available(self) -> bool:
+        """Whether any host is taking calls."""
+        return bool(self.hosts_for())
+
+    def start(self, interval: Optional[float] = 15.0) -> None:
+        """Check the hosts now, then every ``interval`` seconds in the background."""
+        self.check()
+        if interval and self._checker is None:
+            self._stop.clear()
+            self._checker = threading.Thread(
+                target=self._check_loop, args=(interval,), name="ollama-health", daemon=True
+            )
+            self._checker.start()
+
+    def _check_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning(f"⚠️ Ollama health check failed: {e}")
+
+    def stop(self) -> None:
+        """Stop the background health checks."""
+        self._stop.set()
+        if self._checker is not None:
+            self._checker.join()
+            self._checker = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per host: circuit state, load and failures; plus calls retried elsewhere."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "retries": self.retries,
+                "hosts": {
+                    host.url: {
+                        "state": self._state(host, now),
+                        "outstanding": host.outstanding,
+                        "requests": host.requests,
+                        "failures": host.failures,
+                        "consecutive_failures": host.consecutive_failures,
+                        "models": sorted(host.models) if host.models is not None else None,
+                        "last_error": host.last_error,
+                    }
+                    for host in self.hosts
+                },
+            }
+
+
+class PooledChatOllama(BaseChatModel):
+    """``ChatOllama`` whose every call goes to a host picked by an ``OllamaPool``."""
+
+    pool: OllamaPool
+    model: str
+    keep_alive: Optional[Union[int, str]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "pooled-ollama"
+
+    def _on(self, host: OllamaHost) -> ChatOllama:
+        return host.chat_model(self.model, self.keep_alive)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        return self.pool.call(
+            self.model, lambda host: self._on(host)._generate(messages, stop, run_manager, **kwargs)
+        )
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        return await self.pool.acall(
+            self.model, lambda host: self._on(host)._agenerate(messages, stop, run_manager, **kwargs)
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        yield from self.pool.stream(
+            self.model, lambda host: self._on(host)._stream(messages, stop, run_manager, **kwargs)
+        )
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        async for chunk in self.pool.astream(
+            self.model, lambda host: self._on(host)._astream(messages, stop, run_manager, **kwargs)
+        ):
+            yield chunk
+
+
+class PooledEmbeddings(Embeddings):
+    """Ollama embeddings sent to a host picked by an ``OllamaPool``."""
+
+    def __init__(self, pool: OllamaPool, model: str, keep_alive: Optional[int] = None):
+        self.pool = pool
+        self.model = model
+        self.keep_alive = keep_alive
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts on one host, retried on another if it fails."""
+        return self.pool.call(
+            self.model,
+            lambda host: host.client.embed(self.model, texts, keep_alive=self.keep_alive)["embeddings"]
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed one text."""
+        return self.embed_documents([text])[0]
+
+
+_pool: Optional[OllamaPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_ollama_pool(
+    urls: Iterable[str],
+    failure_threshold: Optional[int] = None,
+    reset_seconds: Optional[float] = None,
+    max_attempts: Optional[int] = None
+) -> OllamaPool:
+    """Get the process-wide pool, replacing it if the hosts changed, and update its limits."""
+    global _pool
+    urls = [url.rstrip("/") for url in dict.fromkeys(urls)]
+    with _pool_lock:
+        if _pool is None or _pool.urls != urls:
+            if _pool is not None:
+                _pool.stop()
+            _pool = OllamaPool(urls)
+        if failure_threshold is not None:
+            _pool.failure_threshold = failure_threshold
+        if reset_seconds is not None:
+            _pool.reset_seconds = reset_seconds
+        if max_attempts is not None:
+            _pool.max_attempts = max_attempts
+        return _pool
+
+
+def ollama_pool_stats() -> Dict[str, Any]:
+    """Stats for the process-wide pool."""
+    with _pool_lock:
+        pool = _pool
+    return pool.stats() if pool is not None else {}
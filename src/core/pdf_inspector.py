@@ -0,0 +1,105 @@
+"""Pre-flight PDF page inspection for tiered text extraction."""
+import logging
+from pathlib import Path
+from typing import List, Optional, Union
+
+import pdfplumber
+
+logger = logging.getLogger(__name__)
+
+# Extraction tiers, recorded per page in chunk metadata as ``extraction_tier``
+TIER_TEXT = "text_layer"
+TIER_SCANNED = "scanned"
+TIER_COMPLEX = "complex_layout"
+
+# Pages with fewer characters than this have no usable text layer
+MIN_TEXT_CHARS = 20
+# Share of the page covered by images above which a page counts as scanned
+# (no text) or as mixed text and figures (with text)
+SCANNED_IMAGE_COVERAGE = 0.5
+FIGURE_IMAGE_COVERAGE = 0.3
+# Ruling lines/boxes above which we look for tables
+TABLE_RULING_THRESHOLD = 8
+
+
+class PageProfile:
+    """Inspection result for one PDF page.
+
+    ``text`` holds the fast text-layer extraction for ``TIER_TEXT`` pages
+    and is None for pages that need the unstructured pipeline.
+    """
+
+    def __init__(
+        self,
+        page_number: int,
+        tier: str,
+        char_count: int,
+        image_coverage: float,
+        text: Optional[str] = None
+    ):
+        self.page_number = page_number
+        self.tier = tier
+        self.char_count = char_count
+        self.image_coverage = image_coverage
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"PageProfile(page={self.page_number}, tier={self.tier!r}, chars={self.char_count})"
+
+
+def _image_coverage(page) -> float:
+    """Fraction of the page area covered by images (overlaps counted twice)."""
+    page_area = float(page.width * page.height) or 1.0
+    image_area = sum(
+        max(0.0, float(img["x1"] - img["x0"])) * max(0.0, float(img["bottom"] - img["top"]))
+        for img in page.images
+    )
+    return min(1.0, image_area / page_area)
+
+
+def classify_page(page) -> PageProfile:
+    """Classify a pdfplumber page and extract its text if it is plain text.
+
+    - ``scanned``: little or no text layer but mostly covered by images
+    - ``complex_layout``: tables, or text mixed with large figures
+    - ``text_layer``: everything else, including blank pages
+    """
+    char_count = len(page.chars)
+    coverage = _image_coverage(page)
+
+    if char_count < MIN_TEXT_CHARS:
+        tier = TIER_SCANNED if coverage >= SCANNED_IMAGE_COVERAGE else TIER_TEXT
+    elif coverage >= FIGURE_IMAGE_COVERAGE:
+        tier = TIER_COMPLEX
+    elif len(page.rects) + len(page.lines) >= TABLE_RULING_THRESHOLD and page.find_tables():
+        tier = TIER_COMPLEX
+    else:
+        tier = TIER_TEXT
+
+    text = (page.extract_text() or "") if tier == TIER_TEXT else None
+    return PageProfile(page.page_number, tier, char_count, coverage, text)
+
+
+def inspect_pages(
+    file_path: Union[str, Path],
+    first_page: int = 1,
+    last_page: Optional[int] = None
+) -> List[PageProfile]:
+    """Inspect pages ``first_page..last_page`` (1-based, inclusive).
+
+    Module-level so it can run in a worker process.
+    """
+    with pdfplumber.open(str(file_path)) as pdf:
+        last_page = min(last_page or len(pdf.pages), len(pdf.pages))
+        return [classify_page(pdf.pages[i]) for i in range(first_page - 1, last_page)]
+
+
+def page_runs(page_numbers: List[int], max_pages: int) -> List[List[int]]:
+    """Group sorted page numbers into contiguous runs of at most ``max_pages``."""
+    runs: List[List[int]] = []
+    for page_number in page_numbers:
+        if runs and runs[-1][-1] == page_number - 1 and len(runs[-1]) < max_pages:
+            runs[-1].append(page_number)
+        else:
+            runs.append([page_number])
+    return runs
@@ -0,0 +1,82 @@
+"""Bounded streaming stages for ingestion pipelines."""
+import logging
+import queue
+import threading
+from typing import Iterable, Iterator, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Failure:
+    """Exception raised by a producer, carried across the queue."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def bounded(iterable: Iterable[T], maxsize: int, name: str = "stage") -> Iterator[T]:
+    """Run ``iterable`` in a background thread, buffering at most ``maxsize`` items.
+
+    Chaining ``bounded`` stages gives a pipeline where each stage works
+    concurrently with the next, memory is capped by the queue sizes, and
+    throughput is set by the slowest stage. A producer exception is
+    re-raised in the consumer; closing the returned generator early stops
+    the producer at its next item.
+    """
+    items: "queue.Queue" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            close = getattr(iterable, "close", None)
+            if stop.is_set() and close:
+                close()
+
+    thread = threading.Thread(target=produce, name=f"pipeline-{name}", daemon=True)
+    thread.start()
+
+    def consume() -> Iterator[T]:
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stop.set()
+
+    return consume()
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Group items into lists of at most ``size``."""
+    batch: List[T] = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
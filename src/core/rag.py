@@ -1,6 +1,6 @@
 """RAG pipeline implementation."""
 import logging
-from typing import Any, Dict
+from typing import Any, Dict, Iterator
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_classic.retrievers.multi_query import MultiQueryRetriever
@@ -49,4 +49,13 @@ class RAGPipeline:
             return self.chain.invoke(question)
         except Exception as e:
             logger.error(f"Error getting response: {e}")
-            raise 
\ No newline at end of file
+            raise 
+
+    def stream_response(self, question: str) -> Iterator[str]:
+        """Yield the response to a question piece by piece as it is generated."""
+        try:
+            logger.info(f"Streaming response for question: {question}")
+            yield from self.chain.stream(question)
+        except Exception as e:
+            logger.error(f"Error streaming response: {e}")
+            raise
@@ -0,0 +1,79 @@
+"""Merging ranked result lists from different retrievers."""
+import heapq
+from typing import Callable, Dict, Hashable, Iterator, List, Sequence
+
+from langchain_core.documents import Document
+
+
+def chunk_key(doc: Document) -> Hashable:
+    """Identity of a chunk across retrievers: its PDF and position, else its text."""
+    pdf_id = doc.metadata.get("pdf_id")
+    chunk_index = doc.metadata.get("chunk_index")
+    if pdf_id is not None and chunk_index is not None:
+        return pdf_id, chunk_index
+    return doc.page_content
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Document]],
+    k: int = 60,
+    key: Callable[[Document], Hashable] = chunk_key
+) -> List[Document]:
+    """Merge ranked lists by reciprocal rank fusion.
+
+    Each document scores ``sum(1 / (k + rank))`` over the lists it appears
+    in (rank starting at 1), so chunks found by several retrievers rise to
+    the top without having to compare their raw scores. The fused score is
+    stored in ``metadata["rrf_score"]``.
+
+    Args:
+        rankings: Result lists, best first
+        k: Damping constant; larger values flatten the rank weights
+        key: Identifies the same chunk across lists
+
+    Returns:
+        Unique documents, best first
+    """
+    scores: Dict[Hashable, float] = {}
+    docs: Dict[Hashable, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            doc_key = key(doc)
+            scores[doc_key] = scores.get(doc_key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(doc_key, doc)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    for doc_key in fused:
+        docs[doc_key].metadata["rrf_score"] = scores[doc_key]
+    return [docs[doc_key] for doc_key in fused]
+
+
+def merge_by_score(
+    rankings: Sequence[Sequence[Document]],
+    score_key: str = "score",
+    key: Callable[[Document], Hashable] = chunk_key
+) -> Iterator[Document]:
+    """Merge per-collection results into one list ordered by score.
+
+    Each ranking must already be sorted best first. A heap over the heads
+    of the lists yields the global best next, so taking the first few
+    results does not sort everything, and a strong chunk from the last
+    collection is not pushed behind weak ones from the first. Documents
+    without a score sort as 0.
+
+    Args:
+        rankings: Result lists, each sorted by ``metadata[score_key]`` descending
+        score_key: Metadata field holding the comparable score
+        key: Identifies the same chunk across lists
+
+    Yields:
+        Unique documents, best first
+    """
+    seen = set()
+    merged = heapq.merge(
+        *rankings, key=lambda doc: -(doc.metadata.get(score_key) or 0.0)
+    )
+    for doc in merged:
+        doc_key = key(doc)
+        if doc_key not in seen:
+            seen.add(doc_key)
+            yield doc
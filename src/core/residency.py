@@ -0,0 +1,323 @@
+"""Keeping Ollama models loaded between requests."""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional
+
+from .ollama_pool import OllamaHost, OllamaPool, canonical_model
+
+logger = logging.getLogger(__name__)
+
+# keep_alive that tells Ollama never to unload a model
+PINNED = -1
+# A warm-up whose load_duration is at least this long actually loaded weights;
+# shorter ones found the model already resident
+COLD_LOAD_SECONDS = 0.25
+# keep_alive covers this many typical idle gaps
+_GAP_FACTOR = 2.0
+
+
+class _ModelState:
+    """Usage and load history of one model, across the pool's hosts."""
+
+    def __init__(self, embedding: bool = False):
+        self.embedding = embedding
+        self.pinned = False
+        self.uses = 0
+        self.last_use: Optional[float] = None
+        self.avg_idle: Optional[float] = None
+        # Per host URL: when Ollama will unload the model, and any load in progress
+        self.resident_until: Dict[str, float] = {}
+        self.loading: Dict[str, Future] = {}
+        self.warmups = 0
+        self.cold_starts = 0
+        self.failures = 0
+        self.total_load = 0.0
+        self.max_load = 0.0
+        self.last_load = 0.0
+
+
+class ModelResidency:
+    """Decides how long Ollama keeps each model loaded, and loads them ahead of use.
+
+    Pinned models (the embedding model) are sent ``keep_alive=-1`` and are
+    reloaded if they are ever found evicted. Every other model gets a
+    ``keep_alive`` sized to its usual idle time between uses: twice the
+    moving average of the gaps longer than ``min_keep_alive``, at least
+    ``min_keep_alive``. A model whose gaps would need more than
+    ``max_keep_alive`` is not worth holding and gets ``min_keep_alive``.
+
+    A model is loaded on every host of the ``pool`` that serves it, since
+    any of them may get its next request. Loads run on a small thread pool
+    and are shared: concurrent callers for a cold model wait for the same
+    loads.
+    """
+
+    def __init__(
+        self,
+        pool: OllamaPool,
+        min_keep_alive: int = 300,
+        max_keep_alive: int = 3600
+    ):
+        self.pool = pool
+        self.min_keep_alive = min_keep_alive
+        self.max_keep_alive = max_keep_alive
+        self._models: Dict[str, _ModelState] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="model-warmup")
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def use_pool(self, pool: OllamaPool) -> None:
+        """Switch to ``pool``, forgetting which of the old pool's hosts had models loaded."""
+        with self._lock:
+            if pool is self.pool:
+                return
+            self.pool = pool
+            for state in self._models.values():
+                state.resident_until.clear()
+                state.loading.clear()
+
+    def _state(self, model: str) -> _ModelState:
+        """Caller holds the lock."""
+        state = self._models.get(model)
+        if state is None:
+            state = self._models[model] = _ModelState()
+        return state
+
+    def pin(self, model: str, embedding: bool = False) -> None:
+        """Keep ``model`` loaded for good."""
+        with self._lock:
+            state = self._state(model)
+            state.pinned = True
+            state.embedding = embedding
+
+    def _keep_alive(self, state: _ModelState) -> int:
+        """Caller holds the lock."""
+        if state.pinned:
+            return PINNED
+        if state.avg_idle is None:
+            return self.min_keep_alive
+        wanted = _GAP_FACTOR * state.avg_idle
+        if wanted > self.max_keep_alive:
+            return self.min_keep_alive
+        return int(max(self.min_keep_alive, wanted))
+
+    def keep_alive(self, model: str) -> int:
+        """The ``keep_alive`` (seconds, -1 for ever) to send with requests for ``model``."""
+        with self._lock:
+            return self._keep_alive(self._state(model))
+
+    def _expiry(self, state: _ModelState, now: float) -> float:
+        """When Ollama will unload a model used ``now``. Caller holds the lock."""
+        keep_alive = self._keep_alive(state)
+        return float("inf") if keep_alive == PINNED else now + keep_alive
+
+    def record_use(self, model: str) -> bool:
+        """Note a request for ``model``; returns whether it is believed loaded on every host serving it."""
+        hosts = self.pool.hosts_for(model)
+        now = time.monotonic()
+        with self._lock:
+            state = self._state(model)
+            if state.last_use is not None:
+                idle = now - state.last_use
+                # Only gaps long enough to unload a model matter for keep_alive
+                if idle > self.min_keep_alive:
+                    state.avg_idle = idle if state.avg_idle is None else 0.7 * state.avg_idle + 0.3 * idle
+            state.uses += 1
+            state.last_use = now
+            resident = bool(hosts) and all(state.resident_until.get(host.url, 0.0) > now for host in hosts)
+            if resident:
+                # Ollama restarts its unload timer on every request
+                for host in hosts:
+                    state.resident_until[host.url] = self._expiry(state, now)
+            return resident
+
+    def warm(
+        self,
+        model: str,
+        embedding: Optional[bool] = None,
+        hosts: Optional[List[OllamaHost]] = None
+    ) -> List[Future]:
+        """Load ``model`` in the background on ``hosts`` (default: every host serving it).
+
+        Callers share loads already in progress.
+        """
+        hosts = self.pool.hosts_for(model) if hosts is None else hosts
+        with self._lock:
+            state = self._state(model)
+            if embedding is not None:
+                state.embedding = embedding
+            futures = []
+            for host in hosts:
+                future = state.loading.get(host.url)
+                if future is None:
+                    future = state.loading[host.url] = self._executor.submit(self._load, model, host)
+                futures.append(future)
+            return futures
+
+    def _load(self, model: str, host: OllamaHost) -> None:
+        with self._lock:
+            state = self._state(model)
+            keep_alive = self._keep_alive(state)
+            embedding = state.embedding
+        started = time.monotonic()
+        try:
+            with self.pool.lease(model, host=host):
+                # An empty generate loads a chat model; embedding models need an input
+                if embedding:
+                    response = host.client.embed(model=model, input="warm-up", keep_alive=keep_alive)
+                else:
+                    response = host.client.generate(model=model, keep_alive=keep_alive)
+        except Exception as e:
+            with self._lock:
+                state.loading.pop(host.url, None)
+                state.failures += 1
+            logger.warning(f"⚠️ Could not load model {model} on {host.url}: {e}")
+            raise
+        load_seconds = (getattr(response, "load_duration", None) or 0) / 1e9
+        with self._lock:
+            state.loading.pop(host.url, None)
+            state.warmups += 1
+            state.resident_until[host.url] = self._expiry(state, time.monotonic())
+            cold = load_seconds >= COLD_LOAD_SECONDS
+            if cold:
+                state.cold_starts += 1
+                state.total_load += load_seconds
+                state.max_load = max(state.max_load, load_seconds)
+                state.last_load = load_seconds
+        if cold:
+            logger.info(f"🔥 Loaded {model} on {host.url} in {load_seconds:.1f}s (keep_alive {keep_alive}s)")
+        else:
+            logger.debug(f"{model} already loaded on {host.url} ({time.monotonic() - started:.2f}s round trip)")
+
+    async def aensure_loaded(self, model: str) -> None:
+        """Record a use of ``model`` and, if it is not loaded, wait for it to load.
+
+        A failed load is only logged: the request itself reports the error.
+        """
+        if self.record_use(model):
+            return
+        await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in self.warm(model)),
+            return_exceptions=True
+        )
+
+    def refresh(self) -> None:
+        """Sync with the models each host actually has loaded; reload evicted pinned models."""
+        for host in self.pool.hosts_for():
+            try:
+                loaded = {canonical_model(m.model or m.name or "") for m in host.probe.ps().models}
+            except Exception as e:
+                logger.warning(f"⚠️ Could not check loaded models on {host.url}: {e}")
+                continue
+            now = time.monotonic()
+            evicted = []
+            with self._lock:
+                for model, state in self._models.items():
+                    name = canonical_model(model)
+                    if name in loaded:
+                        if state.resident_until.get(host.url, 0.0) <= now:
+                            state.resident_until[host.url] = self._expiry(state, now)
+                        continue
+                    state.resident_until.pop(host.url, None)
+                    serves = host.models is None or name in host.models
+                    if state.pinned and serves and host.url not in state.loading:
+                        evicted.append(model)
+            for model in evicted:
+                logger.warning(f"📤 Pinned model {model} was unloaded from {host.url}; reloading")
+                self.warm(model, hosts=[host])
+
+    def start(self, preload: Iterable[str] = (), refresh_interval: Optional[float] = 60.0) -> None:
+        """Load pinned and ``preload`` models, then keep checking residency every ``refresh_interval`` seconds."""
+        with self._lock:
+            models = [model for model, state in self._models.items() if state.pinned]
+        for model in dict.fromkeys([*models, *preload]):
+            self.warm(model)
+        if refresh_interval and self._refresher is None:
+            self._stop.clear()
+            self._refresher = threading.Thread(
+                target=self._refresh_loop, args=(refresh_interval,), name="model-residency", daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh_loop(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"⚠️ Could not check loaded models: {e}")
+
+    def stop(self) -> None:
+        """Stop the residency checks."""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per model: uses, cold starts and load times, and the current keep_alive."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                model: {
+                    "uses": state.uses,
+                    "resident_hosts": sorted(url for url, until in state.resident_until.items() if until > now),
+                    "pinned": state.pinned,
+                    "keep_alive_seconds": self._keep_alive(state),
+                    "avg_idle_seconds": state.avg_idle,
+                    "warmups": state.warmups,
+                    "cold_starts": state.cold_starts,
+                    "load_failures": state.failures,
+                    "avg_load_ms": 1000 * state.total_load / state.cold_starts if state.cold_starts else 0.0,
+                    "max_load_ms": 1000 * state.max_load,
+                    "last_load_ms": 1000 * state.last_load,
+                }
+                for model, state in self._models.items()
+            }
+
+
+_residency: Optional[ModelResidency] = None
+_residency_lock = threading.Lock()
+
+
+def configure_model_residency(
+    pool: OllamaPool,
+    min_keep_alive: Optional[int] = None,
+    max_keep_alive: Optional[int] = None,
+    pinned_embeddings: Iterable[str] = ()
+) -> ModelResidency:
+    """Set up the process-wide residency manager for ``pool``; meant to run once, at startup.
+
+    Run again with a different pool, the manager switches to it and forgets
+    where models were loaded on the old one.
+    """
+    global _residency
+    with _residency_lock:
+        if _residency is None:
+            _residency = ModelResidency(pool)
+        else:
+            _residency.use_pool(pool)
+        if min_keep_alive is not None:
+            _residency.min_keep_alive = min_keep_alive
+        if max_keep_alive is not None:
+            _residency.max_keep_alive = max_keep_alive
+        residency = _residency
+    for model in pinned_embeddings:
+        residency.pin(model, embedding=True)
+    return residency
+
+
+def get_model_residency() -> Optional[ModelResidency]:
+    """The process-wide residency manager, or None before it is configured."""
+    with _residency_lock:
+        return _residency
+
+
+def residency_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats for the process-wide manager, keyed by model."""
+    with _residency_lock:
+        residency = _residency
+    return residency.stats() if residency is not None else {}
@@ -0,0 +1,322 @@
+"""Multi-query retrieval planned once per question."""
+import asyncio
+import logging
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from langchain_core.vectorstores import VectorStore as LangChainVectorStore
+
+from .rank_fusion import chunk_key
+
+logger = logging.getLogger(__name__)
+
+QUERY_EXPANSION_PROMPT = PromptTemplate(
+    input_variables=["question"],
+    template="""You are an AI language model assistant. Your task is to generate 2
+    different versions of the given user question to retrieve relevant documents from
+    a vector database. By generating multiple perspectives on the user question, your
+    goal is to help the user overcome some of the limitations of the distance-based
+    similarity search. Provide these alternative questions separated by newlines.
+    Original question: {question}"""
+)
+
+# "1. ", "2) ", "- " and similar list markers models put before each query
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s*")
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_search_executor(max_workers: int = 8) -> ThreadPoolExecutor:
+    """Process-wide worker pool for collection searches."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="collection-search")
+        return _executor
+
+
+class SearchTarget:
+    """One collection to search, opened on the worker that searches it.
+
+    ``context`` carries whatever the caller needs to interpret the results
+    (for example the PDF a per-PDF collection belongs to).
+    """
+
+    def __init__(
+        self,
+        label: str,
+        open_collection: Callable[[], LangChainVectorStore],
+        k: int = 3,
+        filter: Optional[Dict[str, Any]] = None,
+        context: Any = None
+    ):
+        self.label = label
+        self.open_collection = open_collection
+        self.k = k
+        self.filter = filter
+        self.context = context
+
+
+class SearchResult:
+    """Outcome of searching one target: its documents, or why there are none."""
+
+    def __init__(
+        self,
+        target: SearchTarget,
+        docs: Optional[List[Document]] = None,
+        error: Optional[str] = None,
+        timed_out: bool = False,
+        seconds: float = 0.0
+    ):
+        self.target = target
+        self.docs = docs or []
+        self.error = error
+        self.timed_out = timed_out
+        self.seconds = seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+def scored_search_by_vector(
+    vector_db: LangChainVectorStore,
+    vector: List[float],
+    k: int,
+    **kwargs: Any
+) -> List[Tuple[Document, Optional[float]]]:
+    """Search one collection, scoring hits as relevance in [0, 1].
+
+    Raw scores are distances or similarities depending on the store and
+    the collection's metric (Chroma defaults to L2, some collections use
+    cosine, the flat index returns cosine similarity). Each is mapped
+    through the store's own relevance function so scores from different
+    collections can be compared. Stores without scores give ``None``.
+    """
+    if hasattr(vector_db, "similarity_search_by_vector_with_relevance_scores"):
+        pairs = vector_db.similarity_search_by_vector_with_relevance_scores(vector, k=k, **kwargs)
+    elif hasattr(vector_db, "similarity_search_by_vector_with_score"):
+        pairs = vector_db.similarity_search_by_vector_with_score(vector, k=k, **kwargs)
+    else:
+        return [(doc, None) for doc in vector_db.similarity_search_by_vector(vector, k=k, **kwargs)]
+    relevance = vector_db._select_relevance_score_fn()
+    return [(doc, relevance(score)) for doc, score in pairs]
+
+
+class RetrievalPlan:
+    """The search queries for one question and their embeddings."""
+
+    def __init__(self, question: str, queries: List[str], vectors: List[List[float]]):
+        self.question = question
+        self.queries = queries
+        self.vectors = vectors
+
+
+class RetrievalPlanner:
+    """Expands a question once and reuses the result for every collection.
+
+    ``MultiQueryRetriever`` asks the LLM to rewrite the question and embeds
+    the rewrites again for each retriever it wraps, so searching N PDFs cost
+    N chat round-trips. The planner makes one LLM call, embeds the original
+    question and its rewrites in one batch, and searches any number of
+    collections with those vectors.
+    """
+
+    def __init__(
+        self,
+        llm: BaseLanguageModel,
+        embeddings: Embeddings,
+        prompt: PromptTemplate = QUERY_EXPANSION_PROMPT,
+        include_original: bool = True
+    ):
+        self.chain = prompt | llm | StrOutputParser()
+        self.embeddings = embeddings
+        self.include_original = include_original
+
+    @staticmethod
+    def _parse_queries(question: str, output: str) -> List[str]:
+        """Alternative phrasings from the LLM output, one per line."""
+        queries = []
+        for line in output.strip().split("\n"):
+            query = _LIST_MARKER.sub("", line).strip()
+            if query and query not in queries and query != question:
+                queries.append(query)
+        return queries
+
+    def generate_queries(self, question: str) -> List[str]:
+        """Ask the LLM for alternative phrasings of the question."""
+        try:
+            output = self.chain.invoke({"question": question})
+        except Exception as e:
+            logger.warning(f"⚠️ Query expansion failed, searching with the question only: {e}")
+            return []
+        return self._parse_queries(question, output)
+
+    async def agenerate_queries(self, question: str) -> List[str]:
+        """Ask the LLM for alternative phrasings of the question, awaiting its reply."""
+        try:
+            output = await self.chain.ainvoke({"question": question})
+        except Exception as e:
+            logger.warning(f"⚠️ Query expansion failed, searching with the question only: {e}")
+            return []
+        return self._parse_queries(question, output)
+
+    def plan(self, question: str) -> RetrievalPlan:
+        """Generate the search queries and embed them in one batch."""
+        queries = self.generate_queries(question)
+        if self.include_original or not queries:
+            queries = [question] + queries
+        vectors = self.embeddings.embed_documents(queries)
+        logger.info(f"Planned {len(queries)} search queries for: {question}")
+        return RetrievalPlan(question, queries, vectors)
+
+    async def aplan(self, question: str) -> RetrievalPlan:
+        """Async ``plan``: the LLM and embedding calls are awaited."""
+        queries = await self.agenerate_queries(question)
+        if self.include_original or not queries:
+            queries = [question] + queries
+        vectors = await self.embeddings.aembed_documents(queries)
+        logger.info(f"Planned {len(queries)} search queries for: {question}")
+        return RetrievalPlan(question, queries, vectors)
+
+    @staticmethod
+    def search(
+        plan: RetrievalPlan,
+        vector_db: LangChainVectorStore,
+        k: int = 3,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[Document]:
+        """Search one collection with every planned query vector.
+
+        A chunk found by several queries keeps its best relevance score,
+        stored in ``metadata["score"]``.
+
+        Returns:
+            The unique documents found, best score first (query order then
+            rank order when the store has no scores)
+        """
+        kwargs = {"filter": filter} if filter else {}
+        best: Dict[Any, Document] = {}
+        for vector in plan.vectors:
+            for doc, score in scored_search_by_vector(vector_db, vector, k, **kwargs):
+                key = chunk_key(doc)
+                if key not in best:
+                    best[key] = doc
+                    doc.metadata["score"] = score
+                elif score is not None and score > (best[key].metadata["score"] or 0.0):
+                    best[key].metadata["score"] = score
+        docs = list(best.values())
+        if all(doc.metadata["score"] is not None for doc in docs):
+            docs.sort(key=lambda doc: doc.metadata["score"], reverse=True)
+        return docs
+
+    def search_all(
+        self,
+        plan: RetrievalPlan,
+        targets: List[SearchTarget],
+        timeout: Optional[float] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ) -> List[SearchResult]:
+        """Search every target concurrently on a bounded worker pool.
+
+        Each target gets ``timeout`` seconds from when a worker starts on
+        it; targets that fail or run out of time are reported as such and
+        the others' results are still returned. A timed-out search keeps
+        its worker until it finishes, but its result is discarded.
+
+        Returns:
+            One result per target, in target order
+        """
+        executor = executor or get_search_executor()
+        started: Dict[int, float] = {}
+
+        def run(i: int, target: SearchTarget) -> List[Document]:
+            started[i] = time.monotonic()
+            return self.search(plan, target.open_collection(), k=target.k, filter=target.filter)
+
+        futures = {executor.submit(run, i, target): i for i, target in enumerate(targets)}
+        results: List[Optional[SearchResult]] = [None] * len(targets)
+        pending = set(futures)
+        while pending:
+            wake = None
+            if timeout is not None:
+                running = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+                # Queued searches have no deadline yet: check back shortly
+                wake = max(0.0, min(running) - time.monotonic()) if running else 0.01
+                if len(running) < len(pending):
+                    wake = min(wake, 0.01)
+            done, pending = wait(pending, timeout=wake, return_when=FIRST_COMPLETED)
+
+            now = time.monotonic()
+            for future in done:
+                i = futures[future]
+                elapsed = now - started.get(i, now)
+                try:
+                    results[i] = SearchResult(targets[i], docs=future.result(), seconds=elapsed)
+                except Exception as e:
+                    results[i] = SearchResult(targets[i], error=str(e), seconds=elapsed)
+            if timeout is not None:
+                for future in list(pending):
+                    i = futures[future]
+                    if i in started and now - started[i] >= timeout:
+                        pending.discard(future)
+                        future.cancel()
+                        results[i] = SearchResult(targets[i], timed_out=True, seconds=now - started[i])
+                        logger.warning(f"⏱️ Search of {targets[i].label} timed out after {timeout}s")
+        return results
+
+    async def asearch_all(
+        self,
+        plan: RetrievalPlan,
+        targets: List[SearchTarget],
+        timeout: Optional[float] = None,
+        executor: Optional[ThreadPoolExecutor] = None
+    ) -> List[SearchResult]:
+        """Async ``search_all``: searches run on the worker pool and are awaited.
+
+        The event loop stays free while collections are searched; only the
+        pool's workers do the CPU-bound work. Timeouts work as in
+        ``search_all``, counted from when a worker starts on the target.
+
+        Returns:
+            One result per target, in target order
+        """
+        executor = executor or get_search_executor()
+        loop = asyncio.get_running_loop()
+
+        async def search_one(target: SearchTarget) -> SearchResult:
+            started = asyncio.Event()
+            started_at: List[float] = []
+
+            def run() -> List[Document]:
+                started_at.append(time.monotonic())
+                loop.call_soon_threadsafe(started.set)
+                return self.search(plan, target.open_collection(), k=target.k, filter=target.filter)
+
+            future = asyncio.wrap_future(executor.submit(run))
+            if timeout is not None:
+                # Queued searches have no deadline until a worker picks them up
+                waiting = asyncio.ensure_future(started.wait())
+                await asyncio.wait({future, waiting}, return_when=asyncio.FIRST_COMPLETED)
+                waiting.cancel()
+            try:
+                docs = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Search of {target.label} timed out after {timeout}s")
+                return SearchResult(target, timed_out=True, seconds=time.monotonic() - started_at[0])
+            except Exception as e:
+                elapsed = time.monotonic() - started_at[0] if started_at else 0.0
+                return SearchResult(target, error=str(e), seconds=elapsed)
+            return SearchResult(target, docs=docs, seconds=time.monotonic() - started_at[0])
+
+        return list(await asyncio.gather(*(search_one(target) for target in targets)))
@@ -0,0 +1,279 @@
+"""Storage backends for VectorStore.
+
+Open handles (Chroma collections and clients, flat indexes) are kept in the
+process-wide ``CollectionRegistry``, so steady-state queries and writes do
+no client or index setup.
+"""
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore as LangChainVectorStore
+
+from .collection_registry import CollectionRegistry, get_collection_registry
+from .flat_index import FlatIndex, FlatVectorStore, get_flat_index, pdf_ids_from_filter
+
+logger = logging.getLogger(__name__)
+
+
+def is_missing_collection(error: BaseException) -> bool:
+    """Whether a backend error says the collection does not exist."""
+    if isinstance(error, FileNotFoundError):
+        return True
+    try:
+        from chromadb.errors import NotFoundError
+    except ImportError:
+        return False
+    return isinstance(error, NotFoundError)
+
+
+class VectorBackend:
+    """Where VectorStore keeps its collections.
+
+    ``open`` returns a LangChain vector store for retrieval (``as_retriever``,
+    ``similarity_search`` with ``pdf_id`` filters); the other methods cover
+    the bulk operations ingestion, deletion and migration need.
+    """
+
+    name = "base"
+
+    def __init__(
+        self,
+        persist_directory: str,
+        quantization: str = "none",
+        rescore_factor: Optional[int] = None,
+        registry: Optional[CollectionRegistry] = None
+    ):
+        self.persist_directory = persist_directory
+        self.quantization = quantization
+        self.rescore_factor = rescore_factor
+        self.registry = registry or get_collection_registry()
+
+    def _key(self, collection_name: str) -> Tuple[str, str, str]:
+        return self.name, str(Path(self.persist_directory).resolve()), collection_name
+
+    def invalidate(self, collection_name: str) -> None:
+        """Forget every cached handle for a collection."""
+        key = self._key(collection_name)
+        self.registry.invalidate_where(lambda k: k[:3] == key)
+
+    def open(self, collection_name: str, embeddings: Embeddings) -> LangChainVectorStore:
+        """Open a collection, creating it if it does not exist."""
+        raise NotImplementedError
+
+    def upsert(
+        self,
+        collection_name: str,
+        ids: List[str],
+        documents: List[Document],
+        vectors: List[List[float]]
+    ) -> None:
+        """Write documents with precomputed vectors."""
+        raise NotImplementedError
+
+    def delete_where(self, collection_name: str, where: Dict[str, Any]) -> None:
+        """Delete the documents matching a ``pdf_id`` filter."""
+        raise NotImplementedError
+
+    def drop(self, collection_name: str) -> None:
+        """Delete a whole collection."""
+        raise NotImplementedError
+
+    def count(self, collection_name: str) -> int:
+        """Number of documents in a collection."""
+        raise NotImplementedError
+
+    def iter_collection(
+        self,
+        collection_name: str,
+        batch_size: int
+    ) -> Iterator[Tuple[List[str], List[Document], List[List[float]]]]:
+        """Read a collection back in batches of ``(ids, documents, vectors)``."""
+        raise NotImplementedError
+
+
+# Bytes per stored vector on top of its float32 values (HNSW links, ids)
+CHROMA_ROW_OVERHEAD_BYTES = 128
+
+_chroma_clients: Dict[str, Any] = {}
+_chroma_clients_lock = threading.Lock()
+
+
+def _chroma_client(persist_directory: str):
+    """Shared persistent client per directory.
+
+    Uses the same settings as ``Chroma(persist_directory=...)``, so code
+    that still opens Chroma directly shares the underlying system.
+    """
+    import chromadb
+    from chromadb.config import Settings
+
+    key = str(Path(persist_directory).resolve())
+    with _chroma_clients_lock:
+        client = _chroma_clients.get(key)
+        if client is None:
+            client = chromadb.Client(Settings(is_persistent=True, persist_directory=persist_directory))
+            _chroma_clients[key] = client
+        return client
+
+
+def _chroma_size(collection) -> int:
+    """Estimated memory of a collection's vector index."""
+    count = collection.count()
+    if not count:
+        return 0
+    sample = collection.get(limit=1, include=["embeddings"])["embeddings"]
+    dim = len(sample[0]) if len(sample) else 0
+    return count * (4 * dim + CHROMA_ROW_OVERHEAD_BYTES)
+
+
+class ChromaBackend(VectorBackend):
+    """Collections in a persistent ChromaDB directory."""
+
+    name = "chroma"
+
+    def __init__(
+        self,
+        persist_directory: str,
+        quantization: str = "none",
+        rescore_factor: Optional[int] = None,
+        registry: Optional[CollectionRegistry] = None
+    ):
+        if quantization != "none":
+            raise ValueError("Quantized storage requires the flat vector backend")
+        super().__init__(persist_directory, registry=registry)
+
+    def open(self, collection_name: str, embeddings: Embeddings = None) -> LangChainVectorStore:
+        from langchain_community.vectorstores import Chroma
+
+        # The collection entry carries the index's memory; per-embeddings
+        # LangChain wrappers around it are charged nothing. Vector stores
+        # share their embeddings objects (see get_cached_embeddings), so
+        # there is one wrapper per collection and configuration
+        self._collection(collection_name)
+        return self.registry.get(
+            self._key(collection_name) + (id(embeddings),),
+            lambda: Chroma(
+                client=_chroma_client(self.persist_directory),
+                embedding_function=embeddings,
+                collection_name=collection_name
+            )
+        )
+
+    def _collection(self, collection_name: str):
+        return self.registry.get(
+            self._key(collection_name),
+            lambda: _chroma_client(self.persist_directory).get_or_create_collection(collection_name),
+            size_of=_chroma_size
+        )
+
+    def upsert(self, collection_name, ids, documents, vectors) -> None:
+        self._collection(collection_name).upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents]
+        )
+        self.registry.update_size(self._key(collection_name), _chroma_size)
+
+    def delete_where(self, collection_name, where) -> None:
+        self._collection(collection_name).delete(where=where)
+        self.registry.update_size(self._key(collection_name), _chroma_size)
+
+    def drop(self, collection_name) -> None:
+        self.invalidate(collection_name)
+        try:
+            _chroma_client(self.persist_directory).delete_collection(collection_name)
+        except Exception as e:
+            # Already gone
+            logger.debug(f"Collection {collection_name} not deleted: {e}")
+
+    def count(self, collection_name) -> int:
+        return self._collection(collection_name).count()
+
+    def iter_collection(self, collection_name, batch_size):
+        collection = self._collection(collection_name)
+        offset = 0
+        while True:
+            result = collection.get(
+                include=["documents", "metadatas", "embeddings"],
+                limit=batch_size,
+                offset=offset
+            )
+            if not result["ids"]:
+                return
+            documents = [
+                Document(page_content=text or "", metadata=metadata or {})
+                for text, metadata in zip(result["documents"], result["metadatas"])
+            ]
+            vectors = [list(map(float, vector)) for vector in result["embeddings"]]
+            yield result["ids"], documents, vectors
+            offset += len(result["ids"])
+
+
+def _flat_size(index: FlatIndex) -> int:
+    """Memory of a flat index: its first-pass vectors or codes plus per-row bookkeeping."""
+    return index.memory_usage()["resident_bytes"] + 100 * len(index.ids)
+
+
+class FlatBackend(VectorBackend):
+    """Collections as memory-mapped flat indexes under ``<persist_directory>/flat``.
+
+    Exhaustive search with no client start-up or metadata database; suited
+    to corpora up to a few hundred thousand chunks, or millions with int8 or
+    binary ``quantization``.
+    """
+
+    name = "flat"
+
+    def _index(self, collection_name: str) -> FlatIndex:
+        return self.registry.get(
+            self._key(collection_name),
+            lambda: get_flat_index(
+                Path(self.persist_directory) / "flat" / collection_name,
+                self.quantization,
+                self.rescore_factor
+            ),
+            size_of=_flat_size
+        )
+
+    def open(self, collection_name: str, embeddings: Embeddings = None) -> LangChainVectorStore:
+        return FlatVectorStore(self._index(collection_name), embeddings)
+
+    def upsert(self, collection_name, ids, documents, vectors) -> None:
+        self._index(collection_name).upsert(
+            ids,
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents],
+            vectors
+        )
+        self.registry.update_size(self._key(collection_name), _flat_size)
+
+    def delete_where(self, collection_name, where) -> None:
+        self._index(collection_name).delete(pdf_ids=pdf_ids_from_filter(where))
+        self.registry.update_size(self._key(collection_name), _flat_size)
+
+    def drop(self, collection_name) -> None:
+        self._index(collection_name).drop()
+        self.invalidate(collection_name)
+
+    def count(self, collection_name) -> int:
+        return self._index(collection_name).count()
+
+    def iter_collection(self, collection_name, batch_size):
+        return self._index(collection_name).iter_rows(batch_size)
+
+
+BACKENDS = {backend.name: backend for backend in (ChromaBackend, FlatBackend)}
+
+
+def get_backend(name: str, persist_directory: str, **options: Any) -> VectorBackend:
+    """Create the backend registered under ``name``."""
+    try:
+        backend_cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown vector backend '{name}', expected one of {sorted(BACKENDS)}")
+    return backend_cls(persist_directory, **options)
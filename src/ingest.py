@@ -0,0 +1,359 @@
+"""Bulk PDF ingestion from a directory.
+
+Usage:
+    python -m src.ingest <dir> [--workers N] [--checkpoint PATH]
+
+Worker processes hash, parse, split and embed PDFs in parallel; the main
+process owns every write to the vector store, the API database and the checkpoint
+file. Results land in the same content-addressed store, collections and
+``pdfs`` table the API uses, so bulk-ingested PDFs show up in
+``GET /api/v1/pdfs`` like uploaded ones.
+
+Every finished file is appended to the checkpoint (JSON lines). Re-running
+the same command after a crash skips files recorded there, and files whose
+content is already in the database are skipped too.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from src.api.config import settings
+from src.api.database import SessionLocal, PDFMetadata
+from src.api.services.lexical_search import LexicalIndex
+from src.api.services.pdf_service import vector_collection_for_hash
+from src.api.services.retrieval_cache import bump_corpus_version
+from src.core.content_store import (
+    ContentStore,
+    sha256_file,
+    pdf_id_for_hash,
+    collection_name_for_hash,
+)
+from src.core.document import DocumentProcessor, count_pdf_pages
+from src.core.embeddings import VectorStore
+from src.core.ollama_pool import OllamaPool
+from src.core.residency import PINNED
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, set up once by _init_worker
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(
+    known_hashes: Set[str],
+    embed_batch_size: int,
+    ollama_urls: List[str],
+    embed_keep_alive: Optional[int]
+) -> None:
+    """Build the processor and embeddings each worker process reuses.
+
+    Each worker gets its own pool over ``ollama_urls``: Ollama clients are
+    not shared across processes.
+    """
+    _worker["known_hashes"] = known_hashes
+    _worker["embed_batch_size"] = embed_batch_size
+    _worker["content_store"] = ContentStore(settings.PDF_STORAGE_DIR)
+    _worker["doc_processor"] = DocumentProcessor(
+        chunk_size=7500,
+        chunk_overlap=100,
+        parse_workers=1,  # parallelism comes from running one file per process
+        pages_per_task=settings.PDF_PAGES_PER_TASK,
+        tiered=settings.PDF_TIERED_EXTRACTION
+    )
+    _worker["vector_store"] = VectorStore(
+        embedding_model=settings.EMBEDDING_MODEL,
+        persist_directory=settings.VECTOR_DB_DIR,
+        cache_path=settings.EMBEDDING_CACHE_PATH or None,
+        cache_max_bytes=settings.EMBEDDING_CACHE_MAX_BYTES,
+        keep_alive=embed_keep_alive,
+        pool=OllamaPool(
+            ollama_urls,
+            failure_threshold=settings.OLLAMA_FAILURE_THRESHOLD,
+            reset_seconds=settings.OLLAMA_CIRCUIT_RESET_SECONDS,
+            max_attempts=settings.OLLAMA_MAX_ATTEMPTS
+        )
+    )
+
+
+def process_file(path: str) -> Dict[str, Any]:
+    """Hash, parse, split and embed one PDF in a worker process.
+
+    Returns:
+        Result dict with ``status`` of ``embedded``, ``skipped`` or
+        ``failed``; embedded results carry the chunks and their vectors
+    """
+    started = time.perf_counter()
+    result: Dict[str, Any] = {"path": path, "status": "failed"}
+    try:
+        content_hash = sha256_file(path)
+        result["content_hash"] = content_hash
+        if content_hash in _worker["known_hashes"]:
+            result["status"] = "skipped"
+            return result
+
+        _, stored_path = _worker["content_store"].put_file(path, content_hash=content_hash)
+        pdf_id = pdf_id_for_hash(content_hash)
+        filename = os.path.basename(path)
+
+        doc_processor: DocumentProcessor = _worker["doc_processor"]
+        chunks = list(doc_processor.iter_chunks(doc_processor.iter_pages(stored_path)))
+        for i, chunk in enumerate(chunks):
+            chunk.metadata.update({
+                "pdf_id": pdf_id,
+                "pdf_name": filename,
+                "chunk_index": i,
+                "source_file": filename
+            })
+
+        embeddings = _worker["vector_store"].embeddings
+        batch_size = _worker["embed_batch_size"]
+        vectors: List[List[float]] = []
+        for start in range(0, len(chunks), batch_size):
+            vectors.extend(embeddings.embed_documents(
+                [chunk.page_content for chunk in chunks[start:start + batch_size]]
+            ))
+
+        result.update({
+            "status": "embedded",
+            "file_path": str(stored_path),
+            "pages": count_pdf_pages(stored_path),
+            "chunks": [(chunk.page_content, chunk.metadata) for chunk in chunks],
+            "vectors": vectors,
+        })
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["seconds"] = time.perf_counter() - started
+    return result
+
+
+class Checkpoint:
+    """Append-only JSON-lines record of files that have been handled.
+
+    Entries are keyed by path, size and mtime, so a file that changes on
+    disk after being ingested is picked up again.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done: Dict[str, Dict[str, Any]] = {}
+        if path.exists():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn final line from a crash
+                    if entry.get("status") in ("ingested", "skipped"):
+                        self.done[entry["path"]] = entry
+                    else:
+                        self.done.pop(entry["path"], None)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(path, "a")
+
+    @staticmethod
+    def _stat(path: Path) -> Dict[str, Any]:
+        stat = path.stat()
+        return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+    def is_done(self, path: Path) -> bool:
+        """Whether a file was handled, unchanged, by an earlier run."""
+        entry = self.done.get(str(path))
+        return entry is not None and all(entry.get(k) == v for k, v in self._stat(path).items())
+
+    def record(self, path: Path, **fields: Any) -> None:
+        """Durably append the outcome for a file."""
+        entry = {"path": str(path), **self._stat(path), **fields}
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def find_pdfs(directory: Path, recursive: bool = True) -> List[Path]:
+    """List PDF files under a directory, in a stable order."""
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        path.resolve() for path in directory.glob(pattern)
+        if path.is_file() and path.suffix.lower() == ".pdf"
+    )
+
+
+def _bounded_results(executor: ProcessPoolExecutor, paths: List[Path], window: int) -> Iterator[Dict[str, Any]]:
+    """Submit files with at most ``window`` results outstanding, yielding as they finish."""
+    pending = deque()
+    for path in paths:
+        pending.append(executor.submit(process_file, str(path)))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _store_result(result: Dict[str, Any], vector_store: VectorStore, db) -> Optional[PDFMetadata]:
+    """Upsert a worker's vectors and record the PDF. Returns None if it already exists."""
+    content_hash = result["content_hash"]
+    if db.query(PDFMetadata).filter(PDFMetadata.content_hash == content_hash).first():
+        return None
+
+    pdf_id = pdf_id_for_hash(content_hash)
+    collection_name = collection_name_for_hash(content_hash)
+    vector_collection = vector_collection_for_hash(content_hash)
+    chunks = [Document(page_content=text, metadata=metadata) for text, metadata in result["chunks"]]
+    batch_size = settings.EMBED_BATCH_SIZE
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        vector_store.upsert_vectors(
+            batch,
+            result["vectors"][start:start + batch_size],
+            collection_name=vector_collection,
+            ids=[f"{pdf_id}:{chunk.metadata['chunk_index']}" for chunk in batch]
+        )
+    LexicalIndex().add_chunks(chunks, db)
+
+    pdf = PDFMetadata(
+        pdf_id=pdf_id,
+        name=os.path.basename(result["path"]),
+        collection_name=collection_name,
+        upload_timestamp=datetime.now(),
+        doc_count=len(chunks),
+        page_count=result["pages"],
+        is_sample=False,
+        file_path=result["file_path"],
+        content_hash=content_hash,
+        ref_count=1,
+        vector_collection=vector_collection
+    )
+    db.add(pdf)
+    bump_corpus_version(db)
+    db.commit()
+    return pdf
+
+
+def ingest_directory(
+    directory: Path,
+    workers: int,
+    checkpoint_path: Path,
+    recursive: bool = True
+) -> Dict[str, int]:
+    """Ingest every PDF under a directory.
+
+    Args:
+        directory: Directory to scan for PDFs
+        workers: Number of worker processes
+        checkpoint_path: JSON-lines checkpoint file
+        recursive: Also scan subdirectories
+
+    Returns:
+        Counts of ingested, skipped and failed files
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    all_paths = find_pdfs(directory, recursive)
+    paths = [path for path in all_paths if not checkpoint.is_done(path)]
+    print(f"Found {len(all_paths)} PDF(s), {len(all_paths) - len(paths)} already in checkpoint")
+
+    db = SessionLocal()
+    known_hashes = {row[0] for row in db.query(PDFMetadata.content_hash) if row[0]}
+    vector_store = VectorStore(
+        embedding_model=settings.EMBEDDING_MODEL,
+        persist_directory=settings.VECTOR_DB_DIR,
+        backend=settings.VECTOR_BACKEND,
+        quantization=settings.VECTOR_QUANTIZATION,
+        rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+        collection_cache_max_bytes=settings.COLLECTION_CACHE_MAX_BYTES
+    )
+    counts = {"ingested": 0, "skipped": 0, "failed": 0}
+    pages = chunks = 0
+    started = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(
+                known_hashes,
+                settings.EMBED_BATCH_SIZE,
+                settings.OLLAMA_HOSTS or [settings.OLLAMA_HOST],
+                # Do not undo the API's pin on the embedding model
+                PINNED if settings.PIN_EMBEDDING_MODEL else None
+            )
+        ) as executor:
+            for n, result in enumerate(_bounded_results(executor, paths, 2 * workers), start=1):
+                path = Path(result["path"])
+                status = result["status"]
+                pdf = None
+                if status == "embedded":
+                    try:
+                        pdf = _store_result(result, vector_store, db)
+                        status = "ingested" if pdf else "skipped"
+                    except Exception as e:
+                        db.rollback()
+                        status, result["error"] = "failed", f"{type(e).__name__}: {e}"
+
+                counts[status] += 1
+                if pdf:
+                    pages += pdf.page_count
+                    chunks += pdf.doc_count
+                checkpoint.record(
+                    path,
+                    status=status,
+                    content_hash=result.get("content_hash"),
+                    pdf_id=pdf.pdf_id if pdf else None,
+                    error=result.get("error")
+                )
+
+                elapsed = time.perf_counter() - started
+                detail = f"{pdf.page_count} pages, {pdf.doc_count} chunks" if pdf else result.get("error", "already ingested")
+                print(
+                    f"[{n}/{len(paths)}] {status:<8} {path.name} ({detail}) | "
+                    f"{pages / elapsed:.1f} pages/s, {chunks / elapsed:.1f} chunks/s"
+                )
+    finally:
+        db.close()
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Done in {elapsed:.1f}s: {counts['ingested']} ingested, {counts['skipped']} skipped, "
+        f"{counts['failed']} failed | {pages} pages, {chunks} chunks"
+    )
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        prog="python -m src.ingest",
+        description="Ingest a directory of PDFs into the vector store and API database."
+    )
+    parser.add_argument("directory", type=Path, help="Directory containing PDFs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per CPU core)")
+    parser.add_argument("--checkpoint", type=Path, default=Path("data/ingest_checkpoint.jsonl"),
+                        help="Checkpoint file used to resume interrupted runs")
+    parser.add_argument("--no-recursive", action="store_true", help="Do not scan subdirectories")
+    args = parser.parse_args(argv)
+
+    if not args.directory.is_dir():
+        print(f"Error: {args.directory} is not a directory")
+        return 1
+
+    logging.basicConfig(level=logging.WARNING)
+    counts = ingest_directory(args.directory, max(1, args.workers), args.checkpoint, not args.no_recursive)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""Data migrations.
+
+Usage:
+    python -m src.migrate shared-collection [--delete-old] [--batch-size N]
+    python -m src.migrate backend --source chroma --target flat
+    python -m src.migrate lexical-index
+
+``shared-collection`` copies every PDF's per-PDF Chroma collection into the
+shared collection (``SHARED_COLLECTION_NAME``), tagging each chunk with its
+``pdf_id``. Stored vectors are copied as-is, so nothing is re-embedded. Each
+PDF is switched over with its own commit once its chunks are copied, so an
+interrupted migration can simply be run again. Set
+``VECTOR_COLLECTION_MODE=shared`` so new uploads go to the same collection.
+
+``backend`` copies every PDF's collection from one vector backend to
+another (for example Chroma to the flat index) before switching
+``VECTOR_BACKEND``.
+
+``lexical-index`` fills the keyword (FTS5) index from the chunks already
+in the vector store, for PDFs ingested before hybrid search existed.
+"""
+import argparse
+import logging
+import sys
+from typing import Dict, List, Optional
+
+from src.api.config import settings
+from src.api.database import SessionLocal, PDFMetadata, ChunkText
+from src.api.services.lexical_search import LexicalIndex
+from src.api.services.retrieval_cache import bump_corpus_version
+from src.core.embeddings import VectorStore
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_to_shared_collection(
+    vector_store: VectorStore,
+    db,
+    shared_collection: str,
+    batch_size: int = 256,
+    delete_old: bool = False
+) -> int:
+    """Move per-PDF collections into the shared collection.
+
+    Args:
+        vector_store: Vector store holding both the old and the shared collections
+        db: Database session
+        shared_collection: Name of the shared collection
+        batch_size: Chunks copied per batch
+        delete_old: Drop each per-PDF collection after it has been copied
+
+    Returns:
+        Number of PDFs migrated
+    """
+    pdfs = db.query(PDFMetadata).all()
+    pending = [pdf for pdf in pdfs if pdf.search_collection != shared_collection]
+    print(f"{len(pdfs) - len(pending)} of {len(pdfs)} PDF(s) already in '{shared_collection}'")
+
+    migrated = 0
+    for pdf in pending:
+        source = pdf.search_collection
+        copied = 0
+        for ids, documents, vectors in vector_store.iter_collection(source, batch_size):
+            new_ids = []
+            for old_id, doc in zip(ids, documents):
+                doc.metadata["pdf_id"] = pdf.pdf_id
+                doc.metadata.setdefault("pdf_name", pdf.name)
+                chunk_index = doc.metadata.get("chunk_index")
+                new_ids.append(f"{pdf.pdf_id}:{chunk_index if chunk_index is not None else old_id}")
+            vector_store.upsert_vectors(documents, vectors, shared_collection, new_ids)
+            copied += len(ids)
+
+        pdf.vector_collection = shared_collection
+        bump_corpus_version(db)
+        db.commit()
+        if delete_old:
+            vector_store.drop_collection(source)
+        migrated += 1
+        print(f"Migrated {pdf.name} ({pdf.pdf_id}): {copied} chunk(s) from '{source}'")
+
+    return migrated
+
+
+def copy_backend(source: VectorStore, target: VectorStore, db, batch_size: int = 256) -> int:
+    """Copy every PDF's collection from one vector backend to another.
+
+    Returns:
+        Number of collections copied
+    """
+    collections = sorted({pdf.search_collection for pdf in db.query(PDFMetadata)})
+    for name in collections:
+        copied = 0
+        for ids, documents, vectors in source.iter_collection(name, batch_size):
+            target.upsert_vectors(documents, vectors, name, ids)
+            copied += len(ids)
+        print(f"Copied '{name}': {copied} chunk(s)")
+    return len(collections)
+
+
+def build_lexical_index(vector_store: VectorStore, db, batch_size: int = 256) -> int:
+    """Add every PDF's chunks to the keyword index, reading them from the vector store.
+
+    PDFs that already have chunks in the index are skipped.
+
+    Returns:
+        Number of PDFs indexed
+    """
+    indexed = {row[0] for row in db.query(ChunkText.pdf_id).distinct()}
+    pending: Dict[str, Dict[str, PDFMetadata]] = {}
+    for pdf in db.query(PDFMetadata):
+        if pdf.pdf_id not in indexed:
+            pending.setdefault(pdf.search_collection, {})[pdf.pdf_id] = pdf
+
+    lexical_index = LexicalIndex()
+    for collection_name, pdfs in pending.items():
+        first = next(iter(pdfs.values()))
+        per_pdf = len(pdfs) == 1 and collection_name == first.collection_name
+        chunks = 0
+        for ids, documents, _ in vector_store.iter_collection(collection_name, batch_size):
+            batch_ids, batch = [], []
+            for chunk_id, doc in zip(ids, documents):
+                if per_pdf:
+                    doc.metadata.setdefault("pdf_id", first.pdf_id)
+                if doc.metadata.get("pdf_id") in pdfs:
+                    batch_ids.append(chunk_id)
+                    batch.append(doc)
+            lexical_index.add_chunks(batch, db, ids=batch_ids)
+            bump_corpus_version(db)
+            db.commit()
+            chunks += len(batch)
+        print(f"Indexed '{collection_name}': {chunks} chunk(s) from {len(pdfs)} PDF(s)")
+    return sum(len(pdfs) for pdfs in pending.values())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(prog="python -m src.migrate", description="Data migrations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    shared = subparsers.add_parser(
+        "shared-collection",
+        help="Move per-PDF vector collections into the shared collection"
+    )
+    shared.add_argument("--collection", default=settings.SHARED_COLLECTION_NAME,
+                        help="Shared collection name (default: SHARED_COLLECTION_NAME)")
+    shared.add_argument("--batch-size", type=int, default=256, help="Chunks copied per batch")
+    shared.add_argument("--delete-old", action="store_true",
+                        help="Delete each per-PDF collection once it has been copied")
+    backend = subparsers.add_parser("backend", help="Copy all collections to another vector backend")
+    backend.add_argument("--source", default="chroma", help="Backend to copy from (default: chroma)")
+    backend.add_argument("--target", default="flat", help="Backend to copy to (default: flat)")
+    backend.add_argument("--batch-size", type=int, default=256, help="Chunks copied per batch")
+    lexical = subparsers.add_parser("lexical-index", help="Build the keyword index from stored chunks")
+    lexical.add_argument("--batch-size", type=int, default=256, help="Chunks read per batch")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.command == "backend":
+        db = SessionLocal()
+        try:
+            copied = copy_backend(
+                VectorStore(persist_directory=settings.VECTOR_DB_DIR, backend=args.source),
+                VectorStore(persist_directory=settings.VECTOR_DB_DIR, backend=args.target),
+                db,
+                args.batch_size
+            )
+        finally:
+            db.close()
+        print(f"Done: {copied} collection(s) copied; set VECTOR_BACKEND={args.target} to use them")
+        return 0
+
+    vector_store = VectorStore(
+        embedding_model=settings.EMBEDDING_MODEL,
+        persist_directory=settings.VECTOR_DB_DIR,
+        backend=settings.VECTOR_BACKEND,
+        quantization=settings.VECTOR_QUANTIZATION,
+        rescore_factor=settings.VECTOR_RESCORE_FACTOR,
+        collection_cache_max_bytes=settings.COLLECTION_CACHE_MAX_BYTES
+    )
+    db = SessionLocal()
+    if args.command == "lexical-index":
+        try:
+            indexed = build_lexical_index(vector_store, db, args.batch_size)
+        finally:
+            db.close()
+        print(f"Done: {indexed} PDF(s) added to the keyword index")
+        return 0
+
+    try:
+        migrated = migrate_to_shared_collection(
+            vector_store, db, args.collection, args.batch_size, args.delete_old
+        )
+    finally:
+        db.close()
+
+    print(f"Done: {migrated} PDF(s) migrated")
+    if settings.VECTOR_COLLECTION_MODE != "shared":
+        print("Set VECTOR_COLLECTION_MODE=shared so new uploads use the shared collection")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""Shared fixtures for the API tests."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.ollama_stub import OllamaStub
+from src.api import database, dependencies
+from src.api.config import settings
+from src.api.services import ingestion_queue as ingestion_queue_module
+
+
+@pytest.fixture
+def ollama_stub():
+    """A stub Ollama server that knows every model."""
+    with OllamaStub(base_latency=0.0, per_text_latency=0.0) as stub:
+        yield stub
+
+
+@pytest.fixture
+def api_db(tmp_path, monkeypatch, ollama_stub):
+    """Session factory for a fresh API database, with data directories under ``tmp_path``.
+
+    Everything that opens its own sessions (requests, the ingestion queue)
+    uses this database, and Ollama calls go to ``ollama_stub``.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}", connect_args={"check_same_thread": False})
+    database.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for ddl in database.FTS_DDL:
+            conn.execute(text(ddl))
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(dependencies, "SessionLocal", session_factory)
+    monkeypatch.setattr(ingestion_queue_module, "SessionLocal", session_factory)
+
+    monkeypatch.setattr(settings, "PDF_STORAGE_DIR", str(tmp_path / "pdfs"))
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path / "vectors"))
+    monkeypatch.setattr(settings, "INGEST_WORK_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.db"))
+    monkeypatch.setattr(settings, "OLLAMA_HOSTS", [ollama_stub.url])
+    # Process-wide caches are keyed on corpus versions that restart with
+    # every test database
+    monkeypatch.setattr(settings, "RETRIEVAL_CACHE_ENTRIES", 0)
+    yield session_factory
+    engine.dispose()
+
+
+@pytest.fixture
+def ingestion_queue():
+    """The queue upload requests submit jobs to."""
+    queue = ingestion_queue_module.IngestionQueue(max_workers=1)
+    yield queue
+    queue.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def client(api_db, ingestion_queue):
+    """Test client for the API; the lifespan hook does not run."""
+    from src.api.main import app
+
+    app.dependency_overrides[dependencies.get_ingestion_queue] = lambda: ingestion_queue
+    yield TestClient(app)
+    app.dependency_overrides.clear()
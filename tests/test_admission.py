@@ -0,0 +1,195 @@
+"""Test per-model admission control."""
+import asyncio
+import threading
+import time
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.core.admission import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    AdmissionRejected,
+    AdmissionScheduler,
+)
+from src.core.embedding_batcher import BatchingEmbeddings
+
+
+class SlowEmbeddings(Embeddings):
+    """Fake embeddings that track how many calls overlap."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return [[1.0] for _ in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def wait_until(condition, timeout=2.0):
+    """Poll until ``condition()`` is true."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def test_limits_concurrency():
+    """No more than max_concurrent callers hold a slot at once."""
+    scheduler = AdmissionScheduler("m", max_concurrent=2, max_queue=10)
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def work():
+        with scheduler.slot():
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak[0] == 2
+    stats = scheduler.stats()
+    assert stats["admitted"] == 8
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+
+
+def test_interactive_requests_jump_the_queue():
+    """A queued interactive request is admitted before earlier background ones."""
+    scheduler = AdmissionScheduler("m", max_concurrent=1, max_queue=10)
+    order = []
+    scheduler.acquire()
+
+    def work(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    background = threading.Thread(target=work, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+    interactive = threading.Thread(target=work, args=("interactive", PRIORITY_INTERACTIVE))
+    interactive.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 2)
+
+    scheduler.release()
+    background.join()
+    interactive.join()
+
+    assert order == ["interactive", "background"]
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    """Past max_queue waiting requests, new ones are refused at once."""
+    scheduler = AdmissionScheduler("m", max_concurrent=1, max_queue=1)
+    scheduler.acquire()
+    waiter = threading.Thread(target=scheduler.acquire)
+    waiter.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        scheduler.check()
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after >= 1
+    with pytest.raises(AdmissionRejected):
+        scheduler.acquire()
+    assert scheduler.stats()["rejected"] == 2
+
+    scheduler.release()
+    waiter.join()
+
+
+def test_queue_timeout_leaves_the_queue():
+    """A request that waits too long is rejected and no longer queued."""
+    scheduler = AdmissionScheduler("m", max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    scheduler.acquire()
+
+    with pytest.raises(AdmissionRejected) as excinfo:
+        scheduler.acquire()
+    assert excinfo.value.reason == "timeout"
+
+    stats = scheduler.stats()
+    assert stats["queued"] == 0
+    assert stats["timed_out"] == 1
+    # The slot goes to nobody stale once released
+    scheduler.release()
+    assert scheduler.stats()["active"] == 0
+
+
+def test_async_slots_share_the_queue():
+    """Async callers wait without blocking the loop and honor the limit."""
+    scheduler = AdmissionScheduler("m", max_concurrent=2, max_queue=10)
+    active = [0]
+    peak = [0]
+
+    async def work():
+        async with scheduler.aslot():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.01)
+            active[0] -= 1
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    asyncio.run(main())
+
+    assert peak[0] == 2
+    assert scheduler.stats()["admitted"] == 6
+
+
+def test_cancelled_async_waiter_gives_up_its_place():
+    """Cancelling a queued caller removes it and does not leak a slot."""
+    scheduler = AdmissionScheduler("m", max_concurrent=1, max_queue=5)
+
+    async def main():
+        scheduler.acquire()
+        task = asyncio.ensure_future(scheduler.aacquire())
+        await asyncio.sleep(0.01)
+        assert scheduler.stats()["queued"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        scheduler.release()
+
+    asyncio.run(main())
+
+    stats = scheduler.stats()
+    assert stats["queued"] == 0
+    assert stats["active"] == 0
+
+
+def test_embedding_batches_wait_for_a_slot():
+    """With a scheduler, embedding batches run within its limit."""
+    scheduler = AdmissionScheduler("embed", max_concurrent=1, max_queue=10)
+    inner = SlowEmbeddings(delay=0.02)
+    batcher = BatchingEmbeddings(inner, max_batch_size=1, max_wait_ms=0, max_in_flight=4, admission=scheduler)
+    try:
+        threads = [threading.Thread(target=batcher.embed_query, args=(f"q{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        batcher.close()
+
+    assert inner.max_active == 1
+    assert scheduler.stats()["admitted"] == 4
@@ -0,0 +1,51 @@
+"""Test the answer cache."""
+from src.api.services import answer_cache as answer_cache_module
+from src.api.services.answer_cache import AnswerCache, answer_key
+
+
+def test_key_depends_on_chunks_model_and_prompt():
+    """Test any change to what the LLM sees gives a different key."""
+    key = answer_key("What is the pump?", "llama3.2", 1, [("p1", 0), ("p2", 3)])
+    assert key == answer_key("what is the  pump?", "llama3.2", 1, [("p1", 0), ("p2", 3)])
+    assert key != answer_key("What is the pump?", "llama3.2", 1, [("p2", 3), ("p1", 0)])
+    assert key != answer_key("What is the pump?", "qwen3", 1, [("p1", 0), ("p2", 3)])
+    assert key != answer_key("What is the pump?", "llama3.2", 2, [("p1", 0), ("p2", 3)])
+
+
+def test_returns_stored_sources_and_steps():
+    """Test a hit returns copies of what was stored."""
+    cache = AnswerCache()
+    key = answer_key("q", "m", 1, [("p1", 0)])
+    cache.put(key, "answer", [{"pdf_id": "p1"}], ["📚 step"])
+    answer, sources, steps = cache.get(key)
+    steps.append("extra")
+    assert (answer, sources) == ("answer", [{"pdf_id": "p1"}])
+    assert cache.get(key)[2] == ["📚 step"]
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_expire(monkeypatch):
+    """Test answers are not served after their TTL."""
+    now = [1000.0]
+    monkeypatch.setattr(answer_cache_module.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(ttl_seconds=60)
+    key = answer_key("q", "m", 1, [])
+    cache.put(key, "answer", [], [])
+    now[0] += 59
+    assert cache.get(key) is not None
+    now[0] += 2
+    assert cache.get(key) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_size_limit_evicts_least_recently_used():
+    """Test the cache holds at most max_entries answers."""
+    cache = AnswerCache(max_entries=2)
+    keys = [answer_key(q, "m", 1, []) for q in "abc"]
+    cache.put(keys[0], "a", [], [])
+    cache.put(keys[1], "b", [], [])
+    cache.get(keys[0])
+    cache.put(keys[2], "c", [], [])
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0])[0] == "a"
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,86 @@
+"""Test the process-wide cache of open collection handles."""
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+
+from src.core.collection_registry import CollectionRegistry, get_collection_registry
+from src.core.vector_backends import get_backend
+
+
+def test_hits_misses_and_lru_eviction_by_size():
+    """Test handles are reused and the least recently used go over budget."""
+    registry = CollectionRegistry(max_bytes=100)
+    released = []
+    open_ = lambda name, size: registry.get(name, lambda: f"handle-{name}", lambda _: size, released.append)
+
+    assert open_("a", 40) == "handle-a"
+    open_("b", 40)
+    open_("a", 40)  # a is now most recently used
+    open_("c", 40)
+    assert released == ["handle-b"]
+    assert registry.stats() | {"hit_rate": None} == {
+        "hits": 1, "misses": 3, "hit_rate": None, "evictions": 1, "invalidations": 0,
+        "entries": 2, "bytes": 80, "max_bytes": 100,
+    }
+
+    # A single entry over budget is still kept
+    open_("huge", 500)
+    assert registry.stats()["entries"] == 1
+
+
+def test_concurrent_misses_open_once():
+    """Test threads asking for the same missing key share one open."""
+    registry = CollectionRegistry()
+    opened = []
+
+    def open_fn():
+        opened.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("k", open_fn))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(opened) == 1
+    assert len({id(r) for r in results}) == 1
+
+
+@pytest.mark.parametrize("backend_name", ["chroma", "flat"])
+def test_backend_reuses_handles_and_invalidates_on_drop(tmp_path, backend_name):
+    """Test repeated opens hit the cache and dropping a collection invalidates it."""
+    registry = CollectionRegistry()
+    backend = get_backend(backend_name, str(tmp_path), registry=registry)
+    backend.upsert("docs", ["1"], [Document(page_content="x", metadata={"pdf_id": "p"})], [[1.0, 0.0, 0.0]])
+    backend.open("docs", None)
+    assert registry.stats()["bytes"] > 0
+    misses = registry.stats()["misses"]
+    for _ in range(3):
+        backend.open("docs", None).similarity_search_by_vector([1.0, 0.0, 0.0], k=1)
+    assert registry.stats()["misses"] == misses
+
+    backend.drop("docs")
+    assert registry.stats()["invalidations"] >= 1
+    assert backend.count("docs") == 0
+
+
+def test_services_built_per_request_share_handles(api_db):
+    """Test new service instances reuse the open handles instead of adding entries."""
+    from src.api.services.pdf_service import PDFService
+    from src.api.services.rag_service import RAGService
+
+    registry = get_collection_registry()
+    for service_class in (RAGService, PDFService):
+        service_class().vector_store.open_collection("per-request")
+        before = registry.stats()
+
+        service_class().vector_store.open_collection("per-request")
+
+        after = registry.stats()
+        assert after["entries"] == before["entries"]
+        assert after["misses"] == before["misses"]
+        assert after["hits"] > before["hits"]
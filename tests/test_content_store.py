@@ -0,0 +1,110 @@
+"""Test content-addressed PDF storage."""
+import hashlib
+import pytest
+from src.core.content_store import (
+    ContentStore,
+    ContentTooLarge,
+    NotAPDF,
+    sha256_bytes,
+    sha256_file,
+    pdf_id_for_hash,
+    collection_name_for_hash,
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a ContentStore in a temporary directory."""
+    return ContentStore(tmp_path / "store")
+
+
+def test_sha256_helpers_match(tmp_path):
+    """Test byte and file hashing agree."""
+    data = b"%PDF-1.4 test content" * 1000
+    path = tmp_path / "file.pdf"
+    path.write_bytes(data)
+    assert sha256_bytes(data) == hashlib.sha256(data).hexdigest()
+    assert sha256_file(path) == sha256_bytes(data)
+
+
+def test_ids_are_stable():
+    """Test IDs derived from a hash are deterministic."""
+    content_hash = sha256_bytes(b"same bytes")
+    assert pdf_id_for_hash(content_hash) == pdf_id_for_hash(sha256_bytes(b"same bytes"))
+    assert collection_name_for_hash(content_hash).startswith("pdf_")
+    assert 3 <= len(collection_name_for_hash(content_hash)) <= 63
+
+
+def test_put_bytes_deduplicates(store):
+    """Test identical content is stored once."""
+    hash1, path1 = store.put_bytes(b"%PDF-1.4 hello")
+    hash2, path2 = store.put_bytes(b"%PDF-1.4 hello")
+    assert hash1 == hash2
+    assert path1 == path2
+    assert store.exists(hash1)
+    assert len(list(store.root.rglob("*.pdf"))) == 1
+
+
+def test_put_file_move(store, tmp_path):
+    """Test moving a file into the store."""
+    source = tmp_path / "upload.pdf"
+    source.write_bytes(b"%PDF-1.4 moved")
+    content_hash, path = store.put_file(source, move=True)
+    assert not source.exists()
+    assert path.read_bytes() == b"%PDF-1.4 moved"
+    assert content_hash == sha256_bytes(b"%PDF-1.4 moved")
+
+
+def test_put_file_move_duplicate_discards_source(store, tmp_path):
+    """Test moving duplicate content drops the source file."""
+    store.put_bytes(b"%PDF-1.4 dup")
+    source = tmp_path / "dup.pdf"
+    source.write_bytes(b"%PDF-1.4 dup")
+    store.put_file(source, move=True)
+    assert not source.exists()
+
+
+def test_remove(store):
+    """Test removing stored content."""
+    content_hash, _ = store.put_bytes(b"%PDF-1.4 gone")
+    assert store.remove(content_hash)
+    assert not store.exists(content_hash)
+    assert not store.remove(content_hash)
+
+
+def test_writer_streams_and_hashes(store):
+    """Test streamed content is hashed and stored like put_bytes."""
+    data = b"%PDF-1.7" + b"x" * 10000
+    with store.open_writer(max_bytes=20000) as writer:
+        for i in range(0, len(data), 1024):
+            writer.write(data[i:i + 1024])
+        content_hash, path = writer.commit()
+    assert content_hash == sha256_bytes(data)
+    assert path.read_bytes() == data
+    assert list(store.root.glob("*.upload")) == []
+
+
+def test_writer_rejects_oversized(store):
+    """Test the size limit is enforced while streaming."""
+    with pytest.raises(ContentTooLarge):
+        with store.open_writer(max_bytes=10) as writer:
+            writer.write(b"%PDF-1.4")
+            writer.write(b"too much data")
+    assert list(store.root.rglob("*")) == []
+
+
+def test_writer_rejects_non_pdf(store):
+    """Test the PDF header is checked on the first bytes."""
+    with pytest.raises(NotAPDF):
+        with store.open_writer() as writer:
+            writer.write(b"PK\x03\x04 zip file")
+    assert list(store.root.rglob("*")) == []
+
+
+def test_writer_header_split_across_chunks(store):
+    """Test a header split over several chunks is accepted."""
+    with store.open_writer() as writer:
+        for chunk in (b"%P", b"DF", b"-1.4 body"):
+            writer.write(chunk)
+        content_hash, _ = writer.commit()
+    assert content_hash == sha256_bytes(b"%PDF-1.4 body")
@@ -0,0 +1,29 @@
+"""Test selecting retrieved chunks by token budget."""
+from langchain_core.documents import Document
+
+from src.core.context_budget import estimate_tokens, select_within_budget
+
+
+def chunk(chars):
+    return Document(page_content="x" * chars)
+
+
+def test_estimate_tokens():
+    """Test the four-characters-per-token estimate rounds up."""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_select_stops_at_budget():
+    """Test chunks are taken in order until the next one does not fit."""
+    docs = [chunk(400), chunk(400), chunk(800), chunk(40)]
+    selected = select_within_budget(docs, token_budget=250)
+    assert selected == docs[:2]
+
+
+def test_first_chunk_always_kept():
+    """Test an oversized best chunk is still sent rather than no context."""
+    docs = [chunk(4000), chunk(40)]
+    assert select_within_budget(docs, token_budget=100) == docs[:1]
+    assert select_within_budget([], token_budget=100) == []
@@ -1,8 +1,9 @@
 """Test document processing functionality."""
 import pytest
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, patch
-from src.core.document import DocumentProcessor
+from src.core.document import DocumentProcessor, page_ranges
 from langchain_core.documents import Document
 
 @pytest.fixture
@@ -113,4 +114,60 @@ def test_chunk_overlap():
                 found_overlap = True
                 break
         
-        assert found_overlap, f"No overlap found between chunks {i} and {i+1}" 
\ No newline at end of file
+        assert found_overlap, f"No overlap found between chunks {i} and {i+1}"
+
+def test_page_ranges():
+    """Test page range splitting covers every page once."""
+    assert page_ranges(10, 4) == [(1, 4), (5, 8), (9, 10)]
+    assert page_ranges(3, 8) == [(1, 3)]
+    assert page_ranges(0, 8) == []
+
+def _fake_partition(file_path, first_page, last_page, unstructured_kwargs):
+    """Return one document per page in the range."""
+    return [
+        Document(page_content=f"page {n}", metadata={"source": file_path, "page_number": n})
+        for n in range(first_page, last_page + 1)
+    ]
+
+@patch('src.core.document.count_pdf_pages', return_value=10)
+@patch('src.core.document._partition_page_range', side_effect=_fake_partition)
+def test_load_pdf_parallel_keeps_page_order(mock_partition, mock_count):
+    """Test parallel loading merges ranges back in page order."""
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        processor = DocumentProcessor(pages_per_task=3, executor=executor)
+        documents = processor.load_pdf(Path("report.pdf"))
+
+    assert [doc.metadata["page_number"] for doc in documents] == list(range(1, 11))
+    assert mock_partition.call_count == 4
+
+@patch('src.core.document.count_pdf_pages', return_value=2)
+@patch('langchain_community.document_loaders.UnstructuredPDFLoader.load')
+def test_load_pdf_parallel_small_file_sequential(mock_load, mock_count):
+    """Test short PDFs skip the process pool."""
+    mock_load.return_value = [Document(page_content="all", metadata={})]
+    processor = DocumentProcessor(parse_workers=4, pages_per_task=8)
+    documents = processor.load_pdf(Path("short.pdf"))
+    assert len(documents) == 1
+    mock_load.assert_called_once()
+
+@patch('src.core.document.count_pdf_pages', return_value=10)
+@patch('src.core.document._partition_page_range', side_effect=_fake_partition)
+def test_iter_pages_bounds_submitted_ranges(mock_partition, mock_count):
+    """Test streaming parse only submits a window of ranges ahead."""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        processor = DocumentProcessor(pages_per_task=1, executor=executor)
+        pages = processor.iter_pages(Path("report.pdf"))
+        assert next(pages).metadata["page_number"] == 1
+        assert mock_partition.call_count <= 3
+        assert [doc.metadata["page_number"] for doc in pages] == list(range(2, 11))
+
+def test_iter_chunks_matches_split_documents(processor):
+    """Test streaming splitting yields the same chunks as batch splitting."""
+    documents = [
+        Document(page_content="Sentence number %d. " % i * 800, metadata={"page_number": i})
+        for i in range(3)
+    ]
+    streamed = list(processor.iter_chunks(iter(documents)))
+    assert [c.page_content for c in streamed] == [
+        c.page_content for c in processor.split_documents(documents)
+    ]
@@ -0,0 +1,138 @@
+"""Test cross-request embedding batching."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.core.admission import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from src.core.embedding_batcher import BatchingEmbeddings
+
+
+class RecordingEmbeddings(Embeddings):
+    """Fake embeddings that record each batch and track concurrency."""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.batches = []
+        self.delay = delay
+        self.fail = fail
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError("embed failed")
+            return [[float(len(text))] for text in texts]
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_concurrent_calls_share_batches():
+    """Test concurrent callers are merged and each gets its own vectors."""
+    inner = RecordingEmbeddings()
+    embeddings = BatchingEmbeddings(inner, max_batch_size=64, max_wait_ms=50)
+
+    def call(i):
+        return embeddings.embed_documents(["x" * i, "y" * (i + 1)])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(call, range(1, 9)))
+    embeddings.close()
+
+    assert results == [[[float(i)], [float(i + 1)]] for i in range(1, 9)]
+    assert len(inner.batches) < 8
+    assert embeddings.stats()["texts"] == 16
+
+
+def test_async_callers_share_batches():
+    """Test coroutines awaiting vectors are batched like threads."""
+    inner = RecordingEmbeddings(delay=0.05)
+    embeddings = BatchingEmbeddings(inner, max_batch_size=64, max_wait_ms=50)
+
+    async def main():
+        return await asyncio.gather(
+            *(embeddings.aembed_documents(["x" * i]) for i in range(1, 9)),
+            embeddings.aembed_query("query")
+        )
+
+    results = asyncio.run(main())
+    embeddings.close()
+
+    assert results[:8] == [[[float(i)]] for i in range(1, 9)]
+    assert results[8] == [5.0]
+    assert len(inner.batches) == 1
+
+
+def test_large_call_split_at_max_batch_size():
+    """Test a call larger than the batch limit is split and reassembled."""
+    inner = RecordingEmbeddings()
+    embeddings = BatchingEmbeddings(inner, max_batch_size=4, max_wait_ms=1)
+    texts = ["a" * i for i in range(1, 11)]
+    assert embeddings.embed_documents(texts) == [[float(i)] for i in range(1, 11)]
+    embeddings.close()
+    assert all(len(batch) <= 4 for batch in inner.batches)
+    assert sum(len(batch) for batch in inner.batches) == 10
+
+
+def test_in_flight_limit():
+    """Test no more than max_in_flight batches run at once."""
+    inner = RecordingEmbeddings(delay=0.05)
+    embeddings = BatchingEmbeddings(inner, max_batch_size=1, max_wait_ms=0, max_in_flight=2)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        list(pool.map(embeddings.embed_query, ["a", "b", "c", "d", "e", "f"]))
+    embeddings.close()
+    assert inner.max_active == 2
+
+
+def test_errors_reach_every_caller_in_batch():
+    """Test a failed batch raises in each waiting caller."""
+    embeddings = BatchingEmbeddings(RecordingEmbeddings(fail=True), max_wait_ms=20)
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(embeddings.embed_query, text) for text in "abc"]
+        for future in futures:
+            with pytest.raises(RuntimeError, match="embed failed"):
+                future.result()
+    embeddings.close()
+
+
+def test_closed_dispatcher_rejects_calls():
+    """Test calls after close fail fast."""
+    embeddings = BatchingEmbeddings(RecordingEmbeddings())
+    embeddings.close()
+    with pytest.raises(RuntimeError):
+        embeddings.embed_query("late")
+
+
+def test_queries_are_admitted_ahead_of_documents():
+    """Test sync and async query embeddings take interactive priority; documents stay background."""
+    class RecordingAdmission:
+        def __init__(self):
+            self.priorities = []
+
+        @contextmanager
+        def slot(self, priority, timeout=None):
+            self.priorities.append(priority)
+            yield
+
+    admission = RecordingAdmission()
+    embeddings = BatchingEmbeddings(RecordingEmbeddings(), max_wait_ms=0, admission=admission)
+
+    embeddings.embed_query("query")
+    asyncio.run(embeddings.aembed_query("query"))
+    embeddings.embed_documents(["chunk"])
+
+    assert admission.priorities == [PRIORITY_INTERACTIVE, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND]
+    embeddings.close()
@@ -0,0 +1,135 @@
+"""Test persistent embedding cache."""
+import asyncio
+
+import pytest
+from langchain_core.embeddings import Embeddings
+from src.core.embedding_cache import EmbeddingCache, CachedEmbeddings, MemoryEmbeddingCache, text_hash
+
+
+class CountingEmbeddings(Embeddings):
+    """Deterministic fake embeddings that record every text embedded."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.extend(texts)
+        return [[float(len(text)), 0.5, -1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Create an EmbeddingCache in a temporary directory."""
+    cache = EmbeddingCache(tmp_path / "cache.db")
+    yield cache
+    cache.close()
+
+
+def test_second_call_is_served_from_cache(cache):
+    """Test repeated texts are not re-embedded."""
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, model="m", cache=cache)
+
+    first = embeddings.embed_documents(["alpha", "beta"])
+    second = embeddings.embed_documents(["beta", "gamma", "alpha"])
+
+    assert inner.calls == ["alpha", "beta", "gamma"]
+    assert second[0] == first[1]
+    assert second[2] == first[0]
+    stats = cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+
+
+def test_duplicates_in_one_call_embedded_once(cache):
+    """Test duplicate texts in a batch hit the model once."""
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, model="m", cache=cache)
+    vectors = embeddings.embed_documents(["same", "same", "same"])
+    assert inner.calls == ["same"]
+    assert len(vectors) == 3
+
+
+def test_keys_include_model(cache):
+    """Test vectors from different models do not mix."""
+    inner = CountingEmbeddings()
+    CachedEmbeddings(inner, model="a", cache=cache).embed_documents(["text"])
+    CachedEmbeddings(inner, model="b", cache=cache).embed_documents(["text"])
+    assert inner.calls == ["text", "text"]
+
+
+def test_vectors_stored_as_float32(cache):
+    """Test round-tripped vectors keep float32 precision."""
+    cache.put_many("m", {"k": [0.1, 0.2, 0.3]})
+    vector = cache.get_many("m", ["k"])["k"]
+    assert vector == pytest.approx([0.1, 0.2, 0.3], rel=1e-6)
+
+
+def test_persists_across_instances(tmp_path):
+    """Test the cache survives reopening the database."""
+    path = tmp_path / "cache.db"
+    first = EmbeddingCache(path)
+    first.put_many("m", {text_hash("x"): [1.0, 2.0]})
+    first.close()
+
+    second = EmbeddingCache(path)
+    assert second.get_many("m", [text_hash("x")])[text_hash("x")] == [1.0, 2.0]
+    second.close()
+
+
+def test_lru_eviction(tmp_path):
+    """Test least recently used vectors are evicted past the byte budget."""
+    # Each 4-dim float32 vector is 16 bytes; budget fits three
+    cache = EmbeddingCache(tmp_path / "cache.db", max_bytes=48)
+    vector = [1.0, 2.0, 3.0, 4.0]
+    cache.put_many("m", {"a": vector})
+    cache.put_many("m", {"b": vector})
+    cache.put_many("m", {"c": vector})
+    cache.get_many("m", ["a"])  # refresh "a"
+    cache.put_many("m", {"d": vector})
+
+    remaining = cache.get_many("m", ["a", "b", "c", "d"])
+    assert "b" not in remaining
+    assert "a" in remaining and "d" in remaining
+    assert cache.stats()["bytes"] <= 48
+    cache.close()
+
+
+def test_memory_tier_in_front_of_disk(cache):
+    """Test memory hits skip the disk and disk hits are promoted to memory."""
+    inner = CountingEmbeddings()
+    memory = MemoryEmbeddingCache(max_entries=2)
+    CachedEmbeddings(inner, model="m", cache=cache).embed_documents(["on disk"])
+
+    embeddings = CachedEmbeddings(inner, model="m", cache=cache, memory=memory)
+    embeddings.embed_query("on disk")
+    embeddings.embed_query("on disk")
+    embeddings.embed_documents(["new", "newer"])
+
+    assert inner.calls == ["on disk", "new", "newer"]
+    assert cache.stats()["hits"] == 1
+    assert memory.stats()["hits"] == 1
+    assert memory.stats()["evictions"] == 1  # "on disk" was least recently used
+
+
+def test_memory_only_cache():
+    """Test the memory tier works without a disk cache."""
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, model="m", memory=MemoryEmbeddingCache())
+    assert embeddings.embed_documents(["q", "q"]) == embeddings.embed_documents(["q"]) * 2
+    assert inner.calls == ["q"]
+
+
+def test_async_calls_share_the_cache(cache):
+    """Test async embedding serves cached texts and stores new ones."""
+    inner = CountingEmbeddings()
+    embeddings = CachedEmbeddings(inner, model="m", cache=cache, memory=MemoryEmbeddingCache())
+    embeddings.embed_query("seen")
+
+    vectors = asyncio.run(embeddings.aembed_documents(["seen", "new", "new"]))
+    assert vectors == embeddings.embed_documents(["seen", "new", "new"])
+    assert asyncio.run(embeddings.aembed_query("new")) == vectors[1]
+    assert inner.calls == ["seen", "new"]
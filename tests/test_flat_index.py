@@ -0,0 +1,149 @@
+"""Test the memory-mapped flat vector index."""
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.core import flat_index
+from src.core.flat_index import FlatIndex, FlatVectorStore, pdf_ids_from_filter
+
+
+class AxisEmbeddings(Embeddings):
+    """Embeds 'x', 'y' and 'z' as unit vectors along their axis."""
+
+    AXES = {"x": [1.0, 0.0, 0.0], "y": [0.0, 1.0, 0.0], "z": [0.0, 0.0, 1.0]}
+
+    def embed_documents(self, texts):
+        return [self.AXES[text[0]] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def add(index, ids, vectors, pdf_id="p1"):
+    index.upsert(ids, [f"text {i}" for i in ids], [{"pdf_id": pdf_id} for _ in ids], vectors)
+
+
+def test_search_ranks_by_cosine(tmp_path):
+    """Test results come back best first, with cosine scores."""
+    index = FlatIndex(tmp_path)
+    add(index, ["a", "b", "c"], [[1, 0], [0.7, 0.7], [0, 1]])
+    hits = index.search([1, 0], k=2)
+    assert [index.ids[row] for row, _ in hits] == ["a", "b"]
+    assert hits[0][1] == pytest.approx(1.0)
+    assert hits[1][1] == pytest.approx(np.sqrt(0.5))
+
+
+def test_pdf_filter(tmp_path):
+    """Test a pdf_id pre-filter restricts candidates."""
+    index = FlatIndex(tmp_path)
+    add(index, ["a"], [[1, 0]], pdf_id="p1")
+    add(index, ["b"], [[0.9, 0.1]], pdf_id="p2")
+    add(index, ["c"], [[0, 1]], pdf_id="p3")
+    assert [index.ids[r] for r, _ in index.search([1, 0], k=5, pdf_ids=["p2", "p3"])] == ["b", "c"]
+    assert index.search([1, 0], k=5, pdf_ids=["missing"]) == []
+
+
+def test_upsert_replaces_and_delete(tmp_path):
+    """Test re-upserting an id replaces it and deletes are honoured."""
+    index = FlatIndex(tmp_path)
+    add(index, ["a", "b"], [[1, 0], [0, 1]])
+    add(index, ["a"], [[0, 1]])
+    assert index.count() == 2
+    assert index.get_rows([index.search([0, 1], k=1)[0][0]])[0][0] in ("a", "b")
+
+    assert index.delete(ids=["b"]) == 1
+    assert [index.ids[r] for r, _ in index.search([0, 1], k=5)] == ["a"]
+    assert index.delete(pdf_ids=["p1"]) == 1
+    assert index.count() == 0
+
+
+def test_persistence_and_other_writers(tmp_path):
+    """Test a second instance sees existing and newly appended rows."""
+    writer = FlatIndex(tmp_path)
+    add(writer, ["a"], [[1, 0]])
+    reader = FlatIndex(tmp_path)
+    assert reader.count() == 1
+    add(writer, ["b"], [[0, 1]])
+    writer.delete(ids=["a"])
+    assert [reader.ids[r] for r, _ in reader.search([1, 0], k=5)] == ["b"]
+
+
+def test_interrupted_write_is_ignored(tmp_path):
+    """Test a row logged without its vector is dropped on reload."""
+    index = FlatIndex(tmp_path)
+    add(index, ["a"], [[1, 0]])
+    with open(tmp_path / "gen-0" / "rows.jsonl", "ab") as f:
+        f.write(b'{"id": "ghost", "pdf_id": "p1", "doc": 0}\n{"id": "to')
+    reloaded = FlatIndex(tmp_path)
+    assert reloaded.count() == 1
+    add(reloaded, ["b"], [[0, 1]])
+    assert sorted(FlatIndex(tmp_path).row_of) == ["a", "b"]
+
+
+def test_compaction(tmp_path, monkeypatch):
+    """Test tombstones are compacted away without losing live rows."""
+    monkeypatch.setattr(flat_index, "COMPACT_MIN_DEAD_ROWS", 2)
+    index = FlatIndex(tmp_path)
+    add(index, ["a", "b", "c", "d"], [[1, 0], [0, 1], [1, 1], [1, -1]])
+    index.delete(ids=["b", "c", "d"])
+    assert index.generation == 1
+    assert index.ids == ["a"]
+    assert index.get_rows([0])[0][:2] == ("a", "text a")
+    assert FlatIndex(tmp_path).count() == 1
+
+
+def test_langchain_store_with_filter(tmp_path):
+    """Test the LangChain wrapper embeds, filters and returns documents."""
+    store = FlatVectorStore(FlatIndex(tmp_path), AxisEmbeddings())
+    store.add_documents(
+        [Document(page_content=t, metadata={"pdf_id": p}) for t, p in
+         [("x1", "p1"), ("x2", "p2"), ("y1", "p1")]],
+        ids=["1", "2", "3"]
+    )
+    retriever = store.as_retriever(search_kwargs={"k": 2, "filter": {"pdf_id": {"$in": ["p1"]}}})
+    docs = retriever.invoke("x?")
+    assert [doc.page_content for doc in docs] == ["x1", "y1"]
+    assert docs[0].metadata["pdf_id"] == "p1"
+
+
+def test_pdf_ids_from_filter():
+    """Test supported and unsupported filters."""
+    assert pdf_ids_from_filter(None) is None
+    assert pdf_ids_from_filter({"pdf_id": "a"}) == ["a"]
+    assert pdf_ids_from_filter({"pdf_id": {"$in": ["a", "b"]}}) == ["a", "b"]
+    with pytest.raises(ValueError):
+        pdf_ids_from_filter({"page": 3})
+
+
+@pytest.mark.parametrize("quantization", ["int8", "binary"])
+def test_quantized_search_matches_float32(tmp_path, quantization):
+    """Test quantized first pass plus rescoring finds the exact top-k."""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    exact = FlatIndex(tmp_path / "exact")
+    quantized = FlatIndex(tmp_path / "quantized", quantization=quantization, rescore_factor=50)
+    ids = [str(i) for i in range(500)]
+    add(exact, ids, vectors)
+    add(quantized, ids, vectors)
+
+    for query in vectors[:10] + 0.1 * rng.standard_normal((10, 32)).astype(np.float32):
+        expected = exact.search(query, k=5)
+        hits = quantized.search(query, k=5)
+        assert [row for row, _ in hits] == [row for row, _ in expected]
+        assert hits[0][1] == pytest.approx(expected[0][1], rel=1e-5)
+
+    usage = quantized.memory_usage()
+    assert usage["rows"] == 500
+    assert usage["resident_bytes"] < usage["float32_bytes"] / 3
+
+
+def test_quantization_enabled_on_existing_index(tmp_path):
+    """Test codes are built for rows written without them, and reloaded from disk."""
+    add(FlatIndex(tmp_path), ["a", "b"], [[1, 0], [0, 1]])
+    index = FlatIndex(tmp_path, quantization="int8")
+    assert (tmp_path / "gen-0" / "codes.int8").stat().st_size > 0
+    add(index, ["c"], [[-1, 0]])
+    reloaded = FlatIndex(tmp_path, quantization="int8")
+    assert [reloaded.ids[r] for r, _ in reloaded.search([-1, 0.1], k=1)] == ["c"]
+    assert reloaded.search([0, 1], k=1, pdf_ids=["p1"])[0][1] == pytest.approx(1.0)
@@ -0,0 +1,65 @@
+"""Test bulk ingestion helpers."""
+from src import ingest
+from src.api.config import settings
+from src.core.ollama_pool import PooledEmbeddings
+from src.core.residency import PINNED
+from src.ingest import Checkpoint, find_pdfs
+
+
+def test_find_pdfs(tmp_path):
+    """Test PDFs are found recursively, case-insensitively and sorted."""
+    (tmp_path / "sub").mkdir()
+    for name in ["b.pdf", "a.PDF", "notes.txt", "sub/c.pdf"]:
+        (tmp_path / name).write_bytes(b"%PDF-1.4")
+
+    names = [path.name for path in find_pdfs(tmp_path)]
+    assert sorted(names) == ["a.PDF", "b.pdf", "c.pdf"]
+    assert [path.name for path in find_pdfs(tmp_path, recursive=False)] == ["a.PDF", "b.pdf"]
+
+
+def test_checkpoint_resume(tmp_path):
+    """Test handled files are skipped on the next run, failed ones retried."""
+    good = tmp_path / "good.pdf"
+    bad = tmp_path / "bad.pdf"
+    good.write_bytes(b"%PDF-1.4 good")
+    bad.write_bytes(b"%PDF-1.4 bad")
+    path = tmp_path / "checkpoint.jsonl"
+
+    checkpoint = Checkpoint(path)
+    checkpoint.record(good, status="ingested")
+    checkpoint.record(bad, status="failed", error="boom")
+    checkpoint.close()
+    with open(path, "a") as f:
+        f.write('{"path": "torn')  # partial line from a crash
+
+    resumed = Checkpoint(path)
+    assert resumed.is_done(good)
+    assert not resumed.is_done(bad)
+    resumed.close()
+
+
+def test_checkpoint_detects_changed_file(tmp_path):
+    """Test a file modified after ingestion is processed again."""
+    pdf = tmp_path / "doc.pdf"
+    pdf.write_bytes(b"%PDF-1.4 v1")
+    checkpoint = Checkpoint(tmp_path / "checkpoint.jsonl")
+    checkpoint.record(pdf, status="ingested")
+    pdf.write_bytes(b"%PDF-1.4 version 2")
+    assert not checkpoint.is_done(pdf)
+    checkpoint.close()
+
+
+def test_workers_embed_through_the_ollama_pool(tmp_path, monkeypatch):
+    """Test worker embeddings are spread over every configured Ollama host."""
+    monkeypatch.setattr(ingest, "_worker", {})
+    monkeypatch.setattr(settings, "PDF_STORAGE_DIR", str(tmp_path / "pdfs"))
+    monkeypatch.setattr(settings, "VECTOR_DB_DIR", str(tmp_path / "vectors"))
+    monkeypatch.setattr(settings, "EMBEDDING_CACHE_PATH", "")
+    urls = ["http://gpu1:11434", "http://gpu2:11434"]
+
+    ingest._init_worker(set(), 8, urls, PINNED)
+
+    embeddings = ingest._worker["vector_store"].embeddings
+    assert isinstance(embeddings, PooledEmbeddings)
+    assert embeddings.pool.urls == urls
+    assert embeddings.keep_alive == PINNED
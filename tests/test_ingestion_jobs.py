@@ -0,0 +1,200 @@
+"""Test background PDF ingestion jobs."""
+import asyncio
+import time
+
+import pytest
+from langchain_core.documents import Document
+from src.api.config import settings
+from src.api.database import IngestionJob, PDFMetadata
+from src.api.services import pdf_service as pdf_service_module
+from src.api.services.pdf_service import PDFService
+from src.api.services.retrieval_cache import corpus_version
+from src.core.document import DocumentProcessor
+from src.core.embeddings import VectorStore
+
+PDF_BYTES = b"%PDF-1.4\n" + b"pages" * 100 + b"\n%%EOF\n"
+PAGES = 3
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-job."""
+
+
+def fake_pages(self, file_path, on_pages_parsed=None):
+    for page in range(1, PAGES + 1):
+        yield Document(page_content=f"Page {page} is about pumps.", metadata={"page_number": page})
+        if on_pages_parsed:
+            on_pages_parsed(page)
+
+
+@pytest.fixture(autouse=True)
+def fake_parser(monkeypatch):
+    """Parse every PDF into three one-chunk pages."""
+    monkeypatch.setattr(pdf_service_module, "count_pdf_pages", lambda path: PAGES)
+    monkeypatch.setattr(DocumentProcessor, "iter_pages", fake_pages)
+    monkeypatch.setattr(DocumentProcessor, "load_pdf", lambda self, *args: list(fake_pages(self, *args)))
+    monkeypatch.setattr(settings, "EMBED_BATCH_SIZE", 1)
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Stages a job is saved in, in order."""
+    seen = []
+    save_job = PDFService._save_job
+
+    def recording_save(self, job, db):
+        if not seen or seen[-1] != job.stage:
+            seen.append(job.stage)
+        save_job(self, job, db)
+
+    monkeypatch.setattr(PDFService, "_save_job", recording_save)
+    return seen
+
+
+def upload(client):
+    response = client.post("/api/v1/pdfs/upload", files={"file": ("doc.pdf", PDF_BYTES, "application/pdf")})
+    assert response.status_code == 202
+    return response.json()
+
+
+def wait_for_job(client, job_id, timeout=10.0):
+    """Poll a job until it stops running."""
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        if job["status"] in ("completed", "failed"):
+            return job
+        assert time.monotonic() < deadline, f"job still {job['status']} in stage {job['stage']}"
+        time.sleep(0.02)
+
+
+@pytest.mark.parametrize("streaming, expected", [
+    (False, ["parse", "split", "embed", "finalize", "done"]),
+    (True, ["parse", "stream", "finalize", "done"]),
+])
+def test_upload_runs_through_the_stages(client, api_db, monkeypatch, stages, streaming, expected):
+    """An accepted upload is processed in the background, stage by stage."""
+    monkeypatch.setattr(settings, "INGEST_STREAMING", streaming)
+
+    queued = upload(client)
+    assert queued["status"] == "queued"
+    job = wait_for_job(client, queued["job_id"])
+
+    assert job["status"] == "completed", job["error"]
+    assert job["stage"] == "done"
+    assert job["progress"] == 1.0
+    assert job["pages_done"] == job["pages_total"] == PAGES
+    assert job["chunks_embedded"] == job["chunks_total"] == PAGES
+    assert stages == expected
+    db = api_db()
+    pdf = db.query(PDFMetadata).filter(PDFMetadata.pdf_id == job["pdf_id"]).one()
+    assert pdf.doc_count == PAGES
+    # Each stored batch is searchable at once, then the finished PDF
+    assert corpus_version(db) == PAGES + 1
+    db.close()
+
+
+def test_duplicate_upload_completes_at_once(client, api_db):
+    """Uploading stored content again takes a reference instead of a new job run."""
+    first = wait_for_job(client, upload(client)["job_id"])
+    db = api_db()
+    version = corpus_version(db)
+    db.close()
+
+    second = upload(client)
+
+    assert second["status"] == "completed"
+    assert second["stage"] == "done"
+    assert second["pdf_id"] == first["pdf_id"]
+    db = api_db()
+    [pdf] = db.query(PDFMetadata).all()
+    assert pdf.ref_count == 2
+    # The searchable corpus did not change, so cached results stay valid
+    assert corpus_version(db) == version
+    db.close()
+
+
+def test_interrupted_job_resumes_on_startup(api_db, ingestion_queue, monkeypatch):
+    """A job that died mid-embed picks up at the next batch and records the PDF once."""
+    monkeypatch.setattr(settings, "INGEST_STREAMING", False)
+    service = PDFService()
+    db = api_db()
+
+    async def body():
+        yield PDF_BYTES
+
+    queued = asyncio.run(service.upload_and_process("doc.pdf", body(), db))
+    # Queued content is not searchable yet
+    assert corpus_version(db) == 0
+    job = db.query(IngestionJob).filter(IngestionJob.job_id == queued.job_id).one()
+
+    batches = []
+    add_documents = VectorStore.add_documents
+
+    def crash_after_first_batch(self, documents, collection_name=None, ids=None):
+        if batches:
+            raise Crash()
+        batches.append(ids)
+        return add_documents(self, documents, collection_name=collection_name, ids=ids)
+
+    monkeypatch.setattr(VectorStore, "add_documents", crash_after_first_batch)
+    with pytest.raises(Crash):
+        service.run_ingestion(job, db)
+    db.close()
+
+    db = api_db()
+    interrupted = db.query(IngestionJob).one()
+    assert (interrupted.status, interrupted.stage, interrupted.chunks_embedded) == ("running", "embed", 1)
+    db.close()
+
+    def record_batch(self, documents, collection_name=None, ids=None):
+        batches.append(ids)
+        return add_documents(self, documents, collection_name=collection_name, ids=ids)
+
+    monkeypatch.setattr(VectorStore, "add_documents", record_batch)
+    assert ingestion_queue.resume_pending() == 1
+    ingestion_queue.executor.shutdown(wait=True)
+
+    db = api_db()
+    resumed = db.query(IngestionJob).one()
+    assert resumed.status == "completed"
+    assert resumed.chunks_embedded == PAGES
+    [pdf] = db.query(PDFMetadata).all()
+    assert pdf.ref_count == 1
+    db.close()
+    # Only the batches that were not stored before the crash are embedded again
+    assert [ids[0].split(":")[1] for ids in batches] == ["0", "1", "2"]
+
+
+def test_failed_job_can_be_retried(client, api_db, monkeypatch):
+    """A job that failed on an Ollama outage finishes when retried, keeping its stored chunks."""
+    monkeypatch.setattr(settings, "INGEST_STREAMING", False)
+    batches = []
+    add_documents = VectorStore.add_documents
+
+    def outage_after_first_batch(self, documents, collection_name=None, ids=None):
+        if batches:
+            raise ConnectionError("Ollama is down")
+        batches.append(ids)
+        return add_documents(self, documents, collection_name=collection_name, ids=ids)
+
+    monkeypatch.setattr(VectorStore, "add_documents", outage_after_first_batch)
+    failed = wait_for_job(client, upload(client)["job_id"])
+    assert (failed["status"], failed["stage"], failed["chunks_embedded"]) == ("failed", "embed", 1)
+
+    def record_batch(self, documents, collection_name=None, ids=None):
+        batches.append(ids)
+        return add_documents(self, documents, collection_name=collection_name, ids=ids)
+
+    monkeypatch.setattr(VectorStore, "add_documents", record_batch)
+    response = client.post(f"/api/v1/jobs/{failed['job_id']}/retry")
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    job = wait_for_job(client, failed["job_id"])
+
+    assert job["status"] == "completed", job["error"]
+    assert job["error"] is None
+    assert [ids[0].split(":")[1] for ids in batches] == ["0", "1", "2"]
+    # Only failed jobs go back in the queue
+    assert client.post(f"/api/v1/jobs/{job['job_id']}/retry").status_code == 409
+    assert client.post("/api/v1/jobs/missing/retry").status_code == 404
@@ -0,0 +1,65 @@
+"""Test BM25 keyword search over chunk text."""
+import pytest
+from langchain_core.documents import Document
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.api.database import Base, FTS_DDL
+from src.api.services.lexical_search import LexicalIndex, candidate_pdfs, fts_query
+
+
+@pytest.fixture
+def db():
+    """In-memory API database with the FTS5 index."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        for ddl in FTS_DDL:
+            conn.execute(text(ddl))
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def chunk(pdf_id, index, content):
+    return Document(page_content=content, metadata={"pdf_id": pdf_id, "chunk_index": index, "page_number": 1})
+
+
+def test_fts_query_quotes_terms():
+    """Test identifiers stay whole and stop words are dropped."""
+    assert fts_query("What is part AB-1234 in section 4.2.1?") == '"part" OR "ab-1234" OR "section" OR "4.2.1"'
+    assert fts_query('the "a"') is None
+
+
+def test_search_finds_identifiers(db):
+    """Test exact identifiers rank first and metadata comes back."""
+    index = LexicalIndex()
+    index.add_chunks([
+        chunk("p1", 0, "General overview of the pump assembly."),
+        chunk("p1", 1, "Replace seal kit AB-1234 as described in section 4.2.1."),
+        chunk("p2", 0, "Section 4.2 covers wiring of the AB series."),
+    ], db)
+    db.commit()
+
+    hits = index.search("Where is AB-1234?", db)
+    assert [doc.metadata["chunk_index"] for doc, _ in hits] == [1]
+    assert hits[0][0].metadata["page_number"] == 1
+
+    hits = index.search("section 4.2.1 wiring", db)
+    assert {doc.metadata["pdf_id"] for doc, _ in hits} == {"p1", "p2"}
+    assert [doc.metadata["pdf_id"] for doc, _ in index.search("section 4.2.1 wiring", db, pdf_ids=["p2"])] == ["p2"]
+    assert candidate_pdfs(hits, 1) == [hits[0][0].metadata["pdf_id"]]
+
+
+def test_replace_and_delete(db):
+    """Test re-adding a chunk replaces it and deleting a PDF removes it from search."""
+    index = LexicalIndex()
+    index.add_chunks([chunk("p1", 0, "old wording")], db)
+    index.add_chunks([chunk("p1", 0, "new wording")], db)
+    db.commit()
+    assert index.search("old", db) == []
+    assert len(index.search("wording", db)) == 1
+
+    index.delete_pdf("p1", db)
+    db.commit()
+    assert index.search("wording", db) == []
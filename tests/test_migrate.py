@@ -0,0 +1,73 @@
+"""Test migrating per-PDF collections into the shared collection."""
+from datetime import datetime
+
+import pytest
+from langchain_core.documents import Document
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.database import Base, PDFMetadata
+from src.core.embeddings import VectorStore
+from src.migrate import migrate_to_shared_collection
+
+
+@pytest.fixture
+def db():
+    """In-memory API database."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_pdf(db, vector_store, pdf_id, chunks):
+    """Create a legacy PDF with its own collection."""
+    collection = f"col_{pdf_id}"
+    documents = [Document(page_content=text, metadata={"chunk_index": i}) for i, text in enumerate(chunks)]
+    vectors = [[float(i), 1.0, 0.0] for i in range(len(chunks))]
+    vector_store.upsert_vectors(documents, vectors, collection, [f"old{i}" for i in range(len(chunks))])
+    db.add(PDFMetadata(
+        pdf_id=pdf_id, name=f"{pdf_id}.pdf", collection_name=collection,
+        upload_timestamp=datetime.now(), doc_count=len(chunks), page_count=1
+    ))
+    db.commit()
+
+
+@pytest.mark.parametrize("backend", ["chroma", "flat"])
+def test_migrate_copies_vectors_with_pdf_ids(tmp_path, db, backend):
+    """Test chunks land in the shared collection tagged and filterable by pdf_id."""
+    vector_store = VectorStore(persist_directory=str(tmp_path / "vectors"), backend=backend)
+    add_pdf(db, vector_store, "a", ["a0", "a1"])
+    add_pdf(db, vector_store, "b", ["b0"])
+
+    assert migrate_to_shared_collection(vector_store, db, "shared", batch_size=1, delete_old=True) == 2
+
+    shared = vector_store.open_collection("shared")
+    docs = shared.similarity_search_by_vector([1.0, 1.0, 0.0], k=10, filter={"pdf_id": {"$in": ["a"]}})
+    assert sorted(doc.page_content for doc in docs) == ["a0", "a1"]
+    assert {doc.metadata["pdf_name"] for doc in docs} == {"a.pdf"}
+    assert vector_store.count("shared") == 3
+    assert all(pdf.search_collection == "shared" for pdf in db.query(PDFMetadata))
+
+    # Running again is a no-op
+    assert migrate_to_shared_collection(vector_store, db, "shared") == 0
+
+
+def test_build_lexical_index(tmp_path, db):
+    """Test stored chunks are added to the keyword index once."""
+    from sqlalchemy import text
+
+    from src.api.database import FTS_DDL
+    from src.api.services.lexical_search import LexicalIndex
+    from src.migrate import build_lexical_index
+
+    for ddl in FTS_DDL:
+        db.execute(text(ddl))
+    vector_store = VectorStore(persist_directory=str(tmp_path / "vectors"), backend="flat")
+    add_pdf(db, vector_store, "a", ["alpha AB-1234", "beta"])
+
+    assert build_lexical_index(vector_store, db) == 1
+    hits = LexicalIndex().search("AB-1234", db)
+    assert [(doc.page_content, doc.metadata["pdf_id"]) for doc, _ in hits] == [("alpha AB-1234", "a")]
+    assert build_lexical_index(vector_store, db) == 0
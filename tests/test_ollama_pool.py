@@ -0,0 +1,150 @@
+"""Test spreading Ollama calls across hosts."""
+import asyncio
+import threading
+
+import ollama
+import pytest
+from benchmarks.ollama_stub import OllamaStub
+from src.core.ollama_pool import NoHostAvailable, OllamaPool, PooledChatOllama, PooledEmbeddings
+
+
+@pytest.fixture
+def stubs():
+    with OllamaStub(base_latency=0.0, per_text_latency=0.0) as first, \
+            OllamaStub(base_latency=0.0, per_text_latency=0.0) as second:
+        yield first, second
+
+
+def test_calls_go_to_the_least_busy_host(stubs):
+    """Concurrent calls are spread across hosts rather than piled on one."""
+    first, second = stubs
+    pool = OllamaPool([first.url, second.url])
+    started = threading.Barrier(2)
+
+    def hold(host):
+        started.wait(timeout=2)
+        return host.url
+
+    threads = [threading.Thread(target=pool.call, args=("m", hold)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    hosts = pool.stats()["hosts"]
+    assert hosts[first.url]["requests"] == hosts[second.url]["requests"] == 1
+    assert all(host["outstanding"] == 0 for host in hosts.values())
+
+
+def test_calls_go_to_hosts_that_have_the_model():
+    """After a health check, a model is only sent to hosts that list it."""
+    with OllamaStub(base_latency=0.0, models=["llama3.2"]) as chat, \
+            OllamaStub(base_latency=0.0, per_text_latency=0.0, models=["nomic-embed-text"]) as embed:
+        pool = OllamaPool([chat.url, embed.url])
+        pool.check()
+
+        embeddings = PooledEmbeddings(pool, "nomic-embed-text")
+        for _ in range(3):
+            embeddings.embed_query("hello")
+        llm = PooledChatOllama(pool=pool, model="llama3.2")
+        assert llm.invoke("hi").content == chat.answer
+
+        assert embed.requests == 3 and chat.requests == 0
+        assert chat.chats == 1 and embed.chats == 0
+        assert sorted(m.model for m in pool.list_models().models) == ["llama3.2", "nomic-embed-text"]
+
+
+def test_failing_host_is_retried_elsewhere_and_taken_out(stubs):
+    """Calls fail over to a healthy host; repeated failures open the circuit until it recovers."""
+    first, second = stubs
+    pool = OllamaPool([first.url, second.url], failure_threshold=2, reset_seconds=60)
+    first.failing = True
+    embeddings = PooledEmbeddings(pool, "nomic-embed-text")
+
+    for _ in range(6):
+        assert len(embeddings.embed_query("hello")) == second.dim
+
+    stats = pool.stats()
+    assert stats["hosts"][first.url]["state"] == "open"
+    assert stats["hosts"][first.url]["failures"] == 2
+    assert stats["retries"] == 2
+    assert second.requests == 6
+    assert [host.url for host in pool.hosts_for()] == [second.url]
+
+    # The health check sees the host answer again and closes the circuit
+    first.failing = False
+    pool.check()
+    assert pool.stats()["hosts"][first.url]["state"] == "closed"
+
+
+def test_open_circuit_lets_one_trial_through(stubs):
+    """After reset_seconds a single request probes the host; success closes the circuit."""
+    first, _ = stubs
+    pool = OllamaPool([first.url], failure_threshold=1, reset_seconds=0.05)
+    first.failing = True
+    with pytest.raises(ollama.ResponseError):
+        pool.call("m", lambda host: host.client.list())
+    with pytest.raises(NoHostAvailable) as excinfo:
+        pool.call("m", lambda host: host.client.list())
+    assert excinfo.value.retry_after >= 1
+
+    first.failing = False
+    threading.Event().wait(0.06)
+    with pool.lease("m"):
+        # The trial is in flight: nobody else gets the host meanwhile
+        assert pool.stats()["hosts"][first.url]["state"] == "half_open"
+        assert pool.hosts_for() == []
+    assert pool.stats()["hosts"][first.url]["state"] == "closed"
+
+
+def test_missing_model_is_retried_on_another_host():
+    """A host that answers 404 for the model is skipped for one that has it."""
+    with OllamaStub(base_latency=0.0, models=[]) as empty, OllamaStub(base_latency=0.0) as full:
+        pool = OllamaPool([empty.url, full.url])
+        llm = PooledChatOllama(pool=pool, model="llama3.2")
+
+        answers = [llm.invoke("hi").content for _ in range(2)]
+
+        assert answers == [full.answer] * 2
+        assert full.chats == 2
+        # A missing model is not a host failure
+        assert pool.stats()["hosts"][empty.url]["state"] == "closed"
+
+
+def test_streams_fail_over_before_the_first_token(stubs):
+    """Streaming chat moves to another host when the first one cannot start."""
+    first, second = stubs
+    pool = OllamaPool([first.url, second.url])
+    first.failing = True
+
+    async def main():
+        tokens = [chunk.message.content async for chunk in pool.achat_stream("llama3.2", messages=[])]
+        llm_tokens = [chunk.content async for chunk in PooledChatOllama(pool=pool, model="llama3.2").astream("hi")]
+        return tokens, llm_tokens
+
+    tokens, llm_tokens = asyncio.run(main())
+
+    assert "".join(tokens) == second.answer
+    assert "".join(llm_tokens) == second.answer
+    assert second.chats == 2
+
+
+def test_clients_are_reused_per_host_and_event_loop(stubs):
+    """Chat models and async clients are built once, not per call."""
+    pool = OllamaPool([stubs[0].url])
+    host = pool.hosts[0]
+    llm = PooledChatOllama(pool=pool, model="llama3.2", keep_alive=300)
+
+    assert llm._on(host) is llm._on(host)
+    assert host.chat_model("llama3.2", 300) is not host.chat_model("llama3.2", -1)
+
+    async def clients():
+        await llm.ainvoke("hi")
+        return host.async_client(), host.async_client(), llm._on(host), llm._on(host)
+
+    first = asyncio.run(clients())
+    second = asyncio.run(clients())
+    assert first[0] is first[1] and first[2] is first[3]
+    # A new loop cannot use connections opened on a closed one
+    assert first[0] is not second[0] and first[2] is not second[2]
+    assert first[2] is not llm._on(host)
@@ -0,0 +1,76 @@
+"""Test deleting PDFs through the API."""
+from datetime import datetime
+
+import pytest
+from langchain_core.documents import Document
+from src.api.config import settings
+from src.api.database import IngestionJob, PDFMetadata
+from src.api.services.pdf_service import PDFService
+from src.core.content_store import collection_name_for_hash
+from src.core.vector_backends import _chroma_client
+
+
+@pytest.fixture
+def stored_pdf(api_db, monkeypatch):
+    """A PDF whose chunks live in the shared collection."""
+    monkeypatch.setattr(settings, "VECTOR_COLLECTION_MODE", "shared")
+    service = PDFService()
+    content_hash, path = service.content_store.put_bytes(b"%PDF-1.4 delete me")
+    service.vector_store.add_documents(
+        [Document(page_content="pump text", metadata={"pdf_id": "p1", "chunk_index": 0})],
+        collection_name=settings.SHARED_COLLECTION_NAME,
+        ids=["p1:0"]
+    )
+    db = api_db()
+    db.add(PDFMetadata(
+        pdf_id="p1", name="doc.pdf", collection_name=collection_name_for_hash(content_hash),
+        upload_timestamp=datetime.now(), doc_count=1, page_count=1, file_path=str(path),
+        content_hash=content_hash, vector_collection=settings.SHARED_COLLECTION_NAME
+    ))
+    db.commit()
+    db.close()
+    return path
+
+
+def test_delete_removes_file_and_record(client, api_db, stored_pdf):
+    """Deleting the last reference removes the chunks, file and record."""
+    response = client.delete("/api/v1/pdfs/p1")
+
+    assert response.status_code == 200
+    assert not stored_pdf.exists()
+    db = api_db()
+    assert db.query(PDFMetadata).count() == 0
+    db.close()
+
+
+def test_delete_survives_a_collection_dropped_elsewhere(client, api_db, stored_pdf):
+    """A collection that is already gone does not stop the rest of the cleanup."""
+    _chroma_client(settings.VECTOR_DB_DIR).delete_collection(settings.SHARED_COLLECTION_NAME)
+
+    response = client.delete("/api/v1/pdfs/p1")
+
+    assert response.status_code == 200
+    assert not stored_pdf.exists()
+    db = api_db()
+    assert db.query(PDFMetadata).count() == 0
+    db.close()
+
+
+def test_delete_keeps_a_file_a_pending_job_needs(client, api_db, stored_pdf):
+    """Another upload of the same content that is still queued keeps the stored file."""
+    db = api_db()
+    pdf = db.query(PDFMetadata).one()
+    db.add(IngestionJob(
+        job_id="j2", filename="again.pdf", file_path=str(stored_pdf), content_hash=pdf.content_hash,
+        status="queued", stage="parse", created_at=datetime.now(), updated_at=datetime.now()
+    ))
+    db.commit()
+    db.close()
+
+    response = client.delete("/api/v1/pdfs/p1")
+
+    assert response.status_code == 200
+    assert stored_pdf.exists()
+    db = api_db()
+    assert db.query(PDFMetadata).count() == 0
+    db.close()
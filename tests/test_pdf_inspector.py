@@ -0,0 +1,110 @@
+"""Test tiered PDF page inspection."""
+import pytest
+from pathlib import Path
+from unittest.mock import Mock, patch
+from langchain_core.documents import Document
+from src.core.document import DocumentProcessor
+from src.core.pdf_inspector import (
+    PageProfile,
+    classify_page,
+    page_runs,
+    TIER_TEXT,
+    TIER_SCANNED,
+    TIER_COMPLEX,
+)
+
+
+def make_page(chars=0, images=(), rects=0, tables=0, text="text"):
+    """Create a mock pdfplumber page of 100x100 points."""
+    page = Mock()
+    page.page_number = 1
+    page.width = 100
+    page.height = 100
+    page.chars = [{}] * chars
+    page.images = [
+        {"x0": 0, "x1": width, "top": 0, "bottom": height} for width, height in images
+    ]
+    page.rects = [{}] * rects
+    page.lines = []
+    page.find_tables.return_value = [Mock()] * tables
+    page.extract_text.return_value = text
+    return page
+
+
+def test_classify_text_page():
+    """Test a plain text page uses the fast tier and keeps its text."""
+    profile = classify_page(make_page(chars=500, text="hello"))
+    assert profile.tier == TIER_TEXT
+    assert profile.text == "hello"
+
+
+def test_classify_scanned_page():
+    """Test an image-only page is classified as scanned."""
+    profile = classify_page(make_page(chars=0, images=[(100, 100)]))
+    assert profile.tier == TIER_SCANNED
+    assert profile.text is None
+
+
+def test_classify_blank_page_is_text():
+    """Test a blank page does not need heavy parsing."""
+    assert classify_page(make_page(chars=0, text="")).tier == TIER_TEXT
+
+
+def test_classify_table_page():
+    """Test a ruled page with a detected table is complex."""
+    assert classify_page(make_page(chars=500, rects=20, tables=1)).tier == TIER_COMPLEX
+
+
+def test_classify_ruled_page_without_table():
+    """Test ruling lines alone do not make a page complex."""
+    assert classify_page(make_page(chars=500, rects=20, tables=0)).tier == TIER_TEXT
+
+
+def test_classify_figure_page():
+    """Test text mixed with a large figure is complex."""
+    assert classify_page(make_page(chars=500, images=[(100, 40)])).tier == TIER_COMPLEX
+
+
+def test_page_runs():
+    """Test grouping page numbers into contiguous bounded runs."""
+    assert page_runs([1, 2, 3, 5, 6, 9], max_pages=2) == [[1, 2], [3], [5, 6], [9]]
+    assert page_runs([], max_pages=4) == []
+
+
+def _fake_inspect(file_path, first_page, last_page):
+    """Pages 3 and 4 are scanned, the rest have text."""
+    return [
+        PageProfile(n, TIER_SCANNED, 0, 1.0) if n in (3, 4)
+        else PageProfile(n, TIER_TEXT, 100, 0.0, text=f"text {n}")
+        for n in range(first_page, last_page + 1)
+    ]
+
+
+def _fake_partition(file_path, first_page, last_page, unstructured_kwargs):
+    """Return one OCR'd document per page."""
+    return [
+        Document(page_content=f"ocr {n}", metadata={"source": file_path, "page_number": n})
+        for n in range(first_page, last_page + 1)
+    ]
+
+
+@patch('src.core.document.count_pdf_pages', return_value=6)
+@patch('src.core.document.inspect_pages', side_effect=_fake_inspect)
+@patch('src.core.document._partition_page_range', side_effect=_fake_partition)
+def test_tiered_load_routes_pages(mock_partition, mock_inspect, mock_count):
+    """Test only non-text pages reach the unstructured pipeline."""
+    processor = DocumentProcessor(tiered=True, pages_per_task=4)
+    progress = []
+    documents = processor.load_pdf(Path("mixed.pdf"), progress.append)
+
+    mock_partition.assert_called_once_with("mixed.pdf", 3, 4, {})
+    assert [doc.metadata["page_number"] for doc in documents] == [1, 2, 3, 4, 5, 6]
+    assert [doc.metadata["extraction_tier"] for doc in documents] == [
+        TIER_TEXT, TIER_TEXT, TIER_SCANNED, TIER_SCANNED, TIER_TEXT, TIER_TEXT
+    ]
+    assert documents[2].page_content == "ocr 3"
+    assert progress == [4, 6]
+
+    # Tier metadata is carried into chunks
+    chunks = processor.split_documents(documents)
+    assert all("extraction_tier" in chunk.metadata for chunk in chunks)
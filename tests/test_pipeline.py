@@ -0,0 +1,63 @@
+"""Test bounded streaming pipeline stages."""
+import threading
+import time
+
+import pytest
+from src.core.pipeline import batched, bounded
+
+
+def test_bounded_preserves_order():
+    """Test items come out in production order."""
+    assert list(bounded(iter(range(100)), maxsize=4)) == list(range(100))
+
+
+def test_bounded_limits_read_ahead():
+    """Test the producer runs at most maxsize items ahead of the consumer."""
+    produced = []
+
+    def producer():
+        for i in range(50):
+            produced.append(i)
+            yield i
+
+    stream = bounded(producer(), maxsize=3)
+    assert next(stream) == 0
+    time.sleep(0.3)
+    # One consumed, three buffered, one blocked waiting for space
+    assert len(produced) <= 5
+    stream.close()
+
+
+def test_bounded_reraises_producer_error():
+    """Test a failing stage surfaces its exception to the consumer."""
+    def producer():
+        yield 1
+        raise ValueError("parse failed")
+
+    stream = bounded(producer(), maxsize=2)
+    assert next(stream) == 1
+    with pytest.raises(ValueError, match="parse failed"):
+        next(stream)
+
+
+def test_bounded_close_stops_producer():
+    """Test closing the consumer stops the producer thread."""
+    finished = threading.Event()
+
+    def producer():
+        try:
+            for i in range(10_000):
+                yield i
+        finally:
+            finished.set()
+
+    stream = bounded(producer(), maxsize=2)
+    next(stream)
+    stream.close()
+    assert finished.wait(2)
+
+
+def test_batched():
+    """Test grouping into fixed-size batches with a short tail."""
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
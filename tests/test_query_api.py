@@ -0,0 +1,151 @@
+"""Test the query endpoints."""
+import json
+from datetime import datetime
+
+import pytest
+from langchain_core.documents import Document
+from src.api.config import settings
+from src.api.database import ChatMessage, IngestionJob, PDFMetadata
+from src.api.services.admission import model_scheduler
+from src.api.services.pdf_service import PDFService, vector_collection_for_hash
+from src.api.services.rag_service import RAGService
+from src.core.content_store import collection_name_for_hash, pdf_id_for_hash
+
+
+@pytest.fixture
+def stored_pdf(api_db):
+    """One ingested PDF with a single chunk."""
+    service = PDFService()
+    content_hash, path = service.content_store.put_bytes(b"%PDF-1.4 pumps")
+    collection_name = collection_name_for_hash(content_hash)
+    service.vector_store.add_documents(
+        [Document(page_content="The pump moves water uphill.", metadata={"pdf_id": "p1", "chunk_index": 0})],
+        collection_name=collection_name,
+        ids=["p1:0"]
+    )
+    db = api_db()
+    db.add(PDFMetadata(
+        pdf_id="p1", name="pumps.pdf", collection_name=collection_name,
+        upload_timestamp=datetime.now(), doc_count=1, page_count=1, file_path=str(path),
+        content_hash=content_hash, vector_collection=collection_name
+    ))
+    db.commit()
+    db.close()
+
+
+def parse_sse(body):
+    """``(event, data)`` pairs from a text/event-stream body."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_sends_steps_tokens_then_the_saved_answer(client, api_db, stored_pdf, ollama_stub, monkeypatch):
+    """Events arrive in order, and the answer is saved only once the stream is complete."""
+    log = []
+    stream = RAGService.astream_query_multi_pdf
+    save_message = RAGService.save_message
+
+    async def logged_stream(self, *args, **kwargs):
+        async for event, data in stream(self, *args, **kwargs):
+            log.append(event)
+            yield event, data
+
+    def logged_save(self, session_id, role, *args, **kwargs):
+        log.append(f"save {role}")
+        return save_message(self, session_id, role, *args, **kwargs)
+
+    monkeypatch.setattr(RAGService, "astream_query_multi_pdf", logged_stream)
+    monkeypatch.setattr(RAGService, "save_message", logged_save)
+
+    response = client.post("/api/v1/query/stream", json={"question": "What does the pump do?", "model": "llama3.2"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names[0] == "session"
+    assert names[-1] == "done"
+    assert names.index("step") < names.index("sources") < names.index("token")
+    assert "".join(data for name, data in events if name == "token") == ollama_stub.answer
+
+    done = events[-1][1]
+    assert done["answer"] == ollama_stub.answer
+    assert done["sources"][0]["pdf_id"] == "p1"
+    assert done["session_id"] == events[0][1]["session_id"]
+    # The question is saved up front; the answer after the service's last event
+    assert log[0] == "save user"
+    assert log[-2:] == ["done", "save assistant"]
+    db = api_db()
+    saved = db.query(ChatMessage).filter(ChatMessage.message_id == done["message_id"]).one()
+    assert (saved.role, saved.content) == ("assistant", ollama_stub.answer)
+    db.close()
+
+
+@pytest.fixture
+def busy_model(monkeypatch):
+    """A model whose only slot is taken, with room for one queued request."""
+    monkeypatch.setattr(settings, "MODEL_MAX_CONCURRENT", 1)
+    monkeypatch.setattr(settings, "MODEL_QUEUE_SIZE", 1)
+    monkeypatch.setattr(settings, "MODEL_QUEUE_TIMEOUT_SECONDS", 0.05)
+    scheduler = model_scheduler("busy-model")
+    scheduler.acquire()
+    yield "busy-model"
+    scheduler.release()
+
+
+@pytest.mark.parametrize("path", ["/api/v1/query", "/api/v1/query/stream"])
+def test_full_queue_is_a_429_with_retry_after(client, api_db, busy_model, monkeypatch, path):
+    """A model with no queue room turns the request away before saving anything."""
+    monkeypatch.setattr(settings, "MODEL_QUEUE_SIZE", 0)
+
+    response = client.post(path, json={"question": "What does the pump do?", "model": busy_model})
+
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    db = api_db()
+    assert db.query(ChatMessage).count() == 0
+    db.close()
+
+
+def test_queue_timeout_is_a_503_with_retry_after(client, stored_pdf, busy_model):
+    """A request that waits out the queue timeout is told when to come back."""
+    response = client.post("/api/v1/query", json={"question": "What does the pump do?", "model": busy_model})
+
+    assert response.status_code == 503
+    assert "Timed out" in response.json()["detail"]
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+def test_query_reaches_a_pdf_still_being_ingested(client, api_db, ollama_stub):
+    """Chunks a running job has stored are searchable before its PDF record exists."""
+    service = PDFService()
+    content_hash, path = service.content_store.put_bytes(b"%PDF-1.4 valves")
+    pdf_id = pdf_id_for_hash(content_hash)
+    chunk = Document(
+        page_content="The valve stops the backflow.",
+        metadata={"pdf_id": pdf_id, "pdf_name": "valves.pdf", "chunk_index": 0}
+    )
+    service.vector_store.add_documents([chunk], collection_name=vector_collection_for_hash(content_hash), ids=[f"{pdf_id}:0"])
+    db = api_db()
+    service.lexical_index.add_chunks([chunk], db)
+    db.add(IngestionJob(
+        job_id="j1", filename="valves.pdf", file_path=str(path), content_hash=content_hash,
+        status="running", stage="stream", chunks_embedded=1, pages_total=10, pages_done=1,
+        created_at=datetime.now(), updated_at=datetime.now()
+    ))
+    db.commit()
+    db.close()
+
+    response = client.post(
+        "/api/v1/query", json={"question": "What stops the backflow?", "model": "llama3.2", "pdf_ids": [pdf_id]}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["answer"] == ollama_stub.answer
+    assert [source["pdf_id"] for source in response.json()["sources"]] == [pdf_id]
+    db = api_db()
+    assert db.query(PDFMetadata).count() == 0
+    db.close()
@@ -114,6 +114,23 @@ class TestRAGPipeline(unittest.TestCase):
         response = self.rag.get_response(special_question)
         self.assertEqual(response, expected_response)
     
+    def test_stream_response(self):
+        """Test streaming a response piece by piece."""
+        self.mock_chain.stream.return_value = iter(["Test ", "response"])
+        self.rag.chain = self.mock_chain
+
+        chunks = list(self.rag.stream_response("What is this document about?"))
+
+        self.assertEqual(chunks, ["Test ", "response"])
+        self.mock_chain.stream.assert_called_once_with("What is this document about?")
+
+    def test_stream_response_error_handling(self):
+        """Test errors raised while streaming reach the caller."""
+        self.mock_chain.stream.side_effect = Exception("Chain error")
+
+        with self.assertRaises(Exception):
+            list(self.rag.stream_response("Test question"))
+
     def test_chain_error_handling(self):
         """Test error handling in the chain."""
         # Make the chain raise an exception
@@ -0,0 +1,34 @@
+"""Test reciprocal rank fusion."""
+from langchain_core.documents import Document
+
+from src.core.rank_fusion import merge_by_score, reciprocal_rank_fusion
+
+
+def doc(pdf_id, index, score=None):
+    metadata = {"pdf_id": pdf_id, "chunk_index": index}
+    if score is not None:
+        metadata["score"] = score
+    return Document(page_content=f"{pdf_id}-{index}", metadata=metadata)
+
+
+def test_chunks_found_by_both_lists_rank_first():
+    """Test agreement between retrievers outranks a single top hit."""
+    dense = [doc("a", 0), doc("a", 1), doc("b", 0)]
+    lexical = [doc("c", 0), doc("b", 0)]
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+    assert [d.page_content for d in fused] == ["b-0", "a-0", "c-0", "a-1"]
+    assert fused[0].metadata["rrf_score"] == 1 / 63 + 1 / 62
+
+
+def test_duplicates_are_merged():
+    """Test the same chunk from two lists appears once."""
+    fused = reciprocal_rank_fusion([[doc("a", 0)], [doc("a", 0)]])
+    assert len(fused) == 1
+
+
+def test_merge_by_score_orders_across_collections():
+    """Test a strong chunk from a later PDF outranks weak ones from the first."""
+    first = [doc("a", 0, 0.61), doc("a", 1, 0.55), doc("a", 2, 0.40)]
+    last = [doc("b", 0, 0.90), doc("b", 1, 0.58), doc("a", 0, 0.61)]
+    merged = list(merge_by_score([first, last]))
+    assert [d.page_content for d in merged] == ["b-0", "a-0", "b-1", "a-1", "a-2"]
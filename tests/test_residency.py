@@ -0,0 +1,149 @@
+"""Test keeping Ollama models loaded."""
+import asyncio
+
+import pytest
+from benchmarks.ollama_stub import OllamaStub
+from src.api.config import settings
+from src.api.services.residency import configure_residency, model_residency
+from src.core import residency as residency_module
+from src.core.ollama_pool import OllamaPool
+from src.core.residency import PINNED, ModelResidency
+
+
+@pytest.fixture
+def stub():
+    with OllamaStub(base_latency=0.0, per_text_latency=0.0, load_latency=0.3) as server:
+        yield server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A controllable ``time.monotonic`` for the residency module."""
+    now = [1000.0]
+    monkeypatch.setattr(residency_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_keep_alive_follows_idle_gaps(clock):
+    """Models get keep_alive from their idle gaps; pinned ones are never unloaded."""
+    residency = ModelResidency(OllamaPool(["http://127.0.0.1:9"]), min_keep_alive=60, max_keep_alive=1000)
+    residency.pin("embed", embedding=True)
+    assert residency.keep_alive("embed") == PINNED
+    assert residency.keep_alive("chat") == 60
+
+    for _ in range(3):
+        residency.record_use("chat")
+        clock[0] += 300
+    # Used every five minutes: kept loaded across the gap
+    assert residency.keep_alive("chat") == 600
+
+    # Bursts shorter than min_keep_alive do not shrink the estimate
+    residency.record_use("chat")
+    clock[0] += 1
+    residency.record_use("chat")
+    assert residency.keep_alive("chat") == 600
+
+    for _ in range(5):
+        clock[0] += 5000
+        residency.record_use("chat")
+    # Rarely used: not worth holding beyond the minimum
+    assert residency.keep_alive("chat") == 60
+
+
+def test_concurrent_callers_share_one_load(stub):
+    """A cold model is loaded once for all waiting callers, and counted."""
+    residency = ModelResidency(OllamaPool([stub.url]))
+
+    async def main():
+        await asyncio.gather(*(residency.aensure_loaded("llama3.2") for _ in range(5)))
+
+    asyncio.run(main())
+    asyncio.run(main())
+
+    assert stub.loads == 1
+    stats = residency.stats()["llama3.2"]
+    assert stats["uses"] == 10
+    assert stats["resident_hosts"] == [stub.url]
+    assert stats["warmups"] == 1
+    assert stats["cold_starts"] == 1
+    assert stats["avg_load_ms"] >= 250
+
+
+def test_pinned_model_is_reloaded_after_eviction(stub):
+    """Start loads pinned models with keep_alive=-1, and refresh reloads them."""
+    residency = ModelResidency(OllamaPool([stub.url]))
+    residency.pin("nomic-embed-text", embedding=True)
+    residency.start(refresh_interval=None)
+    for future in residency.warm("nomic-embed-text"):
+        future.result()
+    assert stub.loaded == {"nomic-embed-text": None}
+
+    stub.unload("nomic-embed-text")
+    residency.refresh()
+    for future in residency.warm("nomic-embed-text"):
+        future.result()
+
+    assert stub.loads == 2
+    stats = residency.stats()["nomic-embed-text"]
+    assert stats["pinned"]
+    assert stats["cold_starts"] == 2
+
+
+def test_failed_load_is_left_to_the_request():
+    """A model the server cannot load is counted but does not raise."""
+    with OllamaStub(base_latency=0.0, models=[]) as server:
+        residency = ModelResidency(OllamaPool([server.url]))
+
+        asyncio.run(residency.aensure_loaded("missing"))
+
+    stats = residency.stats()["missing"]
+    assert stats["load_failures"] == 1
+    assert stats["resident_hosts"] == []
+
+
+def test_model_is_loaded_on_every_host():
+    """A cold model is warmed on each host that serves it, not just one."""
+    with OllamaStub(base_latency=0.0) as first, OllamaStub(base_latency=0.0) as second:
+        residency = ModelResidency(OllamaPool([first.url, second.url]))
+
+        asyncio.run(residency.aensure_loaded("llama3.2"))
+
+        assert first.loads == second.loads == 1
+        assert residency.stats()["llama3.2"]["resident_hosts"] == sorted([first.url, second.url])
+        # Resident everywhere: the next use needs no load
+        assert residency.record_use("llama3.2")
+
+
+def test_replacing_the_pool_forgets_loaded_hosts(stub):
+    """Models loaded on the old pool's hosts are not assumed loaded on the new one."""
+    residency = ModelResidency(OllamaPool([stub.url]))
+    asyncio.run(residency.aensure_loaded("llama3.2"))
+    assert residency.record_use("llama3.2")
+
+    with OllamaStub(base_latency=0.0) as other:
+        residency.use_pool(OllamaPool([other.url]))
+
+        assert residency.stats()["llama3.2"]["resident_hosts"] == []
+        assert not residency.record_use("llama3.2")
+
+
+def test_api_residency_is_configured_once(stub, monkeypatch):
+    """Request paths read the startup configuration; only a replaced pool reconfigures it."""
+    monkeypatch.setattr(residency_module, "_residency", None)
+    monkeypatch.setattr(settings, "OLLAMA_HOSTS", [stub.url])
+    monkeypatch.setattr(settings, "MODEL_KEEP_ALIVE_MIN_SECONDS", 120)
+    monkeypatch.setattr(settings, "PIN_EMBEDDING_MODEL", True)
+    residency = configure_residency()
+    asyncio.run(residency.aensure_loaded("llama3.2"))
+
+    monkeypatch.setattr(settings, "MODEL_KEEP_ALIVE_MIN_SECONDS", 30)
+    assert model_residency() is residency
+    assert residency.min_keep_alive == 120
+    assert residency.keep_alive(settings.EMBEDDING_MODEL) == PINNED
+    assert residency.stats()["llama3.2"]["resident_hosts"] == [stub.url]
+
+    with OllamaStub(base_latency=0.0) as other:
+        monkeypatch.setattr(settings, "OLLAMA_HOSTS", [other.url])
+        assert model_residency() is residency
+        assert residency.pool.urls == [other.url]
+        assert residency.stats()["llama3.2"]["resident_hosts"] == []
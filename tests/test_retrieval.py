@@ -0,0 +1,180 @@
+"""Test retrieval planning: one query expansion per question."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.fake import FakeListLLM
+
+from src.core.retrieval import RetrievalPlanner, SearchTarget
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds text as [len(text), 1] and counts calls."""
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+class FakeCollection:
+    """Returns the same two chunks for every vector and records the searches."""
+
+    def __init__(self, pdf_id, delay=0.0):
+        self.pdf_id = pdf_id
+        self.delay = delay
+        self.searches = []
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        self.searches.append((embedding, k, kwargs))
+        time.sleep(self.delay)
+        return [Document(page_content=f"{self.pdf_id}-{i}", metadata={"pdf_id": self.pdf_id, "chunk_index": i})
+                for i in range(2)]
+
+
+class ScoredCollection(FakeCollection):
+    """Reports L2 distances that depend on the query vector, like Chroma."""
+
+    def similarity_search_by_vector_with_relevance_scores(self, embedding, k=4, **kwargs):
+        docs = self.similarity_search_by_vector(embedding, k, **kwargs)
+        return [(doc, 0.1 * i + 1.0 / embedding[0]) for i, doc in enumerate(docs)]
+
+    def _select_relevance_score_fn(self):
+        return lambda distance: 1.0 - distance
+
+
+def test_plan_expands_and_embeds_once():
+    """Test one LLM call and one embedding batch serve every collection."""
+    llm = FakeListLLM(responses=["1. What does the pump do?\n\n2. Pump purpose?\n"])
+    embeddings = CountingEmbeddings()
+    planner = RetrievalPlanner(llm, embeddings)
+
+    plan = planner.plan("What is the pump for?")
+    assert plan.queries == ["What is the pump for?", "What does the pump do?", "Pump purpose?"]
+    assert embeddings.calls == [plan.queries]
+
+    collections = [FakeCollection(f"p{i}") for i in range(5)]
+    results = [planner.search(plan, collection, k=3, filter={"pdf_id": "x"}) for collection in collections]
+    assert [doc.page_content for doc in results[0]] == ["p0-0", "p0-1"]  # duplicates merged
+    assert all(len(c.searches) == 3 for c in collections)
+    assert collections[0].searches[0][1:] == (3, {"filter": {"pdf_id": "x"}})
+    assert len(embeddings.calls) == 1
+
+
+def test_expansion_failure_falls_back_to_question():
+    """Test a failing LLM still searches with the original question."""
+    class BrokenLLM(FakeListLLM):
+        def _call(self, *args, **kwargs):
+            raise RuntimeError("model not loaded")
+
+    plan = RetrievalPlanner(BrokenLLM(responses=[""]), CountingEmbeddings()).plan("q?")
+    assert plan.queries == ["q?"]
+
+
+def test_search_keeps_best_relevance_per_chunk():
+    """Test distances become relevance scores and each chunk keeps its best."""
+    llm = FakeListLLM(responses=["a much longer rephrasing"])
+    planner = RetrievalPlanner(llm, CountingEmbeddings())
+    plan = planner.plan("q?")
+    docs = planner.search(plan, ScoredCollection("p0"), k=2)
+    # The longer query embeds as [24, 1], so its distances are smaller
+    assert [doc.metadata["score"] for doc in docs] == [1.0 - 1 / 24, 1.0 - (0.1 + 1 / 24)]
+    assert [doc.page_content for doc in docs] == ["p0-0", "p0-1"]
+
+
+def test_search_all_runs_collections_concurrently():
+    """Test searches overlap and results come back in target order."""
+    planner = RetrievalPlanner(FakeListLLM(responses=[""]), CountingEmbeddings())
+    plan = planner.plan("q?")
+    barrier = threading.Barrier(3, timeout=5)
+
+    def opener(pdf_id):
+        def open_collection():
+            barrier.wait()  # only passes if all three are searching at once
+            return FakeCollection(pdf_id)
+        return open_collection
+
+    targets = [SearchTarget(f"pdf {i}", opener(f"p{i}")) for i in range(3)]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        results = planner.search_all(plan, targets, executor=executor)
+    assert [r.target.label for r in results] == ["pdf 0", "pdf 1", "pdf 2"]
+    assert all(r.ok for r in results)
+    assert [r.docs[0].page_content for r in results] == ["p0-0", "p1-0", "p2-0"]
+
+
+def test_search_all_returns_partial_results():
+    """Test a slow or failing collection does not hold back the others."""
+    planner = RetrievalPlanner(FakeListLLM(responses=[""]), CountingEmbeddings())
+    plan = planner.plan("q?")
+
+    def broken():
+        raise RuntimeError("collection missing")
+
+    targets = [
+        SearchTarget("slow", lambda: FakeCollection("slow", delay=2.0)),
+        SearchTarget("fast", lambda: FakeCollection("fast")),
+        SearchTarget("broken", broken),
+    ]
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        started = time.monotonic()
+        slow, fast, failed = planner.search_all(plan, targets, timeout=0.2, executor=executor)
+        assert time.monotonic() - started < 1.0
+    assert slow.timed_out and not slow.docs
+    assert fast.ok and len(fast.docs) == 2
+    assert failed.error == "collection missing"
+
+
+def test_aplan_matches_plan():
+    """Test the async planner expands and embeds like the blocking one."""
+    llm = FakeListLLM(responses=["1. What does the pump do?\n2. Pump purpose?"])
+    embeddings = CountingEmbeddings()
+
+    plan = asyncio.run(RetrievalPlanner(llm, embeddings).aplan("What is the pump for?"))
+    assert plan.queries == ["What is the pump for?", "What does the pump do?", "Pump purpose?"]
+    assert embeddings.calls == [plan.queries]
+
+
+def test_asearch_all_keeps_event_loop_free():
+    """Test async search runs on the pool, times out slow targets and leaves the loop responsive."""
+    planner = RetrievalPlanner(FakeListLLM(responses=[""]), CountingEmbeddings())
+    plan = planner.plan("q?")
+
+    def broken():
+        raise RuntimeError("collection missing")
+
+    targets = [
+        SearchTarget("slow", lambda: FakeCollection("slow", delay=2.0)),
+        SearchTarget("fast", lambda: FakeCollection("fast", delay=0.1)),
+        SearchTarget("broken", broken),
+    ]
+
+    async def main(executor):
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        results = await planner.asearch_all(plan, targets, timeout=0.3, executor=executor)
+        ticker.cancel()
+        return results, ticks
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        started = time.monotonic()
+        (slow, fast, failed), ticks = asyncio.run(main(executor))
+        assert time.monotonic() - started < 1.0
+    assert slow.timed_out and not slow.docs
+    assert fast.ok and len(fast.docs) == 2
+    assert failed.error == "collection missing"
+    assert ticks >= 10
@@ -0,0 +1,85 @@
+"""Test the retrieval result cache and corpus versioning."""
+import pytest
+from langchain_core.documents import Document
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.api.database import Base
+from src.api.services.retrieval_cache import (
+    RetrievalCache,
+    bump_corpus_version,
+    corpus_version,
+    retrieval_key,
+)
+
+
+@pytest.fixture
+def db():
+    """In-memory API database."""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def test_corpus_version_bumps_with_commit(db):
+    """Test the version starts at 0 and each bump adds one."""
+    assert corpus_version(db) == 0
+    bump_corpus_version(db)
+    db.commit()
+    bump_corpus_version(db)
+    db.commit()
+    assert corpus_version(db) == 2
+
+    bump_corpus_version(db)
+    db.rollback()
+    assert corpus_version(db) == 2
+
+
+def test_key_normalizes_question_and_pdf_order():
+    """Test spacing, case and PDF order do not change the key."""
+    assert retrieval_key("What is  the Pump?", ["b", "a"], "m", 3) == retrieval_key("what is the pump? ", ["a", "b"], "m", 3)
+    assert retrieval_key("q", ["a"], "m", 3) != retrieval_key("q", ["a"], "m", 4)
+    assert retrieval_key("q", ["a"], "m", 3) != retrieval_key("q", ["a"], "other", 3)
+
+
+def test_newer_corpus_version_drops_entries():
+    """Test entries from an older corpus are never served."""
+    cache = RetrievalCache(max_entries=2)
+    docs = [Document(page_content="chunk")]
+    cache.put(retrieval_key("q", ["a"], "m", 1), docs)
+    assert cache.get(retrieval_key("q", ["a"], "m", 1)) == docs
+
+    assert cache.get(retrieval_key("q", ["a"], "m", 2)) is None
+    cache.put(retrieval_key("late", ["a"], "m", 1), docs)  # finished after the bump
+    stats = cache.stats()
+    assert stats["entries"] == 0
+    assert stats["invalidations"] == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_least_recently_used_evicted():
+    """Test the cache holds at most max_entries results."""
+    cache = RetrievalCache(max_entries=2)
+    for question in ["a", "b"]:
+        cache.put(retrieval_key(question, [], "m", 0), [])
+    cache.get(retrieval_key("a", [], "m", 0))
+    cache.put(retrieval_key("c", [], "m", 0), [])
+    assert cache.get(retrieval_key("b", [], "m", 0)) is None
+    assert cache.get(retrieval_key("a", [], "m", 0)) == []
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cached_documents_are_copies():
+    """Test callers changing returned documents do not change the cache."""
+    cache = RetrievalCache()
+    key = retrieval_key("q", ["p1"], "m", 0)
+    stored = Document(page_content="text", metadata={"pdf_id": "p1"})
+    cache.put(key, [stored])
+    stored.metadata["pdf_name"] = "changed before get"
+
+    [doc] = cache.get(key)
+    doc.metadata["pdf_name"] = "changed after get"
+
+    assert cache.get(key)[0].metadata == {"pdf_id": "p1"}
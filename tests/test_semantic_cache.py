@@ -0,0 +1,99 @@
+"""Test the semantic answer cache."""
+from src.api.services import semantic_cache as semantic_cache_module
+from src.api.services.semantic_cache import SemanticAnswerCache, chunk_overlap, semantic_scope
+
+
+def store(cache, scope, question, vector, answer="answer", chunk_ids=(("p1", 0),)):
+    cache.put(scope, question, vector, answer, [{"pdf_id": "p1"}], ["📚 step"], list(chunk_ids))
+
+
+def test_paraphrase_above_threshold_hits():
+    """Test the nearest earlier question is returned only above the threshold."""
+    cache = SemanticAnswerCache(threshold=0.9)
+    scope = semantic_scope(["p2", "p1"], "m", 1)
+    store(cache, scope, "what is the refund policy", [1.0, 0.0, 0.0], answer="refunds")
+    store(cache, scope, "who is the ceo", [0.0, 1.0, 0.0], answer="ceo")
+
+    entry, similarity = cache.lookup(semantic_scope(["p1", "p2"], "m", 1), [0.95, 0.1, 0.0])
+    assert entry.answer == "refunds"
+    assert similarity > 0.99
+
+    entry, similarity = cache.lookup(scope, [0.7, 0.7, 0.0])
+    assert entry is None and 0.7 < similarity < 0.72
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["similarity_buckets"]["0.70"]["misses"] == 1
+
+
+def test_other_scopes_do_not_match():
+    """Test answers are not shared across PDF sets, models or corpus versions."""
+    cache = SemanticAnswerCache(threshold=0.9)
+    store(cache, semantic_scope(["p1"], "m", 1), "q", [1.0, 0.0])
+    assert cache.lookup(semantic_scope(["p1", "p2"], "m", 1), [1.0, 0.0])[0] is None
+    assert cache.lookup(semantic_scope(["p1"], "other", 1), [1.0, 0.0])[0] is None
+
+    store(cache, semantic_scope(["p1"], "m", 2), "q", [1.0, 0.0])
+    assert cache.stats()["entries"] == 1  # the version 1 entry was dropped
+
+
+def test_eviction_is_bounded():
+    """Test the least recently used entry goes once max_entries is reached."""
+    cache = SemanticAnswerCache(threshold=0.9, max_entries=2)
+    scope = semantic_scope(["p1"], "m", 1)
+    store(cache, scope, "a", [1.0, 0.0, 0.0])
+    store(cache, scope, "b", [0.0, 1.0, 0.0])
+    cache.lookup(scope, [1.0, 0.0, 0.0])
+    store(cache, scope, "c", [0.0, 0.0, 1.0])
+    assert cache.lookup(scope, [0.0, 1.0, 0.0])[0] is None
+    assert cache.lookup(scope, [1.0, 0.0, 0.0])[0].question == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_false_hits_are_counted_and_dropped():
+    """Test an audited false hit is recorded in its bucket and removed."""
+    cache = SemanticAnswerCache(threshold=0.9)
+    scope = semantic_scope(["p1"], "m", 1)
+    store(cache, scope, "q", [1.0, 0.0], chunk_ids=[("p1", 0), ("p1", 1)])
+    entry, similarity = cache.lookup(scope, [0.96, 0.28])
+
+    fresh_context = [("p1", 5), ("p1", 1)]
+    false_hit = chunk_overlap(fresh_context, entry.chunk_ids) < 0.5
+    cache.record_audit(entry, similarity, false_hit)
+
+    stats = cache.stats()
+    assert (stats["audits"], stats["false_hits"], stats["false_hit_rate"]) == (1, 1, 1.0)
+    assert stats["similarity_buckets"]["0.96"] == {"hits": 1, "misses": 0, "audits": 1, "false_hits": 1}
+    assert stats["entries"] == 0
+
+
+def test_expired_nearest_falls_through_to_the_next_match(monkeypatch):
+    """Test an expired nearest entry is dropped and the next one above the threshold is used."""
+    now = [1000.0]
+    monkeypatch.setattr(semantic_cache_module.time, "monotonic", lambda: now[0])
+    cache = SemanticAnswerCache(threshold=0.9, ttl_seconds=60)
+    scope = semantic_scope(["p1"], "m", 1)
+    store(cache, scope, "old", [1.0, 0.0, 0.0], answer="old")
+    now[0] += 50
+    store(cache, scope, "newer", [0.95, 0.31, 0.0], answer="newer")
+    now[0] += 20
+
+    entry, similarity = cache.lookup(scope, [1.0, 0.0, 0.0])
+
+    assert entry.answer == "newer"
+    assert 0.9 < similarity < 0.99
+    assert cache.stats()["entries"] == 1
+
+
+def test_lookup_returns_copies():
+    """Test changing a returned entry leaves the cached answer intact."""
+    cache = SemanticAnswerCache(threshold=0.9)
+    scope = semantic_scope(["p1"], "m", 1)
+    store(cache, scope, "q", [1.0, 0.0])
+
+    entry, _ = cache.lookup(scope, [1.0, 0.0])
+    entry.sources[0]["pdf_id"] = "changed"
+    entry.reasoning_steps.append("extra")
+
+    entry, _ = cache.lookup(scope, [1.0, 0.0])
+    assert entry.sources == [{"pdf_id": "p1"}]
+    assert entry.reasoning_steps == ["📚 step"]
@@ -0,0 +1,132 @@
+"""Test streaming PDF uploads."""
+import asyncio
+from pathlib import Path
+
+import pytest
+from src.api.config import settings
+from src.core.content_store import ContentWriter
+
+BOUNDARY = "test-boundary"
+PDF_BYTES = b"%PDF-1.4\n" + b"x" * 4096 + b"\n%%EOF\n"
+
+
+class RecordingQueue:
+    """Ingestion queue that only records submitted jobs."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, job_id):
+        self.submitted.append(job_id)
+        return True
+
+
+@pytest.fixture
+def ingestion_queue():
+    return RecordingQueue()
+
+
+def multipart(content, filename="doc.pdf", field="file", close=True):
+    """A multipart/form-data body holding one file part."""
+    body = (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content
+    if close:
+        body += f"\r\n--{BOUNDARY}--\r\n".encode()
+    return body
+
+
+def post(client, body, headers=None):
+    return client.post(
+        "/api/v1/pdfs/upload",
+        content=body,
+        headers={"Content-Type": f"multipart/form-data; boundary={BOUNDARY}", **(headers or {})}
+    )
+
+
+def stored_files():
+    """Files left in the content store, finished or partial."""
+    return [path for path in Path(settings.PDF_STORAGE_DIR).rglob("*") if path.is_file()]
+
+
+def test_upload_is_stored_and_queued(client, ingestion_queue):
+    """A PDF is stored under its hash and its job queued."""
+    response = post(client, multipart(PDF_BYTES))
+
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued"
+    assert ingestion_queue.submitted == [job["job_id"]]
+    [path] = stored_files()
+    assert path.read_bytes() == PDF_BYTES
+
+
+def test_upload_writes_off_the_event_loop(client, monkeypatch):
+    """Disk writes run on worker threads, not the event loop serving other requests."""
+    on_loop = []
+    write = ContentWriter.write
+
+    def recording_write(self, data):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        write(self, data)
+
+    monkeypatch.setattr(ContentWriter, "write", recording_write)
+
+    response = post(client, multipart(PDF_BYTES))
+
+    assert response.status_code == 202
+    assert on_loop and not any(on_loop)
+
+
+def test_missing_file_part_is_rejected(client, ingestion_queue):
+    """A form without the file field is a 400."""
+    response = post(client, multipart(PDF_BYTES, field="other"))
+
+    assert response.status_code == 400
+    assert "file" in response.json()["detail"]
+    assert stored_files() == []
+    assert ingestion_queue.submitted == []
+
+
+def test_truncated_body_is_rejected(client, ingestion_queue):
+    """A body that ends inside the file part is a 400, not a shorter PDF."""
+    response = post(client, multipart(PDF_BYTES, close=False))
+
+    assert response.status_code == 400
+    assert stored_files() == []
+    assert ingestion_queue.submitted == []
+
+
+def test_upload_over_the_limit_is_rejected_mid_stream(client, monkeypatch, ingestion_queue):
+    """An upload is cut off with a 413 once it passes MAX_UPLOAD_BYTES."""
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1024)
+    body = multipart(PDF_BYTES)
+
+    # Chunked, without a Content-Length to reject it up front
+    response = post(client, (body[i:i + 512] for i in range(0, len(body), 512)))
+
+    assert response.status_code == 413
+    assert stored_files() == []
+
+
+def test_non_pdf_is_rejected(client, ingestion_queue):
+    """Content without the PDF magic bytes is a 415."""
+    response = post(client, multipart(b"PK\x03\x04 not a pdf"))
+
+    assert response.status_code == 415
+    assert stored_files() == []
+    assert ingestion_queue.submitted == []
+
+
+def test_malformed_content_length_is_rejected(client):
+    """A Content-Length that is not a number is a 400."""
+    response = post(client, multipart(PDF_BYTES), headers={"Content-Length": "lots"})
+
+    assert response.status_code == 400
+    assert stored_files() == []
@@ -33,6 +33,7 @@ import {
   DEFAULT_CHAT_MODEL,
   modelsByProvider,
 } from "@/lib/ai/models";
+import { waitForIngestionJob } from "@/lib/ai/provider";
 import type { Attachment, ChatMessage } from "@/lib/types";
 import { cn } from "@/lib/utils";
 import {
@@ -226,7 +227,8 @@ function PureMultimodalInput({
           });
 
           if (response.ok) {
-            const data = await response.json();
+            const job = await response.json();
+            await waitForIngestionJob(job.job_id);
             toast.success(`${file.name} uploaded successfully!`);
           } else {
             toast.error(`Failed to upload ${file.name}`);
@@ -3,6 +3,7 @@
 import { useState } from "react";
 import { Button } from "@/components/ui/button";
 import { Upload, CheckCircle2 } from "lucide-react";
+import { waitForIngestionJob } from "@/lib/ai/provider";
 
 interface PDFUploadProps {
   onUploadComplete?: () => void;
@@ -34,7 +35,8 @@ export function PDFUpload({ onUploadComplete }: PDFUploadProps) {
           throw new Error(`Upload failed: ${response.statusText}`);
         }
 
-        const data = await response.json();
+        const job = await response.json();
+        const data = await waitForIngestionJob(job.job_id);
         console.log("Uploaded:", data);
         successCount++;
         setUploadCount(successCount);
@@ -67,6 +67,31 @@ export async function ollamaChat(
   return data;
 }
 
+export async function waitForIngestionJob(
+  jobId: string,
+  intervalMs = 1000
+): Promise<any> {
+  const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8001";
+
+  // Uploads are processed in the background; poll until the job settles
+  while (true) {
+    const response = await fetch(`${API_URL}/api/v1/jobs/${jobId}`);
+    if (!response.ok) {
+      throw new Error(`Job status failed: ${response.statusText}`);
+    }
+
+    const job = await response.json();
+    if (job.status === "completed") {
+      return job;
+    }
+    if (job.status === "failed") {
+      throw new Error(`Processing failed: ${job.error}`);
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, intervalMs));
+  }
+}
+
 export async function uploadPDF(file: File): Promise<any> {
   const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8001";
 
@@ -82,7 +107,8 @@ export async function uploadPDF(file: File): Promise<any> {
     throw new Error(`Upload failed: ${response.statusText}`);
   }
 
-  return response.json();
+  const job = await response.json();
+  return waitForIngestionJob(job.job_id);
 }
 
 export async function listPDFs(): Promise<any[]> {